@@ -15,7 +15,7 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 from app.db.base import Base
-from app.db.models import user, user_mistake # Tüm modellerimizi import edelim
+from app.db.models import user, user_mistake, exercise_evaluation, question_bank, background_job # Tüm modellerimizi import edelim
 target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
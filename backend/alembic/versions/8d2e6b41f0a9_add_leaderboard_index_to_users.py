@@ -0,0 +1,44 @@
+"""Add leaderboard index to users
+
+Revision ID: 8d2e6b41f0a9
+Revises: 3f9a1c7d2b64
+Create Date: 2026-10-18 11:03:27.118462
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e6b41f0a9'
+down_revision: Union[str, Sequence[str], None] = '3f9a1c7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NULL puanlar DESC sıralamada (Postgres'te) en üste çıkacağı için önce 0'a çekiliyor.
+    op.execute("UPDATE users SET weekly_score = 0 WHERE weekly_score IS NULL")
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('weekly_score',
+               existing_type=sa.Integer(),
+               nullable=False,
+               server_default='0')
+
+    op.create_index('ix_users_weekly_score_id', 'users',
+                    [sa.text('weekly_score DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_weekly_score_id', table_name='users')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('weekly_score',
+               existing_type=sa.Integer(),
+               nullable=True,
+               server_default=None)
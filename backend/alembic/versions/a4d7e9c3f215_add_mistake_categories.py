@@ -0,0 +1,149 @@
+"""Add mistake categories and per-user category counts
+
+Revision ID: a4d7e9c3f215
+Revises: 5e8c2f4a9b17
+Create Date: 2026-10-18 14:22:47.518306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import re
+
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d7e9c3f215'
+down_revision: Union[str, Sequence[str], None] = '5e8c2f4a9b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Geriye dönük doldurma için app.services.mistake_classifier kurallarının bu revizyondaki
+# dondurulmuş kopyası; uygulama kodu sonradan değişse de migration aynı sonucu üretir.
+_BE_PRESENT = {"am", "is", "are", "'m", "'s", "'re"}
+_BE_PAST = {"was", "were"}
+_AGREEMENT_PAIRS = ({"do", "does"}, {"has", "have"}, {"don't", "doesn't"}, {"hasn't", "haven't"})
+_TENSE_MARKERS = {"did", "had", "was", "were", "will", "would", "been", "being", "going"}
+_IRREGULAR_PAST = {
+    "went": "go", "ate": "eat", "saw": "see", "came": "come", "took": "take", "made": "make",
+    "got": "get", "gave": "give", "bought": "buy", "wrote": "write", "ran": "run", "drank": "drink",
+    "spoke": "speak", "began": "begin", "knew": "know", "thought": "think", "found": "find",
+    "told": "tell", "left": "leave", "felt": "feel", "slept": "sleep", "swam": "swim",
+}
+_ARTICLES = {"a", "an", "the"}
+_PREPOSITIONS = {
+    "in", "on", "at", "to", "for", "from", "with", "by", "of", "about",
+    "into", "onto", "under", "over", "between", "behind", "during", "since", "until",
+}
+_PRONOUNS = {
+    "i", "you", "he", "she", "it", "we", "they", "me", "him", "her", "us", "them",
+    "my", "your", "his", "its", "our", "their", "mine", "yours", "hers", "ours", "theirs",
+}
+
+
+def _words(text):
+    return re.findall(r"[a-z']+", (text or "").lower())
+
+
+def _same_stem(first, second):
+    short, long = sorted((first, second), key=len)
+    if not long.startswith(short[:max(3, len(short) - 1)]):
+        return None
+    suffix = long[len(short):] if long.startswith(short) else long[len(short) - 1:]
+    if suffix in ("s", "es", "ies"):
+        return "subject_verb_agreement"
+    if suffix in ("ed", "d", "ied", "ing"):
+        return "tense"
+    return None
+
+
+def _classify(question, user_answer, correct_answer):
+    if (question or "").startswith("Kelime Eşleştirme"):
+        return "word_matching"
+
+    user_words, correct_words = _words(user_answer), _words(correct_answer)
+    if len(user_words) != 1 or len(correct_words) != 1:
+        return "dialogue" if len(correct_words) > 2 else "other"
+
+    user_word, correct_word = user_words[0], correct_words[0]
+    pair = {user_word, correct_word}
+    if pair <= _BE_PRESENT or pair <= _BE_PAST:
+        return "be_agreement"
+    if pair <= _BE_PRESENT | _BE_PAST:
+        return "tense"
+    if any(pair <= agreement for agreement in _AGREEMENT_PAIRS):
+        return "subject_verb_agreement"
+    if pair & _TENSE_MARKERS:
+        return "tense"
+    for word, other in ((user_word, correct_word), (correct_word, user_word)):
+        base = _IRREGULAR_PAST.get(word)
+        if base and other.startswith(base):
+            return "tense"
+    if pair <= _ARTICLES:
+        return "article"
+    if pair <= _PREPOSITIONS:
+        return "preposition"
+    if pair <= _PRONOUNS:
+        return "pronoun"
+    return _same_stem(user_word, correct_word) or "vocabulary"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user_mistakes', sa.Column('category', sa.String(), nullable=True))
+    user_mistake_stats = op.create_table('user_mistake_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'category')
+    )
+
+    # Mevcut hataları sınıflandırıp sayaçları geriye dönük doldur.
+    user_mistakes = sa.table(
+        'user_mistakes',
+        sa.column('id', sa.Integer),
+        sa.column('owner_id', sa.Integer),
+        sa.column('question_text', sa.String),
+        sa.column('user_answer', sa.String),
+        sa.column('correct_answer', sa.String),
+        sa.column('category', sa.String),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(
+        user_mistakes.c.id,
+        user_mistakes.c.owner_id,
+        user_mistakes.c.question_text,
+        user_mistakes.c.user_answer,
+        user_mistakes.c.correct_answer,
+    )).all()
+    if not rows:
+        return
+
+    updates = []
+    counts = {}
+    for row in rows:
+        category = _classify(row.question_text, row.user_answer, row.correct_answer)
+        updates.append({"mistake_id": row.id, "mistake_category": category})
+        if row.owner_id is not None:
+            counts[(row.owner_id, category)] = counts.get((row.owner_id, category), 0) + 1
+
+    connection.execute(
+        user_mistakes.update()
+        .where(user_mistakes.c.id == sa.bindparam('mistake_id'))
+        .values(category=sa.bindparam('mistake_category')),
+        updates
+    )
+    if counts:
+        op.bulk_insert(user_mistake_stats, [
+            {"user_id": user_id, "category": category, "count": count}
+            for (user_id, category), count in counts.items()
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_mistake_stats')
+    op.drop_column('user_mistakes', 'category')
@@ -0,0 +1,30 @@
+"""Add spaced-repetition review schedule to user mistakes
+
+Revision ID: c52b8e1d7a36
+Revises: a4d7e9c3f215
+Create Date: 2026-10-18 16:05:12.734921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c52b8e1d7a36'
+down_revision: Union[str, Sequence[str], None] = 'a4d7e9c3f215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('user_mistakes', sa.Column('review_box', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('user_mistakes', sa.Column('review_due_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user_mistakes', 'review_due_at')
+    op.drop_column('user_mistakes', 'review_box')
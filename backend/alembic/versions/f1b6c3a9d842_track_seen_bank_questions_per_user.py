@@ -0,0 +1,69 @@
+"""Track seen bank questions per user and dedupe questions per type and level
+
+Revision ID: f1b6c3a9d842
+Revises: e3a8d1c6f420
+Create Date: 2026-10-18 20:41:37.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b6c3a9d842'
+down_revision: Union[str, Sequence[str], None] = 'e3a8d1c6f420'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_seen_questions',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['question_bank.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'question_id')
+    )
+    # Eski ilerleme sınırına kadarki tüm sorular görülmüş sayılır.
+    op.execute(
+        "INSERT INTO user_seen_questions (user_id, question_id) "
+        "SELECT p.user_id, q.id FROM user_question_progress p "
+        "JOIN question_bank q ON q.exercise_type = p.exercise_type AND q.level = p.level "
+        "AND q.id <= p.last_question_id"
+    )
+    op.drop_table('user_question_progress')
+
+    op.drop_index(op.f('ix_question_bank_content_hash'), table_name='question_bank')
+    op.create_index('ix_question_bank_type_level_hash', 'question_bank', ['exercise_type', 'level', 'content_hash'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Tek sütunlu tekil indeksten önce, farklı tip/seviyedeki aynı içerikli kopyalar silinir.
+    duplicates = (
+        "SELECT id FROM question_bank q WHERE EXISTS ("
+        "SELECT 1 FROM question_bank o WHERE o.content_hash = q.content_hash AND o.id < q.id)"
+    )
+    op.execute(f"DELETE FROM user_seen_questions WHERE question_id IN ({duplicates})")
+    op.execute(f"DELETE FROM question_bank WHERE id IN ({duplicates})")
+    op.drop_index('ix_question_bank_type_level_hash', table_name='question_bank')
+    op.create_index(op.f('ix_question_bank_content_hash'), 'question_bank', ['content_hash'], unique=True)
+
+    op.create_table('user_question_progress',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('exercise_type', sa.String(), nullable=False),
+    sa.Column('level', sa.String(), nullable=False),
+    sa.Column('last_question_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'exercise_type', 'level')
+    )
+    op.execute(
+        "INSERT INTO user_question_progress (user_id, exercise_type, level, last_question_id) "
+        "SELECT s.user_id, q.exercise_type, q.level, MAX(q.id) FROM user_seen_questions s "
+        "JOIN question_bank q ON q.id = s.question_id "
+        "GROUP BY s.user_id, q.exercise_type, q.level"
+    )
+    op.drop_table('user_seen_questions')
@@ -1,7 +1,11 @@
-from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, exercises
+from fastapi import APIRouter, Depends
+from app.api.v1.endpoints import auth, users, exercises, stats
+from app.core.security import require_internal_access
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["Auth"])
 api_router.include_router(users.router, prefix="/users", tags=["Users"])
-api_router.include_router(exercises.router, prefix="/exercise", tags=["Exercises"])
\ No newline at end of file
+api_router.include_router(exercises.router, prefix="/exercise", tags=["Exercises"])
+api_router.include_router(
+    stats.router, prefix="/stats", tags=["Stats"], dependencies=[Depends(require_internal_access)]
+)
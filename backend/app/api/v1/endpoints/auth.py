@@ -1,52 +1,61 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas import user as user_schema
 from app.schemas import token as token_schema
 from app.crud import crud_user
 from app.db.base import get_db
 from app.core import security
+from app.core.password_hasher import password_hasher
 
 router = APIRouter()
 
 
 @router.post("/register", response_model=user_schema.User, status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
         *,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         user_in: user_schema.UserCreate
 ):
-    user = crud_user.get_user_by_email(db, email=user_in.email)
+    user = await crud_user.get_user_by_email(db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Bu e-posta adresine sahip bir kullanıcı zaten mevcut.",
         )
-    user_by_username = crud_user.get_user_by_username(db, username=user_in.username)
+    user_by_username = await crud_user.get_user_by_username(db, username=user_in.username)
     if user_by_username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Bu kullanıcı adı zaten alınmış.",
         )
-    new_user = crud_user.create_user(db=db, user=user_in)
+    hashed_password = await password_hasher.hash(user_in.password)
+    new_user = await crud_user.create_user(db=db, user=user_in, hashed_password=hashed_password)
     return new_user
 
 
 @router.post("/login", response_model=token_schema.Token)
-def login_for_access_token(
-        db: Session = Depends(get_db),
+async def login_for_access_token(
+        db: AsyncSession = Depends(get_db),
         form_data: OAuth2PasswordRequestForm = Depends()
 ):
-    user = crud_user.get_user_by_email(db, email=form_data.username)
+    user = await crud_user.get_user_by_email(db, email=form_data.username)
 
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Yanlış e-posta veya şifre.",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    if new_hash:
+        await crud_user.update_user_password_hash(db, user=user, hashed_password=new_hash)
+
     access_token = security.create_access_token(
         data={"sub": user.email}
     )
@@ -1,59 +1,189 @@
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Literal
+import orjson
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 
 from app import services
 from app.db.models import user
 from app.schemas import exercise as exercise_schema
 from app.db import models as user_model
 from app.crud import crud_user
-from app.db.base import get_db
+from app.db.base import get_db, release_connection, SessionLocal
+from app.core.responses import ORJSONResponse
 from app.core.security import get_current_user
-from app.services import gemini_service
+from app.core.config import settings
+from app.services import evaluation_service, gemini_service, llm, question_bank, review_scheduler
+from app.services.exercise_pool import exercise_pool
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-ExerciseType = Literal["grammar", "dialogue", "word_matching"]
+ExerciseType = exercise_schema.ExerciseType
 
-@router.get("/", response_model=exercise_schema.ExerciseSession)
-def get_new_exercise(
-    exercise_type: ExerciseType = Query(..., description="Oluşturulacak alıştırma tipi"),
-    db: Session = Depends(get_db),
-    current_user: user_model.user.User = Depends(get_current_user)
-):
-    ai_response = gemini_service.create_exercise_from_ai(
+async def _generate_session(exercise_type: str, level: str) -> Optional[exercise_schema.ValidatedSession]:
+    if settings.EXERCISE_POOL_ENABLED:
+        return await exercise_pool.acquire(exercise_type, level)
+
+    ai_response = await gemini_service.create_exercise_from_ai_async(
         exercise_type=exercise_type,
-        user_level=current_user.current_level
+        user_level=level
     )
     if not ai_response or "questions" not in ai_response:
+        return None
+    return exercise_schema.ValidatedSession(exercise_type, ai_response["questions"])
+
+@router.get("/", response_model=exercise_schema.ExerciseSession)
+async def get_new_exercise(
+    exercise_type: exercise_schema.SessionType = Query(..., description="Oluşturulacak alıştırma tipi"),
+    db: AsyncSession = Depends(get_db),
+    current_user: user_model.user.User = Depends(get_current_user)
+):
+    """
+    Returns a new exercise session, from the question bank when the user has unseen
+    questions there and freshly generated otherwise. `review` sessions are built from
+    the user's own past mistakes that are due for repetition, without calling the AI;
+    send their `review_ids` back with the evaluation.
+    """
+    if exercise_type == review_scheduler.EXERCISE_TYPE:
+        session = await review_scheduler.take_session(db, current_user.id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Şu anda tekrar edilecek bir hatan yok.")
+        return ORJSONResponse(session.to_dict())
+
+    level = current_user.current_level
+    if settings.QUESTION_BANK_ENABLED:
+        session = await question_bank.take_session(db, current_user.id, exercise_type, level)
+        if session is not None:
+            return ORJSONResponse(session.to_dict())
+
+    # AI beklenirken bağlantı havuzda kalsın; oturum sonra yeni bir bağlantı alır.
+    await release_connection(db)
+    overloaded = None
+    try:
+        session = await _generate_session(exercise_type, level)
+    except llm.Overloaded as e:
+        session, overloaded = None, e
+    if session is None and settings.QUESTION_BANK_ENABLED:
+        # AI'a ulaşılamıyor (yük, devre açık, süre doldu veya hata): görülmüş sorular da olsa bankadan sun.
+        session = await question_bank.take_fallback_session(db, exercise_type, level)
+        if session is not None:
+            return ORJSONResponse(session.to_dict())
+    if overloaded is not None:
+        raise overloaded
+    if session is None:
         raise HTTPException(
             status_code=500,
             detail=f"AI'dan '{exercise_type}' alıştırması oluşturulamadı."
         )
-    return exercise_schema.ExerciseSession(
-        exercise_type=exercise_type,
-        questions=ai_response["questions"]
-    )
+
+    if settings.QUESTION_BANK_ENABLED:
+        await question_bank.store_session_questions(db, current_user.id, exercise_type, level, session.questions)
+    # Sorular AI çıktısı ayrıştırılırken doğrulandı; response_model ile yeniden doğrulanmaz.
+    return ORJSONResponse(session.to_dict())
+
+@router.get("/stream")
+async def stream_new_exercise(
+    exercise_type: ExerciseType = Query(..., description="Oluşturulacak alıştırma tipi"),
+    db: AsyncSession = Depends(get_db),
+    current_user: user_model.user.User = Depends(get_current_user)
+):
+    """
+    Streams an exercise as NDJSON: one `question` event per question as soon as it is
+    generated and validated, followed by a final `end` (or `error`) event.
+    """
+    user_id = current_user.id
+    level = current_user.current_level
+
+    ready_session = None
+    if settings.QUESTION_BANK_ENABLED:
+        ready_session = await question_bank.take_session(db, user_id, exercise_type, level)
+    is_new_session = ready_session is None
+    if ready_session is None and settings.EXERCISE_POOL_ENABLED:
+        ready_session = exercise_pool.take(exercise_type, level)
+    # Akış kendi kısa ömürlü oturumlarını açar; istek oturumunun bağlantısı şimdi bırakılır.
+    await release_connection(db)
+
+    async def event_stream():
+        questions = []
+        try:
+            if ready_session is not None:
+                for question in ready_session.questions:
+                    yield _ndjson_event("question", index=len(questions), question=question)
+                    questions.append(question)
+            else:
+                generated = gemini_service.stream_exercise_questions_from_ai(exercise_type, level)
+                async for question in generated:
+                    yield _ndjson_event("question", index=len(questions), question=question)
+                    questions.append(question)
+        except Exception as e:
+            logger.warning("AI Stream Error: %s", e)
+
+        from_fallback = False
+        if not questions and settings.QUESTION_BANK_ENABLED:
+            async with SessionLocal() as fallback_db:
+                fallback_session = await question_bank.take_fallback_session(fallback_db, exercise_type, level)
+            if fallback_session is not None:
+                from_fallback = True
+                for question in fallback_session.questions:
+                    yield _ndjson_event("question", index=len(questions), question=question)
+                    questions.append(question)
+
+        if not questions:
+            yield _ndjson_event("error", detail=f"AI'dan '{exercise_type}' alıştırması oluşturulamadı.")
+            return
+        yield _ndjson_event("end", exercise_type=exercise_type, count=len(questions))
+
+        if settings.QUESTION_BANK_ENABLED and is_new_session and not from_fallback:
+            # İstek kapsamındaki oturum yanıt akarken kapanmış olabilir.
+            async with SessionLocal() as stream_db:
+                await question_bank.store_session_questions(stream_db, user_id, exercise_type, level, questions)
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
+def _ndjson_event(event: str, **data) -> bytes:
+    return orjson.dumps({"event": event, **data}) + b"\n"
+
 
 @router.post("/evaluate", response_model=exercise_schema.EvaluationResult)
-def evaluate_exercise(
+async def evaluate_exercise(
     payload: exercise_schema.EvaluationPayload,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: user.User = Depends(get_current_user)
 ):
-    evaluation = services.gemini_service.evaluate_exercise_from_ai(
-        results=payload.dict(),
-        username=current_user.username
+    """
+    Scores the exercise locally and returns at once with a templated feedback message.
+    The personalized AI feedback is generated by a background job and can be fetched
+    from `/exercise/evaluations/{evaluation_id}/feedback`.
+    """
+    evaluation_id, score = await evaluation_service.record_evaluation(db, current_user, payload)
+
+    return exercise_schema.EvaluationResult(
+        score=score,
+        feedback=evaluation_service.build_instant_feedback(current_user.username, score, payload.wrong_answers),
+        evaluation_id=evaluation_id
     )
-    if not evaluation:
-        raise HTTPException(
-            status_code=500,
-            detail="AI'dan değerlendirme sonucu alınamadı."
-        )
-    current_user.weekly_score += evaluation["score"]
-    for mistake in payload.wrong_answers:
-        crud_user.create_user_mistake(db=db, user_id=current_user.id, mistake_in=mistake)
-    crud_user.delete_oldest_mistakes(db=db, user_id=current_user.id, keep_limit=50)
-    db.commit()
-    db.refresh(current_user)
-    return evaluation
\ No newline at end of file
+
+
+@router.get("/evaluations/{evaluation_id}/feedback", response_model=exercise_schema.EvaluationFeedback)
+async def read_evaluation_feedback(
+    evaluation_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: user.User = Depends(get_current_user)
+):
+    """
+    Returns the personalized AI feedback of an evaluation, `pending` while it is being
+    generated, or `failed` if the background job gave up; the instant feedback then stands.
+    """
+    evaluation = await crud_user.get_evaluation(db, evaluation_id=evaluation_id, user_id=current_user.id)
+    if evaluation is None:
+        raise HTTPException(status_code=404, detail="Değerlendirme bulunamadı.")
+    return exercise_schema.EvaluationFeedback(
+        evaluation_id=evaluation.id,
+        status=await evaluation_service.feedback_status(db, evaluation),
+        feedback=evaluation.feedback
+    )
\ No newline at end of file
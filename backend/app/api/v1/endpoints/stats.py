@@ -0,0 +1,133 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import principal_cache
+from app.core.password_hasher import password_hasher
+from app.db import base as db_base
+from app.db import routing as db_routing
+
+from app.services import feedback_cache, jobs, leaderboard_cache, leaderboard_push, llm, prompts, question_bank, review_scheduler
+from app.services.exercise_parser import generation_stats
+from app.services.exercise_pool import exercise_pool
+
+router = APIRouter()
+
+
+@router.get("/exercise-pool")
+def read_exercise_pool_stats():
+    """
+    Per-bucket size and hit/miss counters of the pre-generated exercise pool.
+    """
+    return exercise_pool.stats()
+
+
+@router.get("/exercise-generation")
+def read_exercise_generation_stats():
+    """
+    Counters for AI exercise responses: accepted as-is, salvaged after dropping
+    invalid questions, rejected, and per-question repairs.
+    """
+    return generation_stats
+
+
+@router.get("/principal-cache")
+def read_principal_cache_stats():
+    """
+    Size and hit rate of the per-worker token and user caches behind get_current_user.
+    """
+    return principal_cache.stats()
+
+
+@router.get("/password-hasher")
+def read_password_hasher_stats():
+    """
+    Queue depth, in-flight and rejected counts of the bcrypt executor.
+    """
+    return password_hasher.stats()
+
+
+@router.get("/feedback-cache")
+def read_feedback_cache_stats():
+    """
+    Size and hit rate of the AI coach feedback cache.
+    """
+    return feedback_cache.stats()
+
+
+@router.get("/leaderboard-cache")
+def read_leaderboard_cache_stats():
+    """
+    Serialized leaderboard pages cached in this worker and how often they were served without a query.
+    """
+    return leaderboard_cache.stats()
+
+
+@router.get("/leaderboard-push")
+def read_leaderboard_push_stats():
+    """
+    Live leaderboard channel of this worker: broker, connected clients, how many change
+    notifications led to a query and a diff, and clients that were resynced for falling behind.
+    """
+    return leaderboard_push.stats()
+
+
+@router.get("/question-bank")
+def read_question_bank_stats():
+    """
+    How many exercise sessions were assembled from the question bank versus newly generated.
+    """
+    return question_bank.stats()
+
+
+@router.get("/review")
+def read_review_stats():
+    """
+    Review sessions served from users' own mistakes without an AI call, and how the
+    reviewed mistakes were answered: correct, lapsed back to the start, or mastered.
+    """
+    return review_scheduler.stats()
+
+
+@router.get("/prompts")
+def read_prompt_stats():
+    """
+    Per prompt template and variant: calls, validity rate, latency and token usage
+    reported by Gemini, for comparing the verbose and compact variants.
+    """
+    return prompts.stats()
+
+
+@router.get("/llm")
+def read_llm_stats():
+    """
+    Active LLM provider, how many concurrent identical requests shared one upstream call,
+    circuit breaker state, and how often hedged second attempts were fired and won.
+    """
+    return llm.stats()
+
+
+@router.get("/db-pool")
+def read_db_pool_stats():
+    """
+    Database connection pool usage of this worker: pooled connections, how many are
+    checked out right now and how far the pool has grown into its overflow.
+    """
+    return db_base.pool_stats()
+
+
+@router.get("/db-routing")
+def read_db_routing_stats():
+    """
+    Where read-only sessions went: read replicas, the primary because no replica was
+    configured or reachable, or the primary because the client had just written.
+    """
+    return db_routing.stats()
+
+
+@router.get("/jobs")
+async def read_job_stats(db: AsyncSession = Depends(db_base.get_db)):
+    """
+    Background jobs per queue and status across all workers, and what the worker running
+    inside this process (if any) has claimed, finished, retried and given up on.
+    """
+    return await jobs.stats(db)
@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
+import asyncio
+import base64
+import binascii
+from contextlib import suppress
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.responses import ORJSONResponse, etag_matches
 from app.crud import crud_user
-from app.db.base import get_db
+from app.db.base import get_db, release_connection
+from app.db.routing import get_read_db, read_session
 from app.schemas import user as user_schema
 from app.db.models import user as user_model
 from app.core.security import get_current_user
-from app.services import gemini_service
+from app.services import feedback_cache, gemini_service, leaderboard_cache, leaderboard_push, llm, prompts
 
 router = APIRouter()
 
@@ -18,41 +28,198 @@ def read_users_me(
     return current_user
 
 @router.get("/leaderboard", response_model=List[user_schema.User])
-def read_leaderboard(
-    db: Session = Depends(get_db),
+async def read_leaderboard(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
-    limit: int = 100
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Önceki sayfanın X-Next-Cursor değeri")
 ):
-    leaderboard_users = crud_user.get_users_sorted_by_score(db, skip=skip, limit=limit)
-    return leaderboard_users
+    """
+    Returns the leaderboard ordered by weekly score. Pass the `X-Next-Cursor` header of a
+    page as `cursor` to fetch the next one; `skip` is kept for offset-based clients.
+    Pages carry an `ETag`; send it back in `If-None-Match` to get `304 Not Modified`
+    while the page is unchanged.
+    """
+    after = _decode_cursor(cursor) if cursor is not None else None
+    key = (skip, limit, after)
+    page = leaderboard_cache.get(key)
+    if page is None:
+        read_version = leaderboard_cache.version
+        async with read_session(db) as read_db:
+            if after is not None:
+                leaderboard_users = await crud_user.get_leaderboard_page(read_db, limit=limit, after=after)
+            else:
+                leaderboard_users = await crud_user.get_users_sorted_by_score(read_db, skip=skip, limit=limit)
+
+        next_cursor = None
+        if len(leaderboard_users) == limit:
+            last_user = leaderboard_users[-1]
+            next_cursor = _encode_cursor(last_user.weekly_score, last_user.id)
+        page = leaderboard_cache.store(key, leaderboard_cache.serialize(leaderboard_users), next_cursor, read_version)
+
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if page.next_cursor is not None:
+        headers["X-Next-Cursor"] = page.next_cursor
+    if etag_matches(request, page.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return ORJSONResponse(page.body, headers=headers)
+
+
+@router.websocket("/leaderboard/ws")
+async def leaderboard_websocket(websocket: WebSocket):
+    """
+    Live leaderboard. The first message is a `snapshot` of the top entries; after that only
+    `diff` messages carrying the entries whose rank or score changed and the ids that left.
+    Clients that fall behind receive a fresh `snapshot` instead of the missed diffs.
+    """
+    await websocket.accept()
+    subscriber = await leaderboard_push.subscribe()
+    receiver = asyncio.create_task(_wait_for_disconnect(websocket))
+    sender = asyncio.create_task(_push_to_websocket(websocket, subscriber))
+    try:
+        done, _ = await asyncio.wait({receiver, sender}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        leaderboard_push.unsubscribe(subscriber)
+        receiver.cancel()
+        sender.cancel()
+    if sender in done and sender.exception() is not None:
+        # Gönderim süresi doldu veya bağlantı koptu; istemci yeniden bağlanıp anlık görüntü alır.
+        with suppress(Exception):
+            await websocket.close(code=1013)
+
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    # İstemciden gelen mesajlar yok sayılır.
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+async def _push_to_websocket(websocket: WebSocket, subscriber: leaderboard_push.Subscriber):
+    while True:
+        message = await subscriber.next()
+        await asyncio.wait_for(
+            websocket.send_text(message.decode()),
+            settings.LEADERBOARD_PUSH_SEND_TIMEOUT_SECONDS,
+        )
+
+
+@router.get("/leaderboard/stream")
+async def stream_leaderboard():
+    """
+    The live leaderboard as Server-Sent Events, for clients without WebSocket support.
+    Each `data:` line holds the same `snapshot` or `diff` message as the WebSocket channel.
+    """
+    async def event_stream():
+        subscriber = await leaderboard_push.subscribe()
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        subscriber.next(), settings.LEADERBOARD_PUSH_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Aradaki proxy'ler boşta kalan bağlantıyı kapatmasın.
+                    yield b": keepalive\n\n"
+                    continue
+                yield b"data: " + message + b"\n\n"
+        finally:
+            leaderboard_push.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _encode_cursor(weekly_score: int, user_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{weekly_score}:{user_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        weekly_score, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return int(weekly_score), int(user_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Geçersiz sayfalama imleci.",
+        )
+
+
+@router.get("/me/rank", response_model=user_schema.UserRank)
+async def read_my_rank(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: user_model.User = Depends(get_current_user)
+):
+    """
+    Returns the current user's leaderboard rank using an index range count.
+    """
+    return user_schema.UserRank(
+        rank=await crud_user.get_user_rank(db, current_user),
+        weekly_score=current_user.weekly_score
+    )
+
+
+def _stale_feedback(user_id: int) -> Optional[str]:
+    """AI'a ulaşılamadığında sunulan, kullanıcının son başarılı tavsiyesi."""
+    stale_message = feedback_cache.get_latest(user_id)
+    if stale_message is not None:
+        metrics.count_fallback("stale_feedback")
+    return stale_message
 
 
 @router.get("/me/feedback", response_model=str)
-def get_user_feedback(
-        db: Session = Depends(get_db),
+async def get_user_feedback(
+        db: AsyncSession = Depends(get_read_db),
         current_user: user_schema.User = Depends(get_current_user)
 ):
     """
-    Retrieves a personalized feedback message for the current user based on their recent mistakes.
+    Retrieves a personalized feedback message for the current user based on their per-category
+    mistake counts. The message is cached until new mistakes are recorded.
     """
-    recent_mistakes = crud_user.get_mistakes_by_user_id(db, user_id=current_user.id)
+    mistake_counts = await crud_user.get_mistake_counts(db, user_id=current_user.id)
+    latest_mistake_id = await crud_user.get_latest_mistake_id(db, user_id=current_user.id)
+    # Varyant kullanıcıya göre sabittir; önbellekteki tavsiye hep aynı varyanttan gelir.
+    variant = prompts.choose_variant(current_user.id)
+    cache_key = feedback_cache.fingerprint(mistake_counts, latest_mistake_id, variant)
 
-    feedback_message = gemini_service.generate_feedback_from_mistakes(
-        mistakes=recent_mistakes,
-        username=current_user.username
-    )
+    feedback_message = feedback_cache.get(current_user.id, cache_key)
+    if feedback_message is None:
+        recent_mistakes = []
+        if mistake_counts:
+            recent_mistakes = await crud_user.get_mistakes_by_user_id(db, user_id=current_user.id)
+        # AI beklenirken bağlantı havuzda kalsın.
+        await release_connection(db)
+        try:
+            feedback_message = await gemini_service.generate_feedback_from_mistakes_async(
+                mistake_counts=mistake_counts,
+                recent_mistakes=recent_mistakes,
+                username=current_user.username,
+                variant=variant
+            )
+        except llm.Overloaded:
+            stale_message = _stale_feedback(current_user.id)
+            if stale_message is None:
+                raise
+            return stale_message
+        if feedback_message == gemini_service.FEEDBACK_FALLBACK_MESSAGE:
+            # Yedek mesajlar önbelleğe alınmaz; bir sonraki istek tekrar dener.
+            return _stale_feedback(current_user.id) or feedback_message
+        feedback_cache.set(current_user.id, cache_key, feedback_message)
 
     return feedback_message
 
 @router.put("/me/level", response_model=user_schema.User)
-def update_current_user_level(
+async def update_current_user_level(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     level_in: user_schema.UserLevelUpdate,
     current_user: user_model.User = Depends(get_current_user)
 ):
     """
     Update the level of the current user.
     """
-    updated_user = crud_user.update_user_level(db=db, user=current_user, new_level=level_in.level)
+    updated_user = await crud_user.update_user_level(db=db, user=current_user, new_level=level_in.level)
     return updated_user
\ No newline at end of file
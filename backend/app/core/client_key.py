@@ -0,0 +1,44 @@
+import hashlib
+from contextvars import ContextVar
+
+ANONYMOUS = "anonymous"
+
+# İsteği yapan istemcinin kimliği: bearer token'ın özeti, yoksa istemci adresi. Adil
+# paylaştırma gereken yerlerde (ör. AI çağrı kuyruğu) kullanıcıları ayırt etmek içindir;
+# token doğrulanmaz, bu yüzden yetkilendirme için kullanılmamalıdır.
+_client_key: ContextVar[str] = ContextVar("client_key", default=ANONYMOUS)
+
+
+def get() -> str:
+    return _client_key.get()
+
+
+def set(key: str):
+    """Geçerli context'in (ör. arka plan task'ının) istemci kimliğini değiştirir."""
+    _client_key.set(key)
+
+
+def _key_from_scope(scope) -> str:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization" and value[:7].lower() == b"bearer ":
+            return "token:" + hashlib.sha256(value[7:]).hexdigest()[:16]
+    client = scope.get("client")
+    return f"addr:{client[0]}" if client else ANONYMOUS
+
+
+class ClientKeyMiddleware:
+    """Her HTTP isteğinin istemci kimliğini context'e yazar."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _client_key.set(_key_from_scope(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _client_key.reset(token)
@@ -6,8 +6,126 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     GEMINI_API_KEY: str
+    # /metrics ve /api/v1/stats/* yalnızca bu token'la (Authorization: Bearer <token>) açılır;
+    # boşsa bu iç uç noktalar tamamen kapalıdır (404).
+    INTERNAL_API_TOKEN: str = ""
+
+    # Worker başına veritabanı bağlantı havuzu. Bağlantılar AI beklemeleri sırasında tutulmadığı
+    # için küçük bir havuz çok sayıda eşzamanlı isteğe yeter.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Okuma replikaları (virgülle ayrılmış URL'ler); boşsa tüm okumalar birincil veritabanına gider.
+    # Her replika worker başına yukarıdaki ayarlarla ayrı bir havuz açar.
+    DATABASE_REPLICA_URLS: str = ""
+    # Bir istemcinin kendi yazmasından sonra okumalarının birincilden yapıldığı süre; replika
+    # gecikmesinin üst sınırından uzun olmalıdır.
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+    # Bağlanılamayan bir replika bu süre boyunca atlanır.
+    DB_REPLICA_RETRY_SECONDS: float = 30.0
+    # Şema entrypoint.sh'deki 'alembic upgrade head' ile kurulur; tabloları uygulama
+    # başlangıcında create_all ile oluşturmak yalnızca migration'sız yerel geliştirme içindir.
+    DB_CREATE_TABLES_ON_STARTUP: bool = False
+
+    # Önceden üretilmiş alıştırma havuzu (exercise_type x seviye başına)
+    EXERCISE_POOL_ENABLED: bool = True
+    EXERCISE_POOL_DEPTH: int = 3
+    EXERCISE_POOL_LOW_WATER: int = 1
+    EXERCISE_POOL_REFILL_WORKERS: int = 2
+    EXERCISE_POOL_WARM_ON_STARTUP: bool = False
+    # Bir alıştırma oturumundaki soru sayısı
+    EXERCISE_SESSION_SIZE: int = 5
+    # Bir AI yanıtının kullanılabilmesi için gereken en az geçerli soru sayısı
+    EXERCISE_MIN_QUESTIONS: int = 3
+
+    # Üretilen soruların kalıcı bankası ve kullanıcı başına görülen soru takibi
+    QUESTION_BANK_ENABLED: bool = True
+
+    # get_current_user için süreç içi token/kullanıcı önbelleği
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+
+    # bcrypt işleri için ayrı thread havuzu; 0 ise çekirdek sayısı kullanılır
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_MAX_IN_FLIGHT: int = 64
+
+    # AI koçu tavsiyeleri için önbellek (hata geçmişi parmak izine göre)
+    FEEDBACK_CACHE_MAX_ENTRIES: int = 5000
+    FEEDBACK_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+
+    # Liderlik tablosu sayfalarının serileştirilmiş hali. Yazmalar aynı worker'ın önbelleğini
+    # hemen geçersiz kılar; diğer worker'lar push broker'ının bildirimiyle, broker yoksa en
+    # fazla TTL kadar gecikmeyle.
+    LEADERBOARD_CACHE_MAX_ENTRIES: int = 1000
+    LEADERBOARD_CACHE_TTL_SECONDS: int = 5
+    # Liderlik tablosu push kanalı: ilk N sıranın anlık görüntüsü, sonra yalnızca farklar.
+    # Worker'lar arası bildirim: "postgres" (LISTEN/NOTIFY), "local" (tek süreç) veya
+    # "auto" (veritabanı Postgres ise postgres).
+    LEADERBOARD_PUSH_BROKER: str = "auto"
+    LEADERBOARD_PUSH_TOP_N: int = 100
+    # Art arda gelen skor değişiklikleri tek bir okuma ve tek bir farkla yayınlanır.
+    LEADERBOARD_PUSH_DEBOUNCE_SECONDS: float = 0.5
+    # İstemci başına bekleyen mesaj sınırı; dolarsa farklar atılıp anlık görüntü gönderilir.
+    LEADERBOARD_PUSH_QUEUE_SIZE: int = 16
+    LEADERBOARD_PUSH_SEND_TIMEOUT_SECONDS: float = 10.0
+    LEADERBOARD_PUSH_KEEPALIVE_SECONDS: float = 15.0
+
+    # Yanıttan sonra yapılacak işlerin veritabanındaki kalıcı kuyruğu (background_jobs).
+    # entrypoint.sh işleri ayrı worker süreçlerinde çalıştırır ve bunu kapatır; açıkken her
+    # API süreci kendi içinde bir worker çalıştırır (ör. yerel geliştirmede).
+    JOBS_RUN_IN_APP: bool = True
+    # Bir worker'ın kuyruk başına aynı anda çalıştırdığı iş sayısı
+    JOB_WORKER_CONCURRENCY: int = 4
+    JOB_POLL_INTERVAL_SECONDS: float = 0.5
+    JOB_MAX_ATTEMPTS: int = 5
+    # Yeniden denemeler arasındaki bekleme her denemede ikiye katlanır.
+    JOB_RETRY_BASE_SECONDS: float = 2.0
+    JOB_RETRY_MAX_SECONDS: float = 300.0
+    # Bu süreden uzun 'running' kalan işin worker'ı çökmüş sayılır ve iş yeniden alınır.
+    JOB_LOCK_TIMEOUT_SECONDS: float = 300.0
+    # Tamamlanan işler (ve idempotency anahtarları) bu süre saklanır.
+    JOB_RETENTION_HOURS: int = 24
+
+    # Metin üreten model: "gemini" veya ağ gerektirmeyen deterministik "local"
+    LLM_PROVIDER: str = "gemini"
+    # Eşzamanlı aynı AI isteklerini tek bir upstream çağrısında birleştir
+    LLM_COALESCE_ENABLED: bool = True
+
+    # İstek ve AI çağrısı süre sınırları (saniye). İstemci X-Request-Timeout ile isteğin süresini kısaltabilir
+    REQUEST_TIMEOUT_SECONDS: float = 30.0
+    LLM_CALL_TIMEOUT_SECONDS: float = 45.0
+    # Hedging: yanıt şablonun son çağrılarındaki LLM_HEDGE_PERCENTILE süresini aşınca ikinci deneme başlatılır
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 1.0
+    # Çağrıların en fazla bu oranı ikinci denemeye gidebilir (upstream yavaşken yükü ikiye katlamamak için)
+    LLM_HEDGE_MAX_RATIO: float = 0.1
+    # Devre kesici: son LLM_BREAKER_WINDOW çağrının hata oranı eşiği aşarsa devre LLM_BREAKER_COOLDOWN_SECONDS açılır
+    LLM_BREAKER_ENABLED: bool = True
+    LLM_BREAKER_WINDOW: int = 20
+    LLM_BREAKER_MIN_CALLS: int = 10
+    LLM_BREAKER_FAILURE_RATE: float = 0.5
+    LLM_BREAKER_COOLDOWN_SECONDS: float = 30.0
+    # Upstream AI çağrıları için worker başına uyarlanan (AIMD) eşzamanlılık sınırı ve bekleme kuyruğu
+    LLM_LIMITER_ENABLED: bool = True
+    LLM_LIMITER_INITIAL_LIMIT: int = 10
+    LLM_LIMITER_MIN_LIMIT: int = 2
+    LLM_LIMITER_MAX_LIMIT: int = 100
+    LLM_LIMITER_MAX_QUEUE: int = 100
+    LLM_LIMITER_MAX_QUEUE_PER_CLIENT: int = 3
+    LLM_LIMITER_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    # Şablonun medyan süresinin bu katından yavaş biten çağrı aşırı yük işareti sayılır
+    LLM_LIMITER_LATENCY_TOLERANCE: float = 2.0
+    LLM_LIMITER_BACKOFF: float = 0.9
+
+    # Prompt şablonları: çağrıların bu oranı kısa (compact) varyanta gider (0 = hep uzun, 1 = hep kısa)
+    PROMPT_COMPACT_RATIO: float = 0.0
 
     class Config:
         env_file = ".env"
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Optional, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class _RequestDeadline:
+    def __init__(self, expires_at: float):
+        # İsteğin bitmesi gereken an (time.monotonic); yanıt gönderildikten sonra None.
+        self.expires_at: Optional[float] = expires_at
+
+
+# İstek dışında (arka plan görevleri, havuz doldurma) None'dır ve yalnızca çağrı başına
+# üst sınır uygulanır. Akış yanıtları gövdeyi ayrı bir task'ta gönderdiği için değer
+# context kopyaları arasında paylaşılan bir nesnedir.
+_deadline: ContextVar[Optional[_RequestDeadline]] = ContextVar("request_deadline", default=None)
+
+TIMEOUT_HEADER = b"x-request-timeout"
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """İsteğin süresi, beklenen iş tamamlanmadan doldu."""
+
+    def __init__(self, message: str = "request deadline exceeded"):
+        super().__init__(message)
+
+
+def remaining() -> Optional[float]:
+    """İsteğin kalan süresi (saniye); istek dışında None."""
+    request_deadline = _deadline.get()
+    if request_deadline is None or request_deadline.expires_at is None:
+        return None
+    return max(request_deadline.expires_at - time.monotonic(), 0.0)
+
+
+def detach():
+    """
+    Geçerli context'i istek süresinden ayırır. İstek içinde başlatılan ama istekten
+    uzun yaşaması gereken task'lar (ör. havuz doldurma) context'in bir kopyasıyla
+    çalıştığı için isteği etkilemez.
+    """
+    _deadline.set(None)
+
+
+async def wait(awaitable: Awaitable[T], limit: Optional[float] = None) -> T:
+    """
+    Bekleneni isteğin kalan süresiyle ve verildiyse 'limit' saniyeyle sınırlar. Süreyi
+    isteğin bitiş anı belirlediyse DeadlineExceeded, 'limit' belirlediyse
+    asyncio.TimeoutError fırlatılır.
+    """
+    request_timeout = remaining()
+    if request_timeout is None and limit is None:
+        return await awaitable
+    by_request = limit is None or (request_timeout is not None and request_timeout <= limit)
+    timeout = request_timeout if by_request else limit
+    if timeout <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded() if by_request else asyncio.TimeoutError()
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError as e:
+        if by_request:
+            raise DeadlineExceeded() from e
+        raise
+
+
+def _requested_timeout(scope) -> float:
+    timeout = settings.REQUEST_TIMEOUT_SECONDS
+    for name, value in scope.get("headers", ()):
+        if name == TIMEOUT_HEADER:
+            try:
+                requested = float(value)
+            except ValueError:
+                break
+            # İstemci süreyi yalnızca kısaltabilir.
+            if requested > 0:
+                timeout = min(timeout, requested)
+            break
+    return timeout
+
+
+class DeadlineMiddleware:
+    """
+    Her HTTP isteğine REQUEST_TIMEOUT_SECONDS (veya istemcinin X-Request-Timeout
+    başlığıyla verdiği daha kısa süre) kadar bir bitiş anı atar; AI çağrıları bu
+    süreden fazlasını beklemez. Yanıtın son baytı gönderildiğinde süre kaldırılır,
+    böylece aynı context'te çalışan arka plan görevleri istek süresiyle sınırlanmaz.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_deadline = _RequestDeadline(time.monotonic() + _requested_timeout(scope))
+        token = _deadline.set(request_deadline)
+
+        async def send_wrapper(message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                request_deadline.expires_at = None
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _deadline.reset(token)
@@ -0,0 +1,297 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Gunicorn altında her worker kendi değerlerini PROMETHEUS_MULTIPROC_DIR'deki
+# dosyalara yazar; /metrics isteği hangi worker'a düşerse düşsün tüm worker'ların
+# toplamı döndürülür (bkz. entrypoint.sh ve gunicorn.conf.py).
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP isteklerinin, yanıtın son baytı gönderilene kadar geçen süresi",
+    ["method", "route", "status"],
+)
+llm_request_duration = Histogram(
+    "llm_request_duration_seconds",
+    "Gemini çağrılarının süresi",
+    ["function", "exercise_type", "outcome"],
+    buckets=LLM_BUCKETS,
+)
+llm_tokens = Counter(
+    "llm_tokens",
+    "Gemini'nin usage_metadata ile bildirdiği token sayıları",
+    ["template", "variant", "kind"],
+)
+llm_coalesced_requests = Counter(
+    "llm_coalesced_requests",
+    "Uçuştaki aynı bir çağrının sonucunu paylaşarak upstream'e gitmeyen istekler",
+    ["template"],
+)
+llm_parse_failures = Counter(
+    "llm_parse_failures",
+    "Ayrıştırılamayan veya doğrulanamayan AI çıktıları",
+    ["target", "reason"],
+)
+llm_hedged_requests = Counter(
+    "llm_hedged_requests",
+    "Gecikme eşiğini aştığı veya hata verdiği için ikinci denemesi başlatılan çağrılar; "
+    "winner: yanıtı hangi denemenin verdiği (none: ikisi de başarısız)",
+    ["template", "winner"],
+)
+llm_circuit_state = Gauge(
+    "llm_circuit_state",
+    "AI devre kesicisinin durumu (0 kapalı, 1 yarı açık, 2 açık); worker'lar arasında en kötüsü",
+    multiprocess_mode="livemax",
+)
+llm_circuit_transitions = Counter(
+    "llm_circuit_transitions",
+    "AI devre kesicisinin durum değişiklikleri",
+    ["state"],
+)
+llm_rejected_requests = Counter(
+    "llm_rejected_requests",
+    "Yanıtı beklenmeden biten AI çağrıları; reason: circuit_open (upstream'e hiç "
+    "gönderilmedi) veya deadline (isteğin süresi doldu)",
+    ["template", "reason"],
+)
+llm_fallbacks = Counter(
+    "llm_fallbacks",
+    "AI çağrısı başarısız olduğunda yerine sunulan içerik",
+    ["kind"],
+)
+llm_limiter_limit = Gauge(
+    "llm_limiter_limit",
+    "Upstream AI çağrıları için uyarlanan eşzamanlılık sınırı (worker'ların toplamı)",
+    multiprocess_mode="livesum",
+)
+llm_limiter_in_flight = Gauge(
+    "llm_limiter_in_flight",
+    "Sınır içinde çalışan upstream AI çağrıları (worker'ların toplamı)",
+    multiprocess_mode="livesum",
+)
+llm_limiter_queued = Gauge(
+    "llm_limiter_queued",
+    "Eşzamanlılık sınırı yüzünden sırasını bekleyen AI çağrıları (worker'ların toplamı)",
+    multiprocess_mode="livesum",
+)
+llm_limiter_rejected = Counter(
+    "llm_limiter_rejected",
+    "Aşırı yük yüzünden reddedilen AI çağrıları; reason: queue_full, client_queue_full veya queue_timeout",
+    ["reason"],
+)
+llm_limiter_queue_wait = Histogram(
+    "llm_limiter_queue_wait_seconds",
+    "AI çağrılarının eşzamanlılık sınırı kuyruğunda beklediği süre",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10),
+)
+leaderboard_push_subscribers = Gauge(
+    "leaderboard_push_subscribers",
+    "Liderlik tablosu push kanalına (WebSocket/SSE) bağlı istemciler (worker'ların toplamı)",
+    multiprocess_mode="livesum",
+)
+leaderboard_push_messages = Counter(
+    "leaderboard_push_messages",
+    "Liderlik tablosu push kanalından istemcilere kuyruklanan mesajlar; kind: snapshot veya diff",
+    ["kind"],
+)
+leaderboard_push_resyncs = Counter(
+    "leaderboard_push_resyncs",
+    "Kuyruğu dolduğu için bekleyen farkları atılıp yeni bir anlık görüntü alan yavaş istemciler",
+)
+leaderboard_push_refreshes = Counter(
+    "leaderboard_push_refreshes",
+    "Skor değişikliği bildirimi üzerine worker'ın liderlik tablosunu yeniden okuması",
+)
+background_jobs_enqueued = Counter(
+    "background_jobs_enqueued",
+    "Kalıcı kuyruğa alınan işler (idempotency anahtarı tekrarı olanlar dahil)",
+    ["queue", "kind"],
+)
+background_jobs_processed = Counter(
+    "background_jobs_processed",
+    "Worker'ların bitirdiği iş denemeleri; outcome: done, retried, failed veya lost "
+    "(kilit süresi dolup iş başka worker'a geçti)",
+    ["queue", "kind", "outcome"],
+)
+background_job_duration = Histogram(
+    "background_job_duration_seconds",
+    "Bir iş denemesinin süresi",
+    ["queue"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+background_job_lag = Histogram(
+    "background_job_lag_seconds",
+    "İşin çalışma zamanı ile bir worker tarafından alınması arasında geçen süre",
+    ["queue"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 300),
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds",
+    "Tek bir SQL sorgusunun süresi",
+    ["route"],
+    buckets=DB_BUCKETS,
+)
+db_queries_per_request = Histogram(
+    "db_queries_per_request",
+    "Bir HTTP isteği boyunca çalıştırılan SQL sorgusu sayısı",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+db_time_per_request = Histogram(
+    "db_time_per_request_seconds",
+    "Bir HTTP isteği boyunca SQL sorgularında geçen toplam süre",
+    ["route"],
+    buckets=DB_BUCKETS,
+)
+
+BACKGROUND_ROUTE = "background"
+
+
+def route_template(scope) -> str:
+    """
+    İsteğin eşleştiği rota şablonu (örn. /api/v1/exercise/evaluations/{evaluation_id}/feedback).
+    Router eşleşmeyi yaptıktan sonra scope'a yazılır. Alt router'larda rota yalnızca kendi
+    yolunu bildiği için önek, gerçek yolun baştaki segmentlerinden tamamlanır.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    segments = scope["path"].rstrip("/").split("/")
+    depth = len(template.rstrip("/").split("/")) - 1
+    prefix = "/".join(segments[:len(segments) - depth])
+    return prefix + template if not template.startswith(prefix + "/") else template
+
+
+class _RequestDbStats:
+    def __init__(self, scope):
+        self.scope = scope
+        self.finished = False
+        self.queries = 0
+        self.duration = 0.0
+
+    @property
+    def route(self) -> str:
+        # Yanıttan sonra çalışan arka plan görevlerinin sorguları 'background' sayılır.
+        if self.finished:
+            return BACKGROUND_ROUTE
+        return route_template(self.scope)
+
+
+# İsteğe ait sorgu sayaçları. Asenkron oturumun sorguları greenlet içinde isteğin
+# context'iyle çalıştığı için aynı nesneyi günceller.
+_request_db: ContextVar[Optional[_RequestDbStats]] = ContextVar("request_db", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _request_db.get()
+    db_query_duration.labels(stats.route if stats else BACKGROUND_ROUTE).observe(duration)
+    if stats is not None and not stats.finished:
+        stats.queries += 1
+        stats.duration += duration
+
+
+def observe_llm_call(
+        function: str,
+        exercise_type: Optional[str],
+        outcome: str,
+        latency: float,
+        template=None,
+        usage=None
+):
+    llm_request_duration.labels(function, exercise_type or "none", outcome).observe(latency)
+    if template is not None and usage is not None:
+        for kind, field in (("prompt", "prompt_token_count"),
+                            ("output", "candidates_token_count"),
+                            ("cached", "cached_content_token_count")):
+            count = getattr(usage, field, 0) or 0
+            if count:
+                llm_tokens.labels(template.name, template.variant, kind).inc(count)
+
+
+def count_fallback(kind: str):
+    llm_fallbacks.labels(kind).inc()
+
+
+def count_parse_failure(target: str, reason: str, amount: int = 1):
+    if amount:
+        llm_parse_failures.labels(target, reason).inc(amount)
+
+
+class MetricsMiddleware:
+    """
+    Saf ASGI middleware: istek süresini, akış (streaming) yanıtlar dahil yanıt
+    tamamen gönderilene kadar ölçer ve istek boyunca yapılan sorguları sayar.
+    Rota etiketi, kardinaliteyi sınırlamak için URL yerine eşleşen rota şablonudur.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats = _RequestDbStats(scope)
+        token = _request_db.set(stats)
+        status_code = 500
+
+        def observe():
+            route = stats.route
+            stats.finished = True
+            http_request_duration.labels(scope["method"], route, str(status_code)) \
+                .observe(time.perf_counter() - started)
+            db_queries_per_request.labels(route).observe(stats.queries)
+            db_time_per_request.labels(route).observe(stats.duration)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body") and not stats.finished:
+                observe()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not stats.finished:
+                observe()
+            _request_db.reset(token)
+
+
+def render_latest():
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
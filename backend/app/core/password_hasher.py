@@ -0,0 +1,97 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+
+class PasswordHasher:
+    """
+    bcrypt işlerini istek yolundan ayrı, sınırlı bir thread havuzunda çalıştırır.
+    bcrypt hesaplama sırasında GIL'i bıraktığı için thread'ler çekirdek sayısı kadar
+    ölçeklenir. Aynı anda bekleyen iş sayısı max_in_flight'ı aşarsa istek beklemek
+    yerine 503 ile hemen reddedilir.
+    """
+
+    def __init__(self, context: CryptContext, workers: int, max_in_flight: int):
+        self.context = context
+        self.workers = workers
+        self.max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._rehashed = 0
+
+    def _track(self, func, *args):
+        with self._lock:
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    async def _submit(self, func, *args):
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                self._rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Sunucu şu anda çok yoğun, lütfen biraz sonra tekrar dene.",
+                    headers={"Retry-After": "1"},
+                )
+            self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._track, func, *args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Şifreyi doğrular. Hash güncel maliyet parametreleriyle üretilmemişse
+        (CryptContext.needs_update) ikinci değer olarak yeni hash'i döndürür.
+        """
+        verified, new_hash = await self._submit(self.context.verify_and_update, password, hashed_password)
+        if verified and new_hash is not None:
+            with self._lock:
+                self._rehashed += 1
+        return verified, new_hash
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self._in_flight,
+                "running": self._running,
+                "queued": self._in_flight - self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "rehashed": self._rehashed,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+password_hasher = PasswordHasher(
+    context=pwd_context,
+    workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+    max_in_flight=settings.PASSWORD_HASH_MAX_IN_FLIGHT,
+)
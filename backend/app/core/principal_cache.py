@@ -0,0 +1,89 @@
+import time
+from typing import Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.models import user as model_user
+
+# Kullanıcı tablosunun tüm kolonları saklanır: asenkron oturumda eksik bir kolon tembel
+# yüklenemez (MissingGreenlet), bu yüzden bağlanan nesne veritabanından okunmuş gibi tam olmalı.
+_SNAPSHOT_COLUMNS = tuple(attr.key for attr in inspect(model_user.User).column_attrs)
+
+# JWT -> kullanıcı id'si. Token'ın kendi süresinden uzun tutulmaz.
+token_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+# Kullanıcı id'si -> kullanıcı satırının anlık görüntüsü.
+user_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def get_user(db: AsyncSession, token: str) -> Optional[model_user.User]:
+    """
+    Önbellekteki kullanıcıyı, SELECT atmadan verilen oturuma kalıcı (persistent)
+    bir nesne olarak bağlar. Önbellekte yoksa None döner.
+    """
+    user_id = token_cache.get(token)
+    if user_id is None:
+        return None
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        return None
+    return _attach(db, snapshot)
+
+
+def attach(db: AsyncSession, user: model_user.User) -> model_user.User:
+    """Başka bir oturumdan (ör. okuma replikası) gelen kullanıcıyı bu oturuma bağlar."""
+    return _attach(db, _snapshot(user))
+
+
+def _snapshot(user: model_user.User) -> dict:
+    return {column: getattr(user, column) for column in _SNAPSHOT_COLUMNS}
+
+
+def _attach(db: AsyncSession, snapshot: dict) -> model_user.User:
+    """
+    Anlık görüntüden kurulan nesneyi merge(load=False) ile oturuma bağlar; SELECT atılmaz.
+    Oturumda aynı kullanıcı zaten varsa, oradaki (daha güncel olabilecek) nesne döner.
+    """
+    existing = db.sync_session.identity_map.get(identity_key(model_user.User, snapshot["id"]))
+    if existing is not None:
+        return existing
+    user = model_user.User(**snapshot)
+    make_transient_to_detached(user)
+    return db.sync_session.merge(user, load=False)
+
+
+def remember(token: str, expires_at: Optional[int], user: model_user.User):
+    token_ttl = None
+    if expires_at is not None:
+        token_ttl = expires_at - time.time()
+        if token_ttl <= 0:
+            return
+    token_cache.set(token, user.id, ttl=token_ttl)
+    user_cache.set(user.id, _snapshot(user))
+
+
+def invalidate_user(user_id: int):
+    """
+    Kullanıcının satırı değiştiğinde çağrılır; bir sonraki istek güncel veriyi okur.
+    Diğer worker'lara leaderboard_push.changed(user_id) üzerinden ulaşır.
+    """
+    user_cache.pop(user_id)
+
+
+def invalidate_all_users():
+    """Hangi kullanıcıların değiştiği bilinmediğinde (ör. kaçırılmış bildirimler)."""
+    user_cache.clear()
+
+
+def stats():
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
@@ -0,0 +1,30 @@
+from typing import Any
+
+import orjson
+from fastapi import Request, Response
+
+
+class ORJSONResponse(Response):
+    """
+    orjson ile yazılan JSON yanıtı. İçerik önceden serileştirilmiş bayt ise olduğu gibi
+    gönderilir. Rota bu yanıtı döndürdüğünde FastAPI response_model doğrulamasını ve
+    serileştirmesini atlar; response_model yalnızca OpenAPI şeması için kalır.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match başlığı verilen ETag'i (zayıf karşılaştırmayla) içeriyor mu."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in header.split(","))
+    return etag.removeprefix("W/") in (tag.removeprefix("W/") for tag in tags)
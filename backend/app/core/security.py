@@ -1,16 +1,18 @@
+import secrets
 from datetime import datetime, timedelta, timezone
-from passlib.context import CryptContext
+from typing import Optional
 from jose import JWTError, jwt
 from app.core.config import settings
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import base as db_base
+from app.db import routing as db_routing
 from app.crud import crud_user
+from app.core import principal_cache
+from app.core.password_hasher import pwd_context
 from app.schemas import token as token_schema
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -29,8 +31,8 @@ def create_access_token(data: dict):
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
-def get_current_user(
-        db: Session = Depends(db_base.get_db),
+async def get_current_user(
+        db: AsyncSession = Depends(db_base.get_db),
         token: str = Depends(oauth2_scheme)
 ):
     credentials_exception = HTTPException(
@@ -38,6 +40,10 @@ def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    cached_user = principal_cache.get_user(db, token)
+    if cached_user is not None:
+        return cached_user
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: str = payload.get("sub")
@@ -47,7 +53,28 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = crud_user.get_user_by_email(db, email=token_data.email)
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+    async with db_routing.read_session(db) as read_db:
+        user = await crud_user.get_user_by_email(read_db, email=token_data.email)
+        if user is None:
+            raise credentials_exception
+        principal_cache.remember(token, payload.get("exp"), user)
+        if read_db is not db:
+            # Rota kullanıcıyı kendi (birincil) oturumunda güncelleyebilsin.
+            user = principal_cache.attach(db, user)
+    return user
+
+
+def require_internal_access(authorization: Optional[str] = Header(None)):
+    """
+    Metrikler ve /stats gibi iç durumu gösteren uç noktaların bağımlılığı. Kullanıcı
+    oturumundan bağımsızdır; INTERNAL_API_TOKEN ayarlanmamışsa uç noktalar yokmuş gibi davranır.
+    """
+    if not settings.INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.INTERNAL_API_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
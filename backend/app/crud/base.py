@@ -0,0 +1,12 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def dialect_insert(db: AsyncSession, model):
+    """
+    Veritabanı diline uygun INSERT ifadesini döndürür; böylece hem Postgres'te hem de
+    SQLite'ta on_conflict_do_nothing / on_conflict_do_update kullanılabilir.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
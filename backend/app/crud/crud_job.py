@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import dialect_insert
+from app.db.models import background_job as model_job
+
+Job = model_job.BackgroundJob
+
+
+async def enqueue(
+        db: AsyncSession,
+        queue: str,
+        kind: str,
+        payload: dict,
+        max_attempts: int,
+        run_at: datetime,
+        idempotency_key: Optional[str] = None
+) -> bool:
+    """
+    İşi kuyruğa ekler; commit çağıranın transaction'ıyla yapılır. Anahtar daha önce
+    kullanıldıysa hiçbir şey eklenmez ve False döner.
+    """
+    statement = dialect_insert(db, Job).values(
+        queue=queue,
+        kind=kind,
+        payload=payload,
+        idempotency_key=idempotency_key,
+        status="queued",
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=run_at,
+        created_at=run_at,
+    )
+    if idempotency_key is not None:
+        statement = statement.on_conflict_do_nothing(index_elements=["idempotency_key"])
+    result = await db.execute(statement)
+    return result.rowcount == 1
+
+
+async def claim(
+        db: AsyncSession,
+        queues: Sequence[str],
+        worker_id: str,
+        limit: int,
+        now: datetime,
+        lock_timeout: timedelta
+) -> List[Job]:
+    """
+    Çalışma zamanı gelmiş 'limit' kadar işi bu worker'a kilitler ve deneme sayılarını
+    artırır; kilidi süresi dolmuş (worker'ı çökmüş) işler de yeniden alınır. Postgres'te
+    seçim FOR UPDATE SKIP LOCKED ile yapılır, böylece eşzamanlı worker'lar birbirini
+    beklemeden farklı işler alır; SQLite yazmaları zaten sıraya koyar.
+    """
+    candidates = (
+        select(Job.id)
+        .where(Job.queue.in_(queues))
+        .where(or_(
+            and_(Job.status == "queued", Job.run_at <= now),
+            and_(Job.status == "running", Job.locked_at < now - lock_timeout),
+        ))
+        .order_by(Job.run_at, Job.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.scalars(
+        update(Job)
+        .where(Job.id.in_(candidates.scalar_subquery()))
+        .values(status="running", locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1)
+        .returning(Job)
+        .execution_options(synchronize_session=False)
+    )
+    jobs = result.all()
+    await db.commit()
+    return jobs
+
+
+async def complete(db: AsyncSession, job_id: int, worker_id: str, now: datetime) -> bool:
+    """
+    İşi bitmiş olarak işaretler; işleyicinin yazmalarıyla aynı transaction'da çağrılır.
+    Kilit bu worker'da değilse (süresi dolup başka worker'a geçtiyse) False döner.
+    """
+    result = await db.execute(
+        update(Job)
+        .where(Job.id == job_id)
+        .where(Job.status == "running")
+        .where(Job.locked_by == worker_id)
+        .values(status="done", finished_at=now, locked_by=None, locked_at=None, last_error=None)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+async def fail(db: AsyncSession, job_id: int, worker_id: str, error: str, retry_at: Optional[datetime], now: datetime):
+    """İşi 'retry_at'te yeniden denenmek üzere kuyruğa geri koyar; retry_at None ise başarısız sayar."""
+    values = {"locked_by": None, "locked_at": None, "last_error": error}
+    if retry_at is None:
+        values.update(status="failed", finished_at=now)
+    else:
+        values.update(status="queued", run_at=retry_at)
+    await db.execute(
+        update(Job)
+        .where(Job.id == job_id)
+        .where(Job.locked_by == worker_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+async def delete_finished(db: AsyncSession, before: datetime) -> int:
+    """Tamamlanmış işleri siler; başarısız işler incelenmek üzere kalır."""
+    result = await db.execute(
+        delete(Job)
+        .where(Job.status == "done")
+        .where(Job.finished_at < before)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def get_status(db: AsyncSession, idempotency_key: str) -> Optional[str]:
+    """Anahtarla kuyruğa alınmış işin durumu; iş hiç alınmadıysa veya silindiyse None."""
+    return await db.scalar(select(Job.status).where(Job.idempotency_key == idempotency_key))
+
+
+async def count_by_status(db: AsyncSession) -> Dict[str, Dict[str, int]]:
+    rows = await db.execute(select(Job.queue, Job.status, func.count()).group_by(Job.queue, Job.status))
+    counts: Dict[str, Dict[str, int]] = {}
+    for queue, status, count in rows:
+        counts.setdefault(queue, {})[status] = count
+    return counts
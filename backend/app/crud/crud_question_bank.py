@@ -0,0 +1,150 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import dialect_insert
+from app.db.models import question_bank as model_bank
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, dict):
+        return {_normalize(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        # Kelime bankası ve seçeneklerin sırası sorunun kimliğini değiştirmez.
+        return sorted((_normalize(item) for item in value), key=lambda item: json.dumps(item, sort_keys=True))
+    return value
+
+
+def question_content_hash(question: dict) -> str:
+    """Büyük/küçük harf, boşluk ve liste sırasından bağımsız içerik özeti."""
+    normalized = json.dumps(_normalize(question), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+async def _mark_seen(db: AsyncSession, user_id: int, question_ids: List[int]) -> Set[int]:
+    """
+    Soruları kullanıcı için görüldü olarak kaydeder ve bu çağrının yeni kaydettiklerini
+    döndürür. Zaten kayıtlı olanlar atlanır; aynı kullanıcının eşzamanlı iki isteği de
+    (ör. /exercise/ ve /exercise/stream) çakışmadan yazar ve aynı soruyu ikisi birden almaz.
+    """
+    if not question_ids:
+        return set()
+    result = await db.execute(
+        dialect_insert(db, model_bank.UserSeenQuestion)
+        .on_conflict_do_nothing(index_elements=["user_id", "question_id"])
+        .returning(model_bank.UserSeenQuestion.question_id),
+        [{"user_id": user_id, "question_id": question_id} for question_id in question_ids]
+    )
+    return set(result.scalars().all())
+
+
+async def take_unseen_questions(
+        db: AsyncSession,
+        user_id: int,
+        exercise_type: str,
+        level: str,
+        limit: int
+) -> Optional[List[dict]]:
+    """
+    Kullanıcının henüz görmediği 'limit' kadar soruyu bankadan alır ve görüldü olarak
+    işaretler. Bankada yeterli görülmemiş soru yoksa hiçbir şeyi değiştirmeden None döner.
+    Her iki durumda da transaction kapatılır; bağlantı sonraki beklemelerde tutulmaz.
+
+    Seçilen sorular görüldü kaydı eklenerek sahiplenilir; eşzamanlı başka bir istek
+    aynı soruları sahiplendiyse yerlerine sıradaki görülmemiş sorular alınır.
+    """
+    seen = select(model_bank.UserSeenQuestion.question_id) \
+        .where(model_bank.UserSeenQuestion.user_id == user_id) \
+        .where(model_bank.UserSeenQuestion.question_id == model_bank.BankQuestion.id)
+    taken: Dict[int, dict] = {}
+    while len(taken) < limit:
+        rows = (await db.execute(
+            select(model_bank.BankQuestion.id, model_bank.BankQuestion.payload)
+            .where(model_bank.BankQuestion.exercise_type == exercise_type)
+            .where(model_bank.BankQuestion.level == level)
+            .where(~seen.exists())
+            .order_by(model_bank.BankQuestion.id)
+            .limit(limit - len(taken))
+        )).all()
+        if not rows:
+            break
+        claimed = await _mark_seen(db, user_id, [row.id for row in rows])
+        taken.update((row.id, row.payload) for row in rows if row.id in claimed)
+    if len(taken) < limit:
+        # Yarım kalan sahiplenme geri alınır. rollback() yerine silinir; rollback oturuma
+        # bağlı kullanıcı nesnesini de süresi dolmuş sayardı.
+        if taken:
+            await db.execute(
+                delete(model_bank.UserSeenQuestion)
+                .where(model_bank.UserSeenQuestion.user_id == user_id)
+                .where(model_bank.UserSeenQuestion.question_id.in_(taken))
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+        return None
+
+    await db.commit()
+    return [taken[question_id] for question_id in sorted(taken)]
+
+
+async def get_latest_questions(db: AsyncSession, exercise_type: str, level: str, limit: int) -> Optional[List[dict]]:
+    """
+    Görülme durumuna bakmadan tip ve seviyedeki en yeni 'limit' soruyu döndürür; AI'a
+    ulaşılamadığında yedek olarak kullanılır. Yeterli soru yoksa None döner.
+    """
+    payloads = (await db.execute(
+        select(model_bank.BankQuestion.payload)
+        .where(model_bank.BankQuestion.exercise_type == exercise_type)
+        .where(model_bank.BankQuestion.level == level)
+        .order_by(model_bank.BankQuestion.id.desc())
+        .limit(limit)
+    )).scalars().all()
+    if len(payloads) < limit:
+        return None
+    return list(reversed(payloads))
+
+
+async def store_generated_questions(
+        db: AsyncSession,
+        user_id: int,
+        exercise_type: str,
+        level: str,
+        questions: List[dict]
+) -> List[int]:
+    """
+    Yeni üretilen soruları bankaya ekler (aynı tip ve seviyede aynı içerik özetine sahip
+    olanlar atlanır) ve kullanıcıya doğrudan sunuldukları için onun tarafından görüldü sayar.
+    """
+    rows = {}
+    for question in questions:
+        content_hash = question_content_hash(question)
+        rows[content_hash] = {
+            "content_hash": content_hash,
+            "exercise_type": exercise_type,
+            "level": level,
+            "payload": question,
+        }
+    if not rows:
+        return []
+
+    await db.execute(
+        dialect_insert(db, model_bank.BankQuestion).on_conflict_do_nothing(
+            index_elements=["exercise_type", "level", "content_hash"]
+        ),
+        list(rows.values())
+    )
+    question_ids = (await db.execute(
+        select(model_bank.BankQuestion.id)
+        .where(model_bank.BankQuestion.exercise_type == exercise_type)
+        .where(model_bank.BankQuestion.level == level)
+        .where(model_bank.BankQuestion.content_hash.in_(rows.keys()))
+    )).scalars().all()
+
+    await _mark_seen(db, user_id, question_ids)
+    await db.commit()
+    return question_ids
@@ -1,83 +1,237 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from typing import Collection, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, delete, func, insert, select, tuple_, update
 
 from app.db.models import user as model_user, user_mistake as model_mistake
+from app.db.models import exercise_evaluation as model_evaluation
 from app.schemas import user as schema_user
 from app.schemas import exercise as schema_exercise
-from app.core.security import get_password_hash
+from app.crud.base import dialect_insert
+from app.services import leaderboard_push, mistake_classifier
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(model_user.User).filter(model_user.User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.scalar(select(model_user.User).where(model_user.User.email == email).limit(1))
 
-def get_user_by_username(db: Session, username: str):
-    return db.query(model_user.User).filter(model_user.User.username == username).first()
+async def get_user_by_username(db: AsyncSession, username: str):
+    return await db.scalar(select(model_user.User).where(model_user.User.username == username).limit(1))
 
-def create_user(db: Session, user: schema_user.UserCreate):
-    hashed_password = get_password_hash(user.password)
+async def create_user(db: AsyncSession, user: schema_user.UserCreate, hashed_password: str):
     db_user = model_user.User(
         email=user.email,
         username=user.username,
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    leaderboard_push.changed()
+    await db.refresh(db_user)
     return db_user
 
-def get_users_sorted_by_score(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(model_user.User).order_by(desc(model_user.User.weekly_score)).offset(skip).limit(limit).all()
+async def update_user_password_hash(db: AsyncSession, user: model_user.User, hashed_password: str):
+    """
+    Kullanıcının şifre hash'ini, güncel maliyet parametreleriyle üretilmiş olanla değiştirir.
+    """
+    user.hashed_password = hashed_password
+    db.add(user)
+    await db.commit()
+    return user
+
+LEADERBOARD_ORDER = (desc(model_user.User.weekly_score), desc(model_user.User.id))
 
-def create_user_mistake(db: Session, user_id: int, mistake_in: schema_exercise.WrongAnswerPayload):
-    """Kullanıcının yaptığı bir hatayı veritabanına kaydeder."""
-    db_mistake = model_mistake.UserMistake(
-        question_text=mistake_in.question,
-        user_answer=mistake_in.user_answer,
-        correct_answer=mistake_in.correct_answer,
-        owner_id=user_id
+async def get_users_sorted_by_score(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.scalars(select(model_user.User).order_by(*LEADERBOARD_ORDER).offset(skip).limit(limit))
+    return result.all()
+
+async def get_leaderboard_page(db: AsyncSession, limit: int = 100, after: Optional[Tuple[int, int]] = None):
+    """
+    Liderlik tablosunu keyset pagination ile okur. 'after', önceki sayfanın son
+    kullanıcısının (weekly_score, id) değeridir; OFFSET kullanılmadığı için derin
+    sayfalar da ix_users_weekly_score_id üzerinden sabit maliyetle okunur.
+    """
+    query = select(model_user.User)
+    if after is not None:
+        query = query.where(tuple_(model_user.User.weekly_score, model_user.User.id) < tuple_(*after))
+    result = await db.scalars(query.order_by(*LEADERBOARD_ORDER).limit(limit))
+    return result.all()
+
+async def get_user_rank(db: AsyncSession, user: model_user.User) -> int:
+    """
+    Kullanıcının liderlik tablosundaki sırasını, kendisinden önde gelen kullanıcıları
+    indeks üzerinde sayarak bulur; tüm tabloyu sıralamaz.
+    """
+    ahead = await db.scalar(
+        select(func.count(model_user.User.id))
+        .where(tuple_(model_user.User.weekly_score, model_user.User.id) > tuple_(user.weekly_score, user.id))
     )
-    db.add(db_mistake)
-    db.commit()
-    return db_mistake
+    return ahead + 1
 
-def get_mistakes_by_user_id(db: Session, user_id: int, limit: int = 10):
+async def get_mistakes_by_user_id(db: AsyncSession, user_id: int, limit: int = 10):
     """
     Belirli bir kullanıcının son yaptığı hataları veritabanından çeker.
     """
-    return db.query(model_mistake.UserMistake)\
-        .filter(model_mistake.UserMistake.owner_id == user_id)\
-        .order_by(desc(model_mistake.UserMistake.id))\
-        .limit(limit)\
-        .all()
+    result = await db.scalars(
+        select(model_mistake.UserMistake)
+        .where(model_mistake.UserMistake.owner_id == user_id)
+        .order_by(desc(model_mistake.UserMistake.id))
+        .limit(limit)
+    )
+    return result.all()
 
 
-def delete_oldest_mistakes(db: Session, user_id: int, keep_limit: int = 50):
+async def get_reviewable_mistakes(db: AsyncSession, user_id: int, blank: str):
     """
-    Bir kullanıcının en yeni 'keep_limit' kadar hatasını tutar ve daha eskilerini siler.
+    Kullanıcının boşluklu cümle içeren hataları; geçmiş arka plandaki kırpma işiyle
+    sınırlı tutulduğu için tamamı okunur, vadesi gelenler ve çeldiriciler bellekte seçilir.
     """
-    mistake_count = db.query(model_mistake.UserMistake).filter(model_mistake.UserMistake.owner_id == user_id).count()
+    result = await db.scalars(
+        select(model_mistake.UserMistake)
+        .where(model_mistake.UserMistake.owner_id == user_id)
+        .where(model_mistake.UserMistake.question_text.contains(blank, autoescape=True))
+        .where(model_mistake.UserMistake.correct_answer != "")
+        .order_by(model_mistake.UserMistake.id)
+    )
+    return result.all()
+
+
+async def get_mistakes_by_ids(db: AsyncSession, user_id: int, mistake_ids: List[int]):
+    result = await db.scalars(
+        select(model_mistake.UserMistake)
+        .where(model_mistake.UserMistake.owner_id == user_id)
+        .where(model_mistake.UserMistake.id.in_(mistake_ids))
+    )
+    return result.all()
+
 
-    if mistake_count > keep_limit:
-        num_to_delete = mistake_count - keep_limit
+async def update_review_schedule(db: AsyncSession, updates: List[dict]):
+    """Hataların tekrar kutusunu ve sonraki tekrar zamanını tek bir toplu UPDATE ile yazar."""
+    if updates:
+        await db.execute(update(model_mistake.UserMistake), updates)
 
-        oldest_mistakes = db.query(model_mistake.UserMistake) \
-            .filter(model_mistake.UserMistake.owner_id == user_id) \
-            .order_by(model_mistake.UserMistake.id.asc()) \
-            .limit(num_to_delete) \
-            .all()
 
-        for mistake in oldest_mistakes:
-            db.delete(mistake)
+async def get_latest_mistake_id(db: AsyncSession, user_id: int) -> Optional[int]:
+    """Kullanıcının en yeni hatasının id'si; (owner_id, id) indeksinden tek satır okur."""
+    return await db.scalar(
+        select(func.max(model_mistake.UserMistake.id))
+        .where(model_mistake.UserMistake.owner_id == user_id)
+    )
 
-        db.commit()
-        return len(oldest_mistakes)
-    return 0
 
-def update_user_level(db: Session, user: model_user.User, new_level: str) -> model_user.User:
+async def get_mistake_counts(db: AsyncSession, user_id: int) -> Dict[str, int]:
+    """
+    Kullanıcının kategori bazındaki hata sayaçlarını döndürür; geçmişin uzunluğundan
+    bağımsız olarak en fazla kategori sayısı kadar satır okur.
+    """
+    rows = await db.execute(
+        select(model_mistake.UserMistakeStat.category, model_mistake.UserMistakeStat.count)
+        .where(model_mistake.UserMistakeStat.user_id == user_id)
+    )
+    return {category: count for category, count in rows}
+
+
+async def record_evaluation(
+        db: AsyncSession,
+        user_id: int,
+        score: int,
+        wrong_answers: List[schema_exercise.WrongAnswerPayload],
+        repeated_questions: Collection[str] = ()
+):
+    """
+    Bir değerlendirmenin yazma işlemlerini tek transaction içinde, hata sayısından
+    bağımsız sabit sayıda sorguyla yapar: değerlendirme kaydını ve sınıflandırılmış
+    hataları ekler, kategori sayaçlarını artırır ve puanı SQL tarafında artırır. Oluşan
+    değerlendirme kaydının id'sini döndürür; commit ve önbelleklerin geçersiz kılınması
+    çağıranın işidir (evaluation_service), böylece değerlendirmenin arka plan işleri aynı
+    transaction'da kuyruğa alınabilir. Geçmişin kırpılması ayrı bir iştir (trim_mistakes).
+    'repeated_questions' zaten kayıtlı hataların (tekrar oturumu) metinleridir; bunlar
+    yeniden eklenmez, yalnızca kategori sayaçlarına yansır.
+    """
+    evaluation_id = (await db.execute(
+        insert(model_evaluation.ExerciseEvaluation)
+        .values(owner_id=user_id, score=score)
+        .returning(model_evaluation.ExerciseEvaluation.id)
+    )).scalar_one()
+
+    if wrong_answers:
+        mistake_rows = []
+        category_counts: Dict[str, int] = {}
+        for mistake in wrong_answers:
+            category = mistake_classifier.classify(mistake.question, mistake.user_answer, mistake.correct_answer)
+            category_counts[category] = category_counts.get(category, 0) + 1
+            if mistake.question in repeated_questions:
+                continue
+            mistake_rows.append({
+                "question_text": mistake.question,
+                "user_answer": mistake.user_answer,
+                "correct_answer": mistake.correct_answer,
+                "category": category,
+                "owner_id": user_id,
+            })
+        if mistake_rows:
+            await db.execute(insert(model_mistake.UserMistake), mistake_rows)
+
+        stat_insert = dialect_insert(db, model_mistake.UserMistakeStat)
+        await db.execute(
+            stat_insert.on_conflict_do_update(
+                index_elements=["user_id", "category"],
+                set_={"count": model_mistake.UserMistakeStat.count + stat_insert.excluded.count}
+            ),
+            [
+                {"user_id": user_id, "category": category, "count": count}
+                for category, count in category_counts.items()
+            ]
+        )
+
+    await db.execute(
+        update(model_user.User)
+        .where(model_user.User.id == user_id)
+        .values(weekly_score=func.coalesce(model_user.User.weekly_score, 0) + score)
+        .execution_options(synchronize_session=False)
+    )
+    return evaluation_id
+
+
+async def trim_mistakes(db: AsyncSession, user_id: int, keep_limit: int):
+    """Kullanıcının hata geçmişini tek bir DELETE ile en yeni 'keep_limit' kayda indirir."""
+    # Saklanacak en eski kaydın bir altındaki id; bundan küçük ya da eşit olanlar silinir.
+    cutoff_id = select(model_mistake.UserMistake.id) \
+        .where(model_mistake.UserMistake.owner_id == user_id) \
+        .order_by(model_mistake.UserMistake.id.desc()) \
+        .offset(keep_limit) \
+        .limit(1) \
+        .scalar_subquery()
+    await db.execute(
+        delete(model_mistake.UserMistake)
+        .where(model_mistake.UserMistake.owner_id == user_id)
+        .where(model_mistake.UserMistake.id <= cutoff_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def get_evaluation(db: AsyncSession, evaluation_id: int, user_id: int):
+    return await db.scalar(
+        select(model_evaluation.ExerciseEvaluation)
+        .where(model_evaluation.ExerciseEvaluation.id == evaluation_id)
+        .where(model_evaluation.ExerciseEvaluation.owner_id == user_id)
+        .limit(1)
+    )
+
+
+async def set_evaluation_feedback(db: AsyncSession, evaluation_id: int, feedback: str):
+    """Commit etmez; arka plan işi tamamlandı işaretiyle birlikte commit edilir."""
+    await db.execute(
+        update(model_evaluation.ExerciseEvaluation)
+        .where(model_evaluation.ExerciseEvaluation.id == evaluation_id)
+        .values(feedback=feedback)
+    )
+
+async def update_user_level(db: AsyncSession, user: model_user.User, new_level: str) -> model_user.User:
     """
     Kullanıcının seviyesini günceller.
     """
     user.current_level = new_level
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    leaderboard_push.changed(user.id)
+    await db.refresh(user)
     return user
\ No newline at end of file
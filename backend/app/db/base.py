@@ -1,26 +1,76 @@
-from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session
 from app.core.config import settings
 
+# DATABASE_URL senkron sürücüyle de verilebilir (Alembic onu kullanır); uygulama
+# aynı veritabanına sürücünün asenkron karşılığıyla bağlanır.
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
 
-is_sqlite = settings.DATABASE_URL.startswith("sqlite")
 
-engine_args = {"connect_args": {"check_same_thread": False}} if is_sqlite else {}
+def async_database_url(url: str):
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.drivername in ASYNC_DRIVERS.values() or backend not in ASYNC_DRIVERS:
+        return parsed
+    return parsed.set(drivername=ASYNC_DRIVERS[backend])
 
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    **engine_args
-)
+def create_engine(url: str):
+    return create_async_engine(
+        async_database_url(url),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def create_sessionmaker(bind, sync_session_class=Session):
+    # Commit sonrası nesneler expire edilmez: asenkron oturumda expire edilmiş bir
+    # özniteliğe erişmek, await edilemeyen tembel bir yükleme gerektirirdi.
+    return async_sessionmaker(
+        bind,
+        class_=AsyncSession,
+        sync_session_class=sync_session_class,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+class PrimarySession(Session):
+    """Birincil veritabanının oturumu; app.db.routing buradaki yazmaları izler."""
+
+
+engine = create_engine(settings.DATABASE_URL)
+SessionLocal = create_sessionmaker(engine, sync_session_class=PrimarySession)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+
+async def release_connection(db: AsyncSession):
+    """
+    Oturumun açık transaction'ını bitirir ve bağlantısını havuza geri verir. AI
+    çağrıları gibi uzun beklemelerden önce çağrılır; oturum sonra kullanılmaya devam
+    edebilir, bir sonraki sorgu havuzdan yeni bir bağlantı alır. Yalnızca okuma yapılmış
+    oturumlarda commit boş bir transaction'ı kapatır; nesneler expire edilmez.
+    """
+    await db.commit()
+
+
+def pool_stats(target=None):
+    pool = (target or engine).pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
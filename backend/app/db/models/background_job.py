@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index, func
+
+from app.db.base import Base
+
+
+class BackgroundJob(Base):
+    """
+    Yanıt döndükten sonra yapılacak bir iş. Aynı transaction'da yazıldığı için isteğin
+    commit ettiği her iş, süreç çökse bile bir worker tarafından en az bir kez çalıştırılır.
+    """
+    __tablename__ = "background_jobs"
+
+    id = Column(Integer, primary_key=True)
+    queue = Column(String, nullable=False)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    # Aynı anahtarla ikinci kez kuyruğa alınan iş yok sayılır.
+    idempotency_key = Column(String, unique=True, nullable=True)
+    # queued -> running -> done; hata verirse run_at'e kadar yeniden queued, denemeler bitince failed.
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_background_jobs_queue_status_run_at", "queue", "status", "run_at"),
+    )
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+
+from app.db.base import Base
+
+
+class ExerciseEvaluation(Base):
+    __tablename__ = "exercise_evaluations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    score = Column(Integer, nullable=False)
+    # AI'ın kişisel yorumu; yanıt döndükten sonra arka planda doldurulur.
+    feedback = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
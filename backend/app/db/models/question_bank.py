@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Index, func
+
+from app.db.base import Base
+
+
+class BankQuestion(Base):
+    """AI'ın ürettiği ve içerik özetine göre tekilleştirilmiş bir soru."""
+    __tablename__ = "question_bank"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Aynı soru farklı tip veya seviyede ayrı bir kayıttır; tekillik üçlü üzerindedir.
+    content_hash = Column(String(64), nullable=False)
+    exercise_type = Column(String, nullable=False)
+    level = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_question_bank_type_level_id", "exercise_type", "level", "id"),
+        Index("ix_question_bank_type_level_hash", "exercise_type", "level", "content_hash", unique=True),
+    )
+
+
+class UserSeenQuestion(Base):
+    """Kullanıcıya sunulmuş bir banka sorusu; bankadan yalnızca burada olmayanlar verilir."""
+    __tablename__ = "user_seen_questions"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    question_id = Column(Integer, ForeignKey("question_bank.id"), primary_key=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -10,6 +10,11 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     username = Column(String, unique=True, index=True, nullable=False)
-    weekly_score = Column(Integer, default=0)
+    weekly_score = Column(Integer, default=0, server_default="0", nullable=False)
     current_level = Column(String, default="A1", nullable=False)
-    mistakes = relationship("UserMistake", back_populates="owner")
\ No newline at end of file
+    mistakes = relationship("UserMistake", back_populates="owner")
+
+    # Liderlik tablosu sıralaması (weekly_score DESC, id DESC) bu indeksten okunur.
+    __table_args__ = (
+        Index("ix_users_weekly_score_id", weekly_score.desc(), id.desc()),
+    )
\ No newline at end of file
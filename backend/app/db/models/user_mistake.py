@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -11,7 +11,25 @@ class UserMistake(Base):
     question_text = Column(String, index=True)
     user_answer = Column(String)
     correct_answer = Column(String)
+    category = Column(String, nullable=True)
+    # Tekrar takvimi (Leitner): art arda doğru tekrar sayısı ve bir sonraki tekrarın zamanı.
+    # review_due_at boşsa hata hemen tekrar edilebilir.
+    review_box = Column(Integer, nullable=False, default=0, server_default="0")
+    review_due_at = Column(DateTime(timezone=True), nullable=True)
 
     owner_id = Column(Integer, ForeignKey("users.id"))
 
-    owner = relationship("User", back_populates="mistakes")
\ No newline at end of file
+    owner = relationship("User", back_populates="mistakes")
+
+    __table_args__ = (
+        Index("ix_user_mistakes_owner_id_id", "owner_id", "id"),
+    )
+
+
+class UserMistakeStat(Base):
+    """Kullanıcının her hata kategorisindeki toplam hata sayısı; her değerlendirmede artırılır."""
+    __tablename__ = "user_mistake_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    category = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,169 @@
+"""
+Okumaların replikalara yönlendirilmesi. DATABASE_REPLICA_URLS verildiğinde yalnızca
+okuma yapan yollar (get_read_db, read_session) oturumlarını sırayla bir replikadan
+alır; yazmalar ve diğer tüm oturumlar birincil veritabanında kalır.
+
+- Bağlanılamayan replika DB_REPLICA_RETRY_SECONDS boyunca atlanır, istek sıradaki
+  replikaya, hiçbiri yoksa birincile düşer.
+- Bir istemci (client_key: bearer token'ın özeti) birincilde bir yazma commit ettikten
+  sonra DB_READ_YOUR_WRITES_SECONDS boyunca okumaları da birincilden yapılır; böylece
+  replika gecikmesi kendi yazmasını göremediği bir yanıt üretmez. Bu bilgi worker
+  başınadır, principal_cache'in geçersiz kılınması gibi.
+"""
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import client_key
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db import base as db_base
+
+logger = logging.getLogger(__name__)
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = db_base.create_engine(url)
+        self.sessionmaker = db_base.create_sessionmaker(self.engine)
+        self.down_until = 0.0
+        self.reads = 0
+        self.failures = 0
+
+    @property
+    def available(self) -> bool:
+        return self.down_until <= time.monotonic()
+
+    def mark_down(self):
+        self.failures += 1
+        self.down_until = time.monotonic() + settings.DB_REPLICA_RETRY_SECONDS
+
+
+replicas: List[Replica] = [
+    Replica(url.strip()) for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()
+]
+_next_replica = itertools.count()
+# client_key -> son yazmanın zamanı; kayıt DB_READ_YOUR_WRITES_SECONDS sonra düşer.
+recent_writers = TTLCache(maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES, ttl=settings.DB_READ_YOUR_WRITES_SECONDS)
+routing_stats = {"replica_reads": 0, "primary_reads": 0, "sticky_reads": 0, "replica_failures": 0}
+
+
+@event.listens_for(db_base.PrimarySession, "do_orm_execute")
+def _track_statement_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(db_base.PrimarySession, "after_flush")
+def _track_flush_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(db_base.PrimarySession, "after_commit")
+def _remember_writer(session):
+    if session.info.pop("wrote", False) and replicas:
+        mark_write()
+
+
+@event.listens_for(db_base.PrimarySession, "after_rollback")
+def _forget_write(session):
+    session.info.pop("wrote", None)
+
+
+def mark_write(key: Optional[str] = None):
+    """İstemcinin sonraki okumalarını bir süre birincile yönlendirir."""
+    recent_writers.set(key or client_key.get(), time.monotonic())
+
+
+def wrote_recently(key: Optional[str] = None) -> bool:
+    return recent_writers.get(key or client_key.get()) is not None
+
+
+async def _open_replica_session() -> Optional[AsyncSession]:
+    """Sıradaki erişilebilir replikada bağlantısı kurulmuş bir oturum; yoksa None."""
+    start = next(_next_replica)
+    for offset in range(len(replicas)):
+        replica = replicas[(start + offset) % len(replicas)]
+        if not replica.available:
+            continue
+        session = replica.sessionmaker()
+        try:
+            # Bağlantı şimdi alınır ki hata, sorgu ortasında değil burada yakalanıp başka hedefe geçilebilsin.
+            await session.connection()
+        except (DBAPIError, OSError) as e:
+            await session.close()
+            replica.mark_down()
+            routing_stats["replica_failures"] += 1
+            logger.warning("Read replica %s unavailable, skipping for %ss: %s",
+                           replica.name, settings.DB_REPLICA_RETRY_SECONDS, e)
+            continue
+        replica.reads += 1
+        return session
+    return None
+
+
+@asynccontextmanager
+async def read_session(primary: Optional[AsyncSession] = None):
+    """
+    Yalnızca okuma için bir oturum. Replika kullanılamadığında veya istemci az önce
+    yazdıysa birincile düşer: 'primary' verildiyse o oturum (isteğin kendi oturumu)
+    kullanılır ve kapatılmaz, verilmediyse yeni bir birincil oturumu açılır.
+    """
+    session = None
+    if replicas:
+        if wrote_recently():
+            routing_stats["sticky_reads"] += 1
+        else:
+            session = await _open_replica_session()
+    if session is not None:
+        routing_stats["replica_reads"] += 1
+        async with session:
+            yield session
+        return
+
+    routing_stats["primary_reads"] += 1
+    if primary is not None:
+        yield primary
+        return
+    async with db_base.SessionLocal() as session:
+        yield session
+
+
+async def get_read_db(db: AsyncSession = Depends(db_base.get_db)):
+    """
+    Salt okunur rotaların oturumu. Replikaya düştüğünde isteğin birincil oturumu hiç
+    bağlantı almaz; birincile düştüğünde aynı istekteki get_db oturumu paylaşılır.
+    """
+    async with read_session(db) as read_db:
+        yield read_db
+
+
+async def dispose():
+    for replica in replicas:
+        await replica.engine.dispose()
+
+
+def stats():
+    return {
+        **routing_stats,
+        "recent_writers": recent_writers.stats()["size"],
+        "replicas": [
+            {
+                "name": replica.name,
+                "available": replica.available,
+                "reads": replica.reads,
+                "failures": replica.failures,
+                "pool": db_base.pool_stats(replica.engine),
+            }
+            for replica in replicas
+        ],
+    }
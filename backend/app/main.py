@@ -1,15 +1,48 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 
 from app.api.v1.api import api_router
-from app.db.models import user, user_mistake
+from app.core.client_key import ClientKeyMiddleware
+from app.core.config import settings
+from app.core.deadline import DeadlineMiddleware
+from app.core.metrics import MetricsMiddleware, render_latest
+from app.core.password_hasher import password_hasher
+from app.core.security import require_internal_access
+from app.db.models import user, user_mistake, exercise_evaluation, question_bank, background_job
+from app.db import routing as db_routing
 from app.db.base import Base, engine
+from app.services import jobs, leaderboard_push, llm
+from app.services.exercise_pool import exercise_pool
 from fastapi.middleware.cors import CORSMiddleware
 
-Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Buradaki her şey worker başına, fork'tan sonra çalışır.
+    if settings.DB_CREATE_TABLES_ON_STARTUP:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    llm.start()
+    await leaderboard_push.start()
+    await jobs.start_in_app()
+    if settings.EXERCISE_POOL_ENABLED and settings.EXERCISE_POOL_WARM_ON_STARTUP:
+        exercise_pool.warm_up()
+    yield
+    await jobs.stop_in_app()
+    await leaderboard_push.stop()
+    await exercise_pool.shutdown()
+    password_hasher.shutdown()
+    await engine.dispose()
+    await db_routing.dispose()
+
+
 app = FastAPI(
     title="Perpetua API",
     description="API for the AI-powered language learning platform.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 origins = [
@@ -25,12 +58,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After", "ETag"],
 )
+app.add_middleware(DeadlineMiddleware)
+app.add_middleware(ClientKeyMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.include_router(api_router, prefix="/api/v1")
 
+
+@app.exception_handler(llm.Overloaded)
+async def llm_overloaded_handler(request: Request, exc: llm.Overloaded):
+    """AI çağrı kuyruğu doluyken yedeği olmayan istekler hemen 503 ile reddedilir."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "AI servisi şu anda çok yoğun, lütfen biraz sonra tekrar dene."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.get("/")
 def read_root():
     """
     Root endpoint to check if the API is running.
     """
-    return {"message": "Welcome to the Perpetua API!"}
\ No newline at end of file
+    return {"message": "Welcome to the Perpetua API!"}
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_internal_access)])
+def read_metrics():
+    """
+    Prometheus metrics, aggregated across all workers when PROMETHEUS_MULTIPROC_DIR is set.
+    Requires the INTERNAL_API_TOKEN as a bearer token.
+    """
+    content, content_type = render_latest()
+    return Response(content=content, media_type=content_type)
\ No newline at end of file
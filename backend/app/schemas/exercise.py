@@ -1,5 +1,9 @@
 from pydantic import BaseModel, Field
-from typing import List, Literal, Dict, Union, Annotated
+from typing import List, Literal, Dict, Union, Annotated, Optional
+
+ExerciseType = Literal["grammar", "dialogue", "word_matching"]
+# AI'ın ürettiği tiplere ek olarak kullanıcının kendi hatalarından kurulan tekrar oturumu.
+SessionType = Literal["grammar", "dialogue", "word_matching", "review"]
 
 class GrammarQuestion(BaseModel):
     type: Literal["grammar"] = "grammar"
@@ -27,8 +31,32 @@ AnyQuestion = Annotated[
 ]
 
 class ExerciseSession(BaseModel):
-    exercise_type: Literal["grammar", "dialogue", "word_matching"]
+    exercise_type: SessionType
     questions: List[AnyQuestion]
+    # Yalnızca tekrar oturumlarında: sorulan hataların id'leri, değerlendirmede geri gönderilir.
+    review_ids: Optional[List[int]] = None
+
+
+class ValidatedSession:
+    """
+    Sunulmaya hazır bir alıştırma oturumu. Sorular AnyQuestion'a göre bir kez (AI
+    çıktısı ayrıştırılırken) doğrulanmış, JSON'a hazır sözlüklerdir; bankadan okunan
+    sorular da yazılmadan önce doğrulanmıştır. Yanıtta yeniden doğrulanmaz, API şeması
+    ExerciseSession'dır.
+    """
+
+    __slots__ = ("exercise_type", "questions", "review_ids")
+
+    def __init__(self, exercise_type: str, questions: List[dict], review_ids: Optional[List[int]] = None):
+        self.exercise_type = exercise_type
+        self.questions = questions
+        self.review_ids = review_ids
+
+    def to_dict(self) -> dict:
+        session = {"exercise_type": self.exercise_type, "questions": self.questions}
+        if self.review_ids is not None:
+            session["review_ids"] = self.review_ids
+        return session
 
 
 class WrongAnswerPayload(BaseModel):
@@ -41,7 +69,14 @@ class EvaluationPayload(BaseModel):
     correct_answers: int
     final_score: int
     wrong_answers: List[WrongAnswerPayload]
+    review_ids: List[int] = Field(default_factory=list, max_length=100)
 
 class EvaluationResult(BaseModel):
     score: int = Field(..., ge=0, le=100)
-    feedback: str
\ No newline at end of file
+    feedback: str
+    evaluation_id: Optional[int] = None
+
+class EvaluationFeedback(BaseModel):
+    evaluation_id: int
+    status: Literal["pending", "ready", "failed"]
+    feedback: Optional[str] = None
\ No newline at end of file
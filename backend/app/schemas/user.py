@@ -16,4 +16,8 @@ class User(UserBase):
         from_attributes = True
 
 class UserLevelUpdate(BaseModel):
-    level: str
\ No newline at end of file
+    level: str
+
+class UserRank(BaseModel):
+    rank: int
+    weekly_score: int
@@ -0,0 +1,135 @@
+from typing import List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.crud import crud_job, crud_user
+from app.db.models import user as model_user
+from app.schemas import exercise as exercise_schema
+from app.services import gemini_service, jobs, leaderboard_push, review_scheduler
+
+FEEDBACK_JOB = "evaluation.feedback"
+TRIM_MISTAKES_JOB = "mistakes.trim"
+# Kullanıcı başına saklanan en fazla hata kaydı.
+MISTAKE_HISTORY_LIMIT = 50
+
+
+def compute_score(payload: exercise_schema.EvaluationPayload) -> int:
+    """
+    Puanı, doğru cevap oranından yerel ve deterministik olarak hesaplar.
+    İstemcinin gönderdiği final_score ile aynı formülü kullanır: JS'teki Math.round gibi
+    .5 yukarı yuvarlanır (Python'un round()'u çifte yuvarlardı, ör. 5/8 için 62 yerine 63).
+    """
+    total = payload.total_questions
+    if total <= 0:
+        return 0
+    score = (200 * payload.correct_answers + total) // (2 * total)
+    return max(0, min(100, score))
+
+
+def build_instant_feedback(
+        username: str,
+        score: int,
+        wrong_answers: List[exercise_schema.WrongAnswerPayload]
+) -> str:
+    """Puan aralığına göre, AI beklemeden hemen döndürülecek kısa yorumu üretir."""
+    if score >= 80:
+        message = f"Harika iş çıkardın {username}! {score} puanla hem hızlı hem de isabetliydin."
+    elif score >= 50:
+        message = f"İyi çaba {username}! {score} puan aldın, birkaç küçük hatayla hedefe çok yakınsın."
+    else:
+        message = (f"{score} puan aldın {username}, ama hatalar öğrenmenin bir parçası. "
+                   f"Pratik yaptıkça çok daha iyi olacaksın!")
+
+    if wrong_answers:
+        mistake = wrong_answers[0]
+        message += f" '{mistake.question}' sorusunda doğru cevap '{mistake.correct_answer}' olacaktı."
+    return message
+
+
+def feedback_job_key(evaluation_id: int) -> str:
+    return f"evaluation:{evaluation_id}:feedback"
+
+
+async def feedback_status(db: AsyncSession, evaluation) -> str:
+    """
+    Kişisel yorumun durumu: 'ready', üretiliyorsa 'pending', işi tüm denemelerde hata
+    verdiyse 'failed' (istemci anlık yorumla kalır ve beklemeyi bırakır).
+    """
+    if evaluation.feedback:
+        return "ready"
+    if await crud_job.get_status(db, feedback_job_key(evaluation.id)) == "failed":
+        return "failed"
+    return "pending"
+
+
+async def record_evaluation(
+        db: AsyncSession,
+        user: model_user.User,
+        payload: exercise_schema.EvaluationPayload
+):
+    """
+    Değerlendirmeyi kaydeder; kişisel AI yorumunu üretecek ve hata geçmişini kırpacak
+    işleri aynı transaction'da kuyruğa alır. Yanıt bunları beklemez, süreç çökse de işler
+    kaybolmaz. (id, puan) döndürür.
+
+    Hatalar, kategori sayaçları ve haftalık puan ise bilerek istekte yazılır: istemci
+    yanıtın hemen ardından kullanıcıyı, liderlik tablosunu ve koç tavsiyesini yeniden
+    okur, bir sonraki tekrar oturumu da bu hatalardan kurulur. Bunlar bir işe bırakılsaydı
+    kullanıcı kendi sonucunu iş çalışana kadar göremezdi. Yazmalar hata sayısından
+    bağımsız birkaç sorgudur; istekte tutmanın maliyeti düşüktür.
+    """
+    score = compute_score(payload)
+    repeated_questions = await review_scheduler.grade(db, user.id, payload.review_ids, payload.wrong_answers)
+    evaluation_id = await crud_user.record_evaluation(
+        db,
+        user_id=user.id,
+        score=score,
+        wrong_answers=payload.wrong_answers,
+        repeated_questions=set(repeated_questions)
+    )
+
+    results = payload.model_dump()
+    results["final_score"] = score
+    await jobs.enqueue(
+        db,
+        FEEDBACK_JOB,
+        {"evaluation_id": evaluation_id, "results": results, "username": user.username},
+        idempotency_key=feedback_job_key(evaluation_id),
+    )
+    if payload.wrong_answers:
+        await jobs.enqueue(
+            db,
+            TRIM_MISTAKES_JOB,
+            {"user_id": user.id},
+            idempotency_key=f"evaluation:{evaluation_id}:trim-mistakes",
+        )
+    await db.commit()
+    leaderboard_push.changed(user.id)
+    return evaluation_id, score
+
+
+@jobs.handler(FEEDBACK_JOB, queue=jobs.AI_QUEUE)
+async def generate_personal_feedback(db: AsyncSession, payload: dict):
+    """
+    Kişisel AI yorumunu üretir ve kaydeder. AI yanıt veremezse kayıt, zaten döndürülmüş
+    olan anlık yorumla tamamlanır.
+    """
+    results, username = payload["results"], payload["username"]
+    # AI beklenirken bağlantı tutulmaz; oturum ilk sorguda bağlantı alır.
+    evaluation = await gemini_service.evaluate_exercise_from_ai_async(results=results, username=username)
+    feedback = evaluation.get("feedback") if isinstance(evaluation, dict) else None
+    if not feedback:
+        metrics.count_fallback("instant_evaluation")
+        feedback = build_instant_feedback(
+            username,
+            results["final_score"],
+            [exercise_schema.WrongAnswerPayload(**item) for item in results["wrong_answers"]]
+        )
+    await crud_user.set_evaluation_feedback(db, evaluation_id=payload["evaluation_id"], feedback=feedback)
+
+
+@jobs.handler(TRIM_MISTAKES_JOB)
+async def trim_mistake_history(db: AsyncSession, payload: dict):
+    """Hata geçmişini en yeni MISTAKE_HISTORY_LIMIT kayda indirir; tekrar çalışması zararsızdır."""
+    await crud_user.trim_mistakes(db, user_id=payload["user_id"], keep_limit=MISTAKE_HISTORY_LIMIT)
@@ -0,0 +1,305 @@
+import json
+import logging
+import random
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.core import metrics
+from app.core.config import settings
+from app.schemas import exercise as exercise_schema
+
+logger = logging.getLogger(__name__)
+
+_question_adapter = TypeAdapter(exercise_schema.AnyQuestion)
+
+QUESTION_MODELS = {
+    "grammar": exercise_schema.GrammarQuestion,
+    "dialogue": exercise_schema.DialogueQuestion,
+    "word_matching": exercise_schema.WordMatchingSet,
+}
+
+# Gemini'nin şema alt kümesi serbest anahtarlı sözlükleri (Dict[str, str]) ifade
+# edemediği için bu alanlar modele sabit anahtarlı nesne listeleri olarak tarif
+# edilir ve repair_question tarafından tekrar Pydantic biçimine çevrilir.
+_WIRE_FIELD_OVERRIDES = {
+    "dialogue": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {"speaker": {"type": "string"}, "line": {"type": "string"}},
+            "required": ["speaker", "line"],
+        },
+    },
+    "correct_pairs": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {"word": {"type": "string"}, "meaning": {"type": "string"}},
+            "required": ["word", "meaning"],
+        },
+    },
+}
+
+_SCHEMA_KEYS = ("type", "format", "description", "nullable", "enum", "items", "properties", "required")
+
+# Üretim sonuçlarının sayaçları; /stats/exercise-generation altında yayınlanır.
+generation_stats = {
+    "responses": 0,
+    "accepted": 0,
+    "salvaged": 0,
+    "rejected": 0,
+    "json_recovered": 0,
+    "questions_repaired": 0,
+    "questions_dropped": 0,
+}
+
+
+def _to_gemini_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Pydantic JSON şemasını Gemini'nin desteklediği OpenAPI alt kümesine indirger."""
+    converted = {}
+    for key in _SCHEMA_KEYS:
+        if key not in schema:
+            continue
+        value = schema[key]
+        if key == "items":
+            value = _to_gemini_schema(value)
+        elif key == "properties":
+            value = {
+                name: _WIRE_FIELD_OVERRIDES.get(name) or _to_gemini_schema(prop)
+                for name, prop in value.items()
+            }
+        converted[key] = value
+    if "const" in schema:
+        converted["enum"] = [schema["const"]]
+    return converted
+
+
+@lru_cache(maxsize=None)
+def response_schema_for(exercise_type: str) -> Optional[Dict[str, Any]]:
+    """Verilen alıştırma tipi için structured output şemasını döndürür."""
+    model = QUESTION_MODELS.get(exercise_type)
+    if model is None:
+        return None
+    question_schema = _to_gemini_schema(model.model_json_schema())
+    question_schema["required"] = ["type", *question_schema.get("required", [])]
+    return {
+        "type": "object",
+        "properties": {"questions": {"type": "array", "items": question_schema}},
+        "required": ["questions"],
+    }
+
+
+class QuestionStreamParser:
+    """
+    Parça parça gelen model çıktısından, tamamlanan her soru nesnesini
+    tüm yanıtı beklemeden ayrıştırır.
+
+    Sorular, çıktıdaki ilk JSON dizisinin doğrudan elemanı olan nesneler olarak
+    kabul edilir; bu sayede hem {"questions": [...]} hem de çıplak [...] biçimi
+    desteklenir. ```json çitleri gibi JSON dışı karakterler yok sayılır.
+    """
+
+    def __init__(self):
+        self._depth = 0
+        self._array_depth: Optional[int] = None
+        self._in_string = False
+        self._escape = False
+        self._current: Optional[List[str]] = None
+
+    def feed(self, chunk: str) -> List[dict]:
+        completed = []
+        for char in chunk:
+            if self._current is not None:
+                self._current.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if char == "[" and self._array_depth is None:
+                    self._array_depth = self._depth
+                elif char == "{" and self._current is None and self._array_depth is not None \
+                        and self._depth == self._array_depth + 1:
+                    self._current = [char]
+            elif char in "}]":
+                if char == "}" and self._current is not None and self._depth == self._array_depth + 1:
+                    raw = "".join(self._current)
+                    self._current = None
+                    try:
+                        completed.append(json.loads(raw))
+                    except json.JSONDecodeError as e:
+                        logger.info("AI Stream Parse Error: %s", e)
+                self._depth -= 1
+        return completed
+
+
+def _as_str_list(value) -> List[str]:
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(",") if item.strip()]
+    if isinstance(value, list):
+        return [str(item) for item in value if not isinstance(item, (dict, list))]
+    return value
+
+
+def _pairs_to_dict(value) -> Dict[str, str]:
+    if not isinstance(value, list):
+        return value
+    pairs = {}
+    for item in value:
+        if isinstance(item, dict) and "word" in item and "meaning" in item:
+            pairs[str(item["word"])] = str(item["meaning"])
+        elif isinstance(item, dict) and len(item) == 1:
+            (word, meaning), = item.items()
+            pairs[str(word)] = str(meaning)
+        elif isinstance(item, (list, tuple)) and len(item) == 2:
+            pairs[str(item[0])] = str(item[1])
+    return pairs
+
+
+def _from_wire(raw: dict) -> dict:
+    """
+    Şemanın tarif ettiği biçimde ({"word", "meaning"} listesi) gelen eşleştirmeleri
+    Pydantic'in beklediği sözlüğe çevirir. Bu bir onarım sayılmaz; biçim bozuksa veya
+    aynı kelime tekrarlanıyorsa soru olduğu gibi bırakılır ve onarımı repair_question yapar.
+    """
+    pairs = raw.get("correct_pairs")
+    if not isinstance(pairs, list) or not all(
+            isinstance(item, dict) and item.keys() == {"word", "meaning"} for item in pairs):
+        return raw
+    converted = _pairs_to_dict(pairs)
+    if len(converted) != len(pairs):
+        return raw
+    return {**raw, "correct_pairs": converted}
+
+
+def _dialogue_line(item) -> Any:
+    if isinstance(item, str):
+        speaker, sep, line = item.partition(":")
+        if sep:
+            return {"speaker": speaker.strip(), "line": line.strip()}
+        return {"speaker": "", "line": item.strip()}
+    if isinstance(item, dict) and not {"speaker", "line"} <= item.keys() and len(item) == 1:
+        (speaker, line), = item.items()
+        return {"speaker": str(speaker), "line": str(line)}
+    return item
+
+
+def repair_question(raw: dict, exercise_type: str) -> dict:
+    """
+    Modelin sık yaptığı şema sapmalarını yerel olarak düzeltir: eksik "type",
+    metin listesi olarak gelen diyaloglar, liste olarak gelen eşleştirmeler,
+    seçeneklerde bulunmayan doğru cevap gibi.
+    """
+    question = dict(raw)
+    question.setdefault("type", exercise_type)
+
+    if exercise_type == "grammar":
+        if "sentence_template" not in question:
+            question["sentence_template"] = question.pop("sentence", None) or question.pop("question", None)
+        if "correct_word" not in question and "answer" in question:
+            question["correct_word"] = question.pop("answer")
+        question["word_bank"] = _as_str_list(question.get("word_bank"))
+        correct_word = question.get("correct_word")
+        if isinstance(question["word_bank"], list) and isinstance(correct_word, str) \
+                and correct_word not in question["word_bank"]:
+            question["word_bank"].append(correct_word)
+
+    elif exercise_type == "dialogue":
+        if isinstance(question.get("dialogue"), list):
+            question["dialogue"] = [_dialogue_line(item) for item in question["dialogue"]]
+        question["options"] = _as_str_list(question.get("options"))
+        correct_answer = question.get("correct_answer")
+        if isinstance(question["options"], list) and isinstance(correct_answer, str) \
+                and correct_answer not in question["options"]:
+            question["options"].append(correct_answer)
+
+    elif exercise_type == "word_matching":
+        question["correct_pairs"] = _pairs_to_dict(question.get("correct_pairs"))
+        pairs = question["correct_pairs"]
+        if isinstance(pairs, dict) and pairs:
+            if not question.get("words"):
+                question["words"] = list(pairs.keys())
+            if not question.get("meanings"):
+                meanings = list(pairs.values())
+                random.shuffle(meanings)
+                question["meanings"] = meanings
+        question.setdefault("topic", "")
+
+    return question
+
+
+def validate_question(raw: dict, exercise_type: str):
+    """
+    Ham soru sözlüğünü onardıktan sonra AnyQuestion birleşimine göre doğrular ve
+    doğrulanmış soruyu JSON'a hazır bir sözlük olarak döndürür; soru bundan sonra
+    yeniden doğrulanmaz. Geçersiz veya istenen tipten farklı sorular için None döndürür.
+    """
+    if not isinstance(raw, dict):
+        return None
+    raw = _from_wire(raw)
+    question = repair_question(raw, exercise_type)
+    if question["type"] != exercise_type:
+        return None
+    try:
+        validated = _question_adapter.validate_python(question)
+    except ValidationError as e:
+        metrics.count_parse_failure(exercise_type, "invalid_question")
+        logger.info("AI Question Validation Error: %s", e)
+        return None
+    if question != raw:
+        generation_stats["questions_repaired"] += 1
+    return validated.model_dump(mode="json")
+
+
+def _extract_raw_questions(text: str, exercise_type: str) -> List[Any]:
+    cleaned = text.strip().replace("```json", "").replace("```", "")
+    try:
+        data = json.loads(cleaned)
+    except json.JSONDecodeError:
+        # Yarım kalmış veya bozuk çıktıdaki tamamlanmış soruları kurtar.
+        generation_stats["json_recovered"] += 1
+        metrics.count_parse_failure(exercise_type, "invalid_json")
+        return QuestionStreamParser().feed(cleaned)
+
+    if isinstance(data, dict) and isinstance(data.get("questions"), list):
+        return data["questions"]
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return [data]
+    return []
+
+
+def parse_exercise_response(text: str, exercise_type: str) -> Optional[list]:
+    """
+    Model çıktısını onarır ve soru bazında doğrular. Geçerli soru sayısı
+    EXERCISE_MIN_QUESTIONS'ın altındaysa None döndürür; aksi halde kusurlu
+    sorular atılıp kalanlar kullanılır.
+    """
+    generation_stats["responses"] += 1
+    raw_questions = _extract_raw_questions(text, exercise_type)
+    questions = [
+        question for question in
+        (validate_question(raw, exercise_type) for raw in raw_questions)
+        if question is not None
+    ]
+    dropped = len(raw_questions) - len(questions)
+    generation_stats["questions_dropped"] += dropped
+
+    if len(questions) < settings.EXERCISE_MIN_QUESTIONS:
+        generation_stats["rejected"] += 1
+        metrics.count_parse_failure(exercise_type, "too_few_questions")
+        return None
+    generation_stats["salvaged" if dropped else "accepted"] += 1
+    return questions
@@ -0,0 +1,137 @@
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Optional, Set, Tuple
+
+from app.core import client_key, deadline
+from app.core.config import settings
+from app.schemas import exercise as exercise_schema
+from app.services import gemini_service, llm
+
+EXERCISE_TYPES = ("grammar", "dialogue", "word_matching")
+CEFR_LEVELS = ("A1", "A2", "B1", "B2")
+
+BucketKey = Tuple[str, str]
+
+POOL_CLIENT_KEY = "exercise-pool"
+
+
+class ExercisePool:
+    """
+    Her (alıştırma tipi, seviye) ikilisi için önceden üretilmiş ve doğrulanmış
+    ValidatedSession nesnelerini tutar. Havuz alt sınırın altına düştüğünde
+    arka planda yeniden doldurulur; havuz boşsa senkron üretime geri düşülür.
+    """
+
+    def __init__(self, depth: int, low_water: int, refill_workers: int):
+        self.depth = depth
+        self.low_water = low_water
+        self._buckets: Dict[BucketKey, Deque[exercise_schema.ValidatedSession]] = {}
+        self._stats: Dict[BucketKey, Dict[str, int]] = {}
+        self._refilling: Set[BucketKey] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._refill_slots = asyncio.Semaphore(refill_workers)
+
+    def _bucket(self, key: BucketKey) -> Deque[exercise_schema.ValidatedSession]:
+        if key not in self._buckets:
+            self._buckets[key] = deque()
+            self._stats[key] = {"hits": 0, "misses": 0, "generated": 0, "failures": 0}
+        return self._buckets[key]
+
+    async def _generate(self, key: BucketKey, coalesce: bool = True) -> Optional[exercise_schema.ValidatedSession]:
+        exercise_type, level = key
+        ai_response = await gemini_service.create_exercise_from_ai_async(
+            exercise_type=exercise_type,
+            user_level=level,
+            coalesce=coalesce
+        )
+        session = None
+        if ai_response and "questions" in ai_response:
+            session = exercise_schema.ValidatedSession(exercise_type, ai_response["questions"])
+
+        self._bucket(key)
+        self._stats[key]["generated" if session else "failures"] += 1
+        return session
+
+    async def _refill(self, key: BucketKey):
+        # Doldurma, onu tetikleyen isteğin süresiyle sınırlanmaz ve AI kuyruğunda o
+        # kullanıcının payını harcamaz.
+        deadline.detach()
+        client_key.set(POOL_CLIENT_KEY)
+        try:
+            async with self._refill_slots:
+                while len(self._bucket(key)) < self.depth:
+                    # Havuzdaki oturumların birbirinden farklı olması için birleştirilmez.
+                    try:
+                        session = await self._generate(key, coalesce=False)
+                    except llm.Overloaded:
+                        self._stats[key]["failures"] += 1
+                        return
+                    # Başarısız üretimde döngüyü kır; bir sonraki istek tekrar tetikler.
+                    if session is None:
+                        return
+                    self._bucket(key).append(session)
+        finally:
+            self._refilling.discard(key)
+
+    def _schedule_refill(self, key: BucketKey):
+        if key in self._refilling or len(self._bucket(key)) >= self.low_water:
+            return
+        self._refilling.add(key)
+        task = asyncio.create_task(self._refill(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def take(self, exercise_type: str, level: str) -> Optional[exercise_schema.ValidatedSession]:
+        """
+        Havuzda hazır bir oturum varsa onu döndürür; yoksa üretim yapmadan None döner.
+        Her iki durumda da gerekirse arka planda doldurmayı tetikler.
+        """
+        key = (exercise_type, level)
+        if level not in CEFR_LEVELS:
+            return None
+
+        bucket = self._bucket(key)
+        session = bucket.popleft() if bucket else None
+        self._stats[key]["hits" if session else "misses"] += 1
+
+        self._schedule_refill(key)
+        return session
+
+    async def acquire(self, exercise_type: str, level: str) -> Optional[exercise_schema.ValidatedSession]:
+        """
+        Havuzdan bir alıştırma oturumu alır. Havuz boşsa oturumu senkron olarak üretir;
+        yük reddedilirse llm.Overloaded iletilir. Bilinmeyen seviyeler havuzu atlayıp
+        doğrudan üretilir.
+        """
+        session = self.take(exercise_type, level)
+        if session is None:
+            session = await self._generate((exercise_type, level))
+        return session
+
+    def warm_up(self):
+        """Tüm bilinen kovalar için arka planda doldurmayı başlatır."""
+        for exercise_type in EXERCISE_TYPES:
+            for level in CEFR_LEVELS:
+                self._schedule_refill((exercise_type, level))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            f"{exercise_type}:{level}": {
+                "size": len(self._buckets[(exercise_type, level)]),
+                "refilling": (exercise_type, level) in self._refilling,
+                **counters,
+            }
+            for (exercise_type, level), counters in self._stats.items()
+        }
+
+    async def shutdown(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+exercise_pool = ExercisePool(
+    depth=settings.EXERCISE_POOL_DEPTH,
+    low_water=settings.EXERCISE_POOL_LOW_WATER,
+    refill_workers=settings.EXERCISE_POOL_REFILL_WORKERS,
+)
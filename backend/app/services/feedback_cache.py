@@ -0,0 +1,51 @@
+import hashlib
+from typing import Dict, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services import gemini_service, llm
+
+# (kullanıcı id'si, girdilerin parmak izi) -> AI koçu tavsiyesi
+feedback_cache = TTLCache(
+    maxsize=settings.FEEDBACK_CACHE_MAX_ENTRIES,
+    ttl=settings.FEEDBACK_CACHE_TTL_SECONDS,
+)
+# kullanıcı id'si -> son başarılı tavsiye; AI'a ulaşılamadığında eskimiş olsa da sunulur.
+latest_feedback = TTLCache(
+    maxsize=settings.FEEDBACK_CACHE_MAX_ENTRIES,
+    ttl=settings.FEEDBACK_CACHE_TTL_SECONDS,
+)
+
+
+def fingerprint(mistake_counts: Dict[str, int], latest_mistake_id: Optional[int], variant: str) -> str:
+    """
+    Tavsiyeyi belirleyen girdilerin özeti: kategori bazındaki hata sayaçları, en yeni
+    hatanın id'si, model, prompt sürümü ve prompt varyantı (verbose/compact). Yeni bir
+    hata yazıldığında veya prompt değiştiğinde değişir; aynı sayaçlara sahip farklı hata
+    geçmişleri ve iki varyantın tavsiyeleri aynı kaydı paylaşmaz.
+    """
+    counts = ",".join(f"{category}={count}" for category, count in sorted(mistake_counts.items()))
+    source = (f"{llm.get_provider().model_name}:{gemini_service.FEEDBACK_PROMPT_VERSION}:{variant}:"
+              f"{latest_mistake_id or 0}:{counts}")
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def get(user_id: int, key: str) -> Optional[str]:
+    """'key', fingerprint() ile üretilmiş parmak izidir."""
+    return feedback_cache.get((user_id, key))
+
+
+def set(user_id: int, key: str, feedback: str):
+    # Hata durumundaki genel mesaj önbelleğe alınmaz; bir sonraki istek tekrar dener.
+    if feedback == gemini_service.FEEDBACK_FALLBACK_MESSAGE:
+        return
+    feedback_cache.set((user_id, key), feedback)
+    latest_feedback.set(user_id, feedback)
+
+
+def get_latest(user_id: int) -> Optional[str]:
+    return latest_feedback.get(user_id)
+
+
+def stats():
+    return feedback_cache.stats()
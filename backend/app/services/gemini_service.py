@@ -1,211 +1,239 @@
-from typing import List
-
-import google.generativeai as genai
-from app.core.config import settings
+import asyncio
 import json
+import logging
 import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.core import metrics
+from app.core.config import settings
 
 from app.db.models.user_mistake import UserMistake
+from app.services import exercise_parser, llm, mistake_classifier, prompts
+
+# Koç tavsiyesi prompt'u değiştiğinde artırılır; önbellekteki eski tavsiyeler geçersiz olur.
+FEEDBACK_PROMPT_VERSION = 3
+
+logger = logging.getLogger(__name__)
+
+
+def _record_call(function: str, exercise_type, template, started: float, usage=None, valid: bool = True):
+    latency = time.perf_counter() - started
+    prompts.prompt_stats.record(template, latency, usage, valid)
+    metrics.observe_llm_call(function, exercise_type, "ok" if valid else "invalid", latency, template, usage)
+
+
+def _record_error(function: str, exercise_type, template, started: float, error: Optional[Exception] = None):
+    latency = time.perf_counter() - started
+    if isinstance(error, (llm.CircuitOpenError, llm.Overloaded)):
+        # Upstream'e gidilmedi; şablonun hata oranı ve gecikmesine katılmaz.
+        outcome = "rejected" if isinstance(error, llm.CircuitOpenError) else "shed"
+        metrics.observe_llm_call(function, exercise_type, outcome, latency)
+        return
+    prompts.prompt_stats.record_error(template, latency)
+    outcome = "timeout" if isinstance(error, asyncio.TimeoutError) else "error"
+    metrics.observe_llm_call(function, exercise_type, outcome, latency)
+
+
+def _get_prompt_for_exercise(exercise_type: str, level: str) -> Tuple[prompts.PromptTemplate, str]:
+    """Alıştırma tipine göre şablonu ve doldurulmuş AI prompt'unu döndürür."""
+    template = prompts.get(f"exercise.{exercise_type}")
+    if template is None:
+        return None, None
+    return template, template.render(level=level, count=settings.EXERCISE_SESSION_SIZE)
+
 
-genai.configure(api_key=settings.GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-2.5-flash')
-
-
-def _get_prompt_for_exercise(exercise_type: str, level: str):
-    """Alıştırma tipine göre doğru AI prompt'unu döndürür."""
-    if exercise_type == "grammar":
-        return f"""
-            Sen, {level} seviyesinde İngilizce öğreten bir yapay zekasın.
-            Görevin, {level} seviyesi için "cümle tamamlama" formatında 5 adet gramer sorusu oluşturmak.
-            Her soru, içinde '___' bulunan bir cümle ve bu boşluğa gelebilecek kelimelerden oluşan bir kelime bankası içermelidir.
-
-            KURALLAR:
-            1. Toplam 5 adet soru nesnesi oluştur.
-            2. Her soru için 4 kelimelik bir kelime bankası oluştur (1 doğru, 3 yanlış).
-            3. ÇOK ÖNEMLİ: Her bir soru nesnesinin içine, `"type": "grammar"` alanını MUTLAKA ekle. Bu alan zorunludur.
-            4. Çıktı olarak SADECE ve SADECE bir JSON objesi döndür. Bu obje, "questions" adında bir anahtar ve bu 5 soru nesnesini içeren bir liste barındırmalıdır.
-
-            ÖRNEK ÇIKTI FORMATI:
-        {{
-          "questions": [
-            {{
-              "type": "grammar",
-              "sentence_template": "She ___ an apple.",
-              "word_bank": ["eat", "eats", "ate", "eating"],
-              "correct_word": "eats"
-            }},
-            {{
-              "sentence_template": "There ___ two cats on the roof.",
-              "word_bank": ["is", "are", "am", "be"],
-              "correct_word": "are"
-            }}
-          ]
-        }}
-
-        Şimdi {level} seviyesi için 5 soruluk listeyi oluştur.
-        """
-
-    if exercise_type == "dialogue":
-        return f"""
-        Sen, {level} seviyesinde İngilizce öğreten bir yapay zekasın.
-        Görevin, {level} seviyesi için "diyalog tamamlama" formatında 5 ADET FARKLI soru oluşturmak.
-
-        KURALLAR:
-        1. Birbirinden bağımsız, 5 adet diyalog sorusu oluştur.
-        2. Her soru için, iki kişi arasında geçen 2-3 satırlık basit bir diyalog oluştur. Diyalogun son cümlesi eksik olmalı.
-        3. Her soru için 4 adet mantıklı seçenek (1 doğru, 3 yanlış) üret.
-        4. Çıktı olarak SADECE ve SADECE bir JSON objesi döndür.
-        5. ÇOK ÖNEMLİ: "dialogue" alanı, her biri "speaker" ve "line" anahtarlarına sahip SÖZLÜKLERDEN (dictionary/object) oluşan bir LİSTE olmalıdır. BASİT METİN LİSTESİ (list of strings) KESİNLİKLE KULLANMA.
-
-        ÖRNEK ÇIKTI FORMATI (BU FORMATA TAM OLARAK UYMALISIN):
-        {{
-          "questions": [
-            {{
-              "type": "dialogue",
-              "dialogue": [
-                {{"speaker": "Shopkeeper", "line": "Hello, can I help you?"}},
-                {{"speaker": "Customer", "line": "Yes, please. I'd like an apple."}}
-              ],
-              "question": "What should the shopkeeper say next?",
-              "options": [
-                "Here you are.",
-                "I am a doctor.",
-                "My name is John.",
-                "Thank you."
-              ],
-              "correct_answer": "Here you are."
-            }}
-          ]
-        }}
-
-        Şimdi {level} seviyesi için, yukarıdaki kurallara ve formata HARFİYEN uyarak 5 diyalog sorusu içeren listeyi oluştur.
-        """
-
-    if exercise_type == "word_matching":
-        return f"""
-        Sen, {level} seviyesinde İngilizce öğreten bir yapay zekasın.
-        Görevin, {level} seviyesi için "kelime eşleştirme" formatında 5 ADET FARKLI set oluşturmak.
-
-        KURALLAR:
-        1. Her konu için 4 adet basit İngilizce kelime ve Türkçe karşılıklarını bul.
-        2. ÇOK ÖNEMLİ: Çıktı olarak, "words" ve "meanings" listelerini BİRBİRİNDEN FARKLI, yani tamamen karışık sıralarda ver.
-        3. Ek olarak, "correct_pairs" adında bir SÖZLÜK (dictionary/object) oluştur. Bu sözlükte anahtar (key) İngilizce kelime, değer (value) ise onun doğru Türkçe karşılığı olmalıdır.
-        4. Çıktı olarak SADECE ve SADECE bir JSON objesi döndür.
-
-        ÖRNEK ÇIKTI FORMATI:
-        {{
-          "questions": [
-            {{
-              "type": "word_matching",
-              "topic": "Fruits",
-              "words": ["Apple", "Banana", "Orange", "Grape"],
-              "meanings": ["Muz", "Portakal", "Elma", "Üzüm"],
-              "correct_pairs": {{
-                "Apple": "Elma",
-                "Banana": "Muz",
-                "Orange": "Portakal",
-                "Grape": "Üzüm"
-              }}
-            }}
-          ]
-        }}
-
-        Şimdi, {level} seviyesinde "correct_pairs" cevap anahtarını da içeren 5 kelime eşleştirme seti oluştur.
-        """
-
-    return None
-
-
-def create_exercise_from_ai(exercise_type: str, user_level: str):
-    prompt = _get_prompt_for_exercise(exercise_type, user_level)
+def _parse_json_response(text: str):
+    cleaned_response = text.strip().replace("```json", "").replace("```", "")
+    return json.loads(cleaned_response)
+
+
+def _exercise_options(exercise_type: str):
+    """Modeli, Pydantic şemalarından türetilen şemaya uyan JSON üretmeye zorlar."""
+    return {"response_schema": exercise_parser.response_schema_for(exercise_type)}
+
+
+async def create_exercise_from_ai_async(exercise_type: str, user_level: str, coalesce: bool = True):
+    """
+    AI'dan bir alıştırma seti ister. coalesce açıkken aynı tip ve seviye için
+    eşzamanlı gelen istekler tek bir upstream çağrısını paylaşır.
+    Yük reddedildiğinde llm.Overloaded çağırana iletilir (503 + Retry-After).
+    """
+    template, prompt = _get_prompt_for_exercise(exercise_type, user_level)
 
     if not prompt:
         return {"error": "Unsupported exercise type"}
 
+    started = time.perf_counter()
     try:
-        response = model.generate_content(prompt)
-        cleaned_response = response.text.strip().replace("```json", "").replace("```", "")
-        return json.loads(cleaned_response)
+        response, shared = await llm.generate_async(
+            template, prompt, coalesce=coalesce, **_exercise_options(exercise_type)
+        )
+        text = response.text
+    except llm.Overloaded as e:
+        _record_error("create_exercise", exercise_type, template, started, e)
+        raise
     except Exception as e:
-        print(f"AI Error: {e}")
+        _record_error("create_exercise", exercise_type, template, started, e)
+        logger.warning("AI Error: %s", e)
         return None
 
+    questions = exercise_parser.parse_exercise_response(text, exercise_type)
+    _record_call(
+        "create_exercise", exercise_type, template, started,
+        None if shared else response.usage_metadata, bool(questions)
+    )
+    return {"questions": questions} if questions else None
 
-def evaluate_exercise_from_ai(results: dict, username: str):
-    user_performance = f"Kullanıcı {results['total_questions']} sorudan {results['correct_answers']} tanesini doğru cevapladı."
-    mistakes_summary = "Kullanıcının yaptığı hatalar:\n"
-    if results['wrong_answers']:
-        for item in results['wrong_answers']:
-            mistakes_summary += f"- Soru: '{item['question']}', Kullanıcının Cevabı: '{item['user_answer']}', Doğru Cevap: '{item['correct_answer']}'\n"
-    else:
-        mistakes_summary = "Hata yok."
-
-    prompt = f"""
-        Sen, Perpetua adlı bir dil öğrenme uygulamasında kişisel bir AI öğretmensin. Öğrencinin adı {username}.
-        {username} az önce bir alıştırmayı tamamladı. İşte performansı:
-
-        - Nihai Puanı: {results['final_score']}
-        - Toplam Hamle Sayısı: {results['total_questions']}
-        - Doğru Hamle Sayısı: {results['correct_answers']}
-        - Yaptığı spesifik hatalar: {results['wrong_answers'] if results['wrong_answers'] else 'Yok.'}
-
-        GÖREVİN:
-        Bu performansa göre, {username}'a ismiyle hitap ederek, pozitif ve cesaretlendirici bir dille, 1-2 cümlelik kişisel bir yorum yaz.
-        - Eğer puanı yüksekse (örn: 80 üzeri), hızını ve doğruluğunu öv.
-        - Eğer puanı ortalamaysa, iyi çabasını takdir et ve hangi konularda zorlandığını nazikçe belirt.
-        - Eğer puanı düşükse, bunun öğrenmenin bir parçası olduğunu vurgula ve moralini yüksek tutması için cesaretlendir.
-        - Yaptığı spesifik bir hataya (eğer varsa) odaklanarak, neden yanlış olduğunu kısaca açıkla.
-
-        Çıktı olarak SADECE ve SADECE aşağıdaki formatta bir JSON objesi döndür. Puanı TEKRAR HESAPLAMA, sana verilen puanı kullan:
-        {{
-          "score": {results['final_score']},
-          "feedback": "<{username}'a özel olarak yazdığın yorum>"
-        }}
-        """
 
+async def stream_exercise_questions_from_ai(exercise_type: str, user_level: str):
+    """
+    Gemini'nin akış (stream) çıktısını artımlı olarak ayrıştırır ve her soruyu,
+    tamamlanıp AnyQuestion'a göre doğrulanır doğrulanmaz döndürür.
+    """
+    template, prompt = _get_prompt_for_exercise(exercise_type, user_level)
+
+    if not prompt:
+        return
+
+    parser = exercise_parser.QuestionStreamParser()
+    started = time.perf_counter()
+    usage = None
+    yielded = 0
     try:
-        # Temperature ayarını eklemek, daha tutarlı çıktılar için iyidir.
-        generation_config = genai.types.GenerationConfig(temperature=0.3)
-        response = model.generate_content(prompt, generation_config=generation_config)
-        cleaned_response = response.text.strip().replace("```json", "").replace("```", "")
-        return json.loads(cleaned_response)
+        async for chunk in llm.stream(template, prompt, **_exercise_options(exercise_type)):
+            # Akışta kullanım bilgisi her parçada birikimli gelir; sonuncusu geçerlidir.
+            usage = chunk.usage_metadata or usage
+            for raw_question in parser.feed(chunk.text):
+                question = exercise_parser.validate_question(raw_question, exercise_type)
+                if question is not None:
+                    yielded += 1
+                    yield question
     except Exception as e:
-        print(f"AI Evaluation Error: {e}")
-        return {"score": 0, "feedback": "Değerlendirme sırasında bir hata oluştu. Lütfen tekrar dene."}
+        _record_error("stream_exercise", exercise_type, template, started, e)
+        raise
 
+    _record_call(
+        "stream_exercise", exercise_type, template, started, usage, yielded >= settings.EXERCISE_MIN_QUESTIONS
+    )
+
+
+def _get_prompt_for_evaluation(results: dict, username: str):
+    wrong_answers = results['wrong_answers']
+    if wrong_answers:
+        examples = {}
+        for item in wrong_answers:
+            category = mistake_classifier.classify(item['question'], item['user_answer'], item['correct_answer'])
+            examples.setdefault(category, (item['question'], item['correct_answer']))
+        mistakes_summary = mistake_classifier.summarize(
+            mistake_classifier.count_categories(
+                (item['question'], item['user_answer'], item['correct_answer']) for item in wrong_answers
+            ),
+            examples
+        )
+    else:
+        mistakes_summary = "Yok."
+
+    template = prompts.get("evaluation")
+    prompt = template.render(
+        username=username,
+        final_score=results['final_score'],
+        total_questions=results['total_questions'],
+        correct_answers=results['correct_answers'],
+        mistakes_summary=mistakes_summary,
+    )
+    return template, prompt
+
+
+# Temperature ayarını eklemek, daha tutarlı çıktılar için iyidir.
+EVALUATION_OPTIONS = {"temperature": 0.3, "json_output": True}
 
-def generate_feedback_from_mistakes(mistakes: List[UserMistake], username: str):
+
+async def evaluate_exercise_from_ai_async(results: dict, username: str):
     """
-    Kullanıcının hatalarından yola çıkarak kişisel bir tavsiye metni üretir.
+    Oturum sonuçlarını AI'a değerlendirtir. Yanıt arka planda kullanıldığı için hata
+    durumunda sabit metin yerine None döndürür.
     """
-    if not mistakes:
-        return f"Harika gidiyorsun {username}! Son alıştırmalarında hiç hatan yok. Bu harika seriyi devam ettir."
+    template, prompt = _get_prompt_for_evaluation(results, username)
 
-    mistakes_summary = "\n".join(
-        [f"- Soru: '{m.question_text}', Yanlış Cevap: '{m.user_answer}', Doğru Cevap: '{m.correct_answer}'" for m in
-         mistakes]
-    )
+    started = time.perf_counter()
+    try:
+        response, shared = await llm.generate_async(template, prompt, **EVALUATION_OPTIONS)
+        text = response.text
+    except Exception as e:
+        _record_error("evaluate", None, template, started, e)
+        logger.warning("AI Evaluation Error: %s", e)
+        return None
 
+    try:
+        evaluation = _parse_json_response(text)
+    except ValueError as e:
+        _record_call(
+            "evaluate", None, template, started, None if shared else response.usage_metadata, valid=False
+        )
+        metrics.count_parse_failure("evaluation", "invalid_json")
+        logger.warning("AI Evaluation Parse Error: %s", e)
+        return None
+
+    _record_call("evaluate", None, template, started, None if shared else response.usage_metadata)
+    return evaluation
+
+
+def _no_mistakes_feedback(username: str):
+    return f"Harika gidiyorsun {username}! Son alıştırmalarında hiç hatan yok. Bu harika seriyi devam ettir."
+
+
+def _mistake_examples(recent_mistakes: List[UserMistake]):
+    """Her kategori için en yeni hatayı (soru, doğru cevap) örnek olarak seçer."""
+    examples = {}
+    for m in recent_mistakes:
+        category = m.category or mistake_classifier.classify(m.question_text, m.user_answer, m.correct_answer)
+        examples.setdefault(category, (m.question_text, m.correct_answer))
+    return examples
 
-    prompt = f"""
-    Sen, Perpetua adlı bir dil öğrenme uygulamasında kişisel ve pozitif bir AI koçusun. Öğrencinin adı {username}.
-    Aşağıda, {username}'ın son zamanlarda yaptığı bazı hatalar listeleniyor:
 
-    {mistakes_summary}
+def _get_prompt_for_feedback(
+        mistake_counts: Dict[str, int],
+        recent_mistakes: List[UserMistake],
+        username: str,
+        variant: Optional[str] = None
+):
+    mistakes_summary = mistake_classifier.summarize(mistake_counts, _mistake_examples(recent_mistakes))
 
-    GÖREVİN:
-    Bu hatalara genel olarak bakarak, {username}'a yönelik 1-2 cümlelik, kısa, samimi ve motive edici bir tavsiye yaz.
-    - Belirli bir gramer kuralında mı zorlanıyor? (örn: 'is/are' kullanımı)
-    - Yoksa kelime eşleştirmede mi zorlanıyor?
-    - Genel bir tavsiye ver. Örneğin: "Merhaba {username}, 'is' ve 'are' kullanımında biraz zorlandığını fark ettim. Unutma, tekil öznelerle 'is', çoğul öznelerle 'are' kullanırız. Pratik yapmaya devam, çok iyi gidiyorsun!"
-    - Asla yargılayıcı veya negatif olma. Her zaman cesaretlendirici ol.
+    template = prompts.get("feedback", variant)
+    return template, template.render(username=username, mistakes_summary=mistakes_summary)
 
-    Şimdi bu tavsiye metnini oluştur. Sadece metni döndür, başka hiçbir şey ekleme.
+
+FEEDBACK_FALLBACK_MESSAGE = "Bugün senin için özel bir tavsiye hazırlayamadım, ama harika gittiğini biliyorum!"
+
+
+async def generate_feedback_from_mistakes_async(
+        mistake_counts: Dict[str, int],
+        recent_mistakes: List[UserMistake],
+        username: str,
+        variant: Optional[str] = None
+):
     """
+    Kullanıcının kategori bazındaki hata sayaçlarından ve son hatalarından alınan
+    örneklerden yola çıkarak kişisel bir tavsiye metni üretir. Yük reddedildiğinde
+    llm.Overloaded çağırana iletilir.
+    """
+    if not mistake_counts:
+        return _no_mistakes_feedback(username)
+
+    template, prompt = _get_prompt_for_feedback(mistake_counts, recent_mistakes, username, variant)
 
+    started = time.perf_counter()
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip().strip('"')
+        response, shared = await llm.generate_async(template, prompt)
+        feedback = response.text.strip().strip('"')
+    except llm.Overloaded as e:
+        _record_error("feedback", None, template, started, e)
+        raise
     except Exception as e:
-        print(f"AI Feedback Error: {e}")
-        return "Bugün senin için özel bir tavsiye hazırlayamadım, ama harika gittiğini biliyorum!"
+        _record_error("feedback", None, template, started, e)
+        logger.warning("AI Feedback Error: %s", e)
+        return FEEDBACK_FALLBACK_MESSAGE
+
+    _record_call("feedback", None, template, started, None if shared else response.usage_metadata, bool(feedback))
+    return feedback
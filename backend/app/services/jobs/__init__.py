@@ -0,0 +1,106 @@
+"""
+Yanıt döndükten sonra yapılacak işlerin veritabanında tutulan kalıcı kuyruğu. İş,
+isteğin kendi yazmalarıyla aynı transaction'da kuyruğa alınır; istek commit ettiyse
+iş kaybolmaz, etmediyse hiç oluşmaz. İşleri worker'lar (app.services.jobs.worker)
+çalıştırır: hata veren iş artan aralıklarla yeniden denenir, çökmüş bir worker'ın
+kilitlediği iş kilit süresi dolunca başka bir worker'a geçer.
+
+İşleyiciler 'handler' ile kaydedilir ve (db, payload) alır. Oturumu worker açar ve işin
+tamamlandığı işaretiyle birlikte commit eder; işleyici commit etmezse yazmaları tam
+bir kez uygulanır. Bir iş birden fazla kez çalışabileceği için işleyicinin kendi commit
+ettiği veya veritabanı dışındaki etkileri tekrarlanmaya dayanıklı olmalıdır.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.config import settings
+from app.crud import crud_job
+
+DEFAULT_QUEUE = "default"
+# Uzun süren AI çağrıları veritabanı işlerinin önünü tıkamasın diye ayrı kuyrukta çalışır.
+AI_QUEUE = "ai"
+
+Handler = Callable[[AsyncSession, dict], Awaitable[None]]
+
+_handlers: Dict[str, Handler] = {}
+_queues: Dict[str, str] = {}
+
+
+def handler(kind: str, queue: str = DEFAULT_QUEUE):
+    """İşleyiciyi 'kind' türündeki işler için kaydeder."""
+    def decorator(function: Handler) -> Handler:
+        _handlers[kind] = function
+        _queues[kind] = queue
+        return function
+    return decorator
+
+
+def get_handler(kind: str) -> Optional[Handler]:
+    return _handlers.get(kind)
+
+
+def queues():
+    return sorted(set(_queues.values()))
+
+
+async def enqueue(
+        db: AsyncSession,
+        kind: str,
+        payload: dict,
+        idempotency_key: Optional[str] = None,
+        delay: Optional[timedelta] = None
+):
+    """
+    İşi oturumun transaction'ında kuyruğa alır; commit çağıranın işidir. Aynı
+    'idempotency_key' ile daha önce alınmış bir iş varsa (saklama süresi boyunca) yenisi
+    eklenmez ve False döner.
+    """
+    queue = _queues[kind]
+    run_at = datetime.now(timezone.utc) + (delay or timedelta())
+    added = await crud_job.enqueue(
+        db,
+        queue=queue,
+        kind=kind,
+        payload=payload,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        run_at=run_at,
+        idempotency_key=idempotency_key,
+    )
+    if added:
+        metrics.background_jobs_enqueued.labels(queue, kind).inc()
+    return added
+
+
+_in_app_worker = None
+
+
+async def start_in_app():
+    """JOBS_RUN_IN_APP açıkken bu süreç içinde bir worker başlatır."""
+    global _in_app_worker
+    if not settings.JOBS_RUN_IN_APP or _in_app_worker is not None:
+        return
+    from app.services.jobs.worker import JobWorker
+
+    _in_app_worker = JobWorker(queues())
+    _in_app_worker.start()
+
+
+async def stop_in_app():
+    global _in_app_worker
+    if _in_app_worker is not None:
+        await _in_app_worker.stop()
+        _in_app_worker = None
+
+
+async def stats(db: AsyncSession):
+    counts = await crud_job.count_by_status(db)
+    return {
+        "queues": counts,
+        "in_app_worker": _in_app_worker.stats() if _in_app_worker is not None else None,
+    }
+
+
+__all__ = ["AI_QUEUE", "DEFAULT_QUEUE", "enqueue", "get_handler", "handler", "queues", "start_in_app", "stats", "stop_in_app"]
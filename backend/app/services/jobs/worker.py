@@ -0,0 +1,196 @@
+"""
+Kalıcı kuyruktaki işleri çalıştıran worker. entrypoint.sh gunicorn'un yanında ayrı
+süreçler olarak başlatır:
+
+    python -m app.services.jobs.worker
+
+Her kuyruk için en fazla JOB_WORKER_CONCURRENCY iş aynı anda çalışır. SIGTERM/SIGINT
+alındığında yeni iş alınmaz, süren işler bitirilir.
+"""
+import asyncio
+import importlib
+import logging
+import os
+import random
+import signal
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Set
+
+from app.core import metrics
+from app.core.config import settings
+from app.crud import crud_job
+from app.db import base as db_base
+from app.services import jobs
+
+logger = logging.getLogger(__name__)
+
+# İşleyicilerini 'jobs.handler' ile kaydeden modüller; ayrı worker sürecinde içe aktarılır.
+HANDLER_MODULES = ("app.services.evaluation_service",)
+CLEANUP_INTERVAL_SECONDS = 600
+
+
+def retry_delay(attempts: int) -> float:
+    """'attempts'. denemeden sonraki bekleme: üstel artış, üst sınır ve yarıya kadar rastgele sapma."""
+    delay = min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobWorker:
+    def __init__(self, queues: Iterable[str], concurrency: Optional[int] = None):
+        self.queues = list(queues)
+        self.concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._stopping = asyncio.Event()
+        self._tasks: Set[asyncio.Task] = set()
+        self._in_flight: Dict[str, Set[asyncio.Task]] = {queue: set() for queue in self.queues}
+        self._stats: Dict[str, Dict[str, int]] = {
+            queue: {"claimed": 0, "done": 0, "retried": 0, "failed": 0, "lost": 0} for queue in self.queues
+        }
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        for queue in self.queues:
+            self._tasks.add(loop.create_task(self._queue_loop(queue)))
+        self._tasks.add(loop.create_task(self._cleanup_loop()))
+
+    async def stop(self):
+        self._stopping.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def run(self):
+        self.start()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _queue_loop(self, queue: str):
+        in_flight = self._in_flight[queue]
+        stopped = asyncio.ensure_future(self._stopping.wait())
+        try:
+            while not self._stopping.is_set():
+                free = self.concurrency - len(in_flight)
+                claimed = await self._claim(queue, free) if free > 0 else []
+                for job in claimed:
+                    task = asyncio.ensure_future(self._run(queue, job))
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+                if free > 0 and len(claimed) == free:
+                    # Kuyrukta bekleyen başka iş olabilir.
+                    continue
+                # Bir iş bitene, yoklama aralığı dolana veya durdurulana kadar bekle.
+                await asyncio.wait(
+                    in_flight | {stopped},
+                    timeout=settings.JOB_POLL_INTERVAL_SECONDS,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+        finally:
+            stopped.cancel()
+
+    async def _claim(self, queue: str, limit: int):
+        now = datetime.now(timezone.utc)
+        try:
+            async with db_base.SessionLocal() as db:
+                claimed = await crud_job.claim(
+                    db,
+                    queues=[queue],
+                    worker_id=self.worker_id,
+                    limit=limit,
+                    now=now,
+                    lock_timeout=timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS),
+                )
+        except Exception as e:
+            logger.warning("Claiming jobs from queue '%s' failed: %s", queue, e)
+            return []
+        self._stats[queue]["claimed"] += len(claimed)
+        for job in claimed:
+            run_at = job.run_at if job.run_at.tzinfo else job.run_at.replace(tzinfo=timezone.utc)
+            metrics.background_job_lag.labels(queue).observe(max((now - run_at).total_seconds(), 0.0))
+        return claimed
+
+    async def _run(self, queue: str, job):
+        started = time.perf_counter()
+        try:
+            outcome = await self._execute(job)
+        except Exception as e:
+            outcome = await self._fail(job, e)
+        metrics.background_job_duration.labels(queue).observe(time.perf_counter() - started)
+        metrics.background_jobs_processed.labels(queue, job.kind, outcome).inc()
+        self._stats[queue][outcome] += 1
+
+    async def _execute(self, job) -> str:
+        handler = jobs.get_handler(job.kind)
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind '{job.kind}'")
+        async with db_base.SessionLocal() as db:
+            await handler(db, job.payload)
+            if not await crud_job.complete(db, job.id, self.worker_id, datetime.now(timezone.utc)):
+                # Kilit başka bir worker'a geçti; işi o tamamlayacak, buradaki yazmalar geri alınır.
+                await db.rollback()
+                return "lost"
+            await db.commit()
+        return "done"
+
+    async def _fail(self, job, error: Exception) -> str:
+        now = datetime.now(timezone.utc)
+        retry_at = None
+        if job.attempts < job.max_attempts:
+            retry_at = now + timedelta(seconds=retry_delay(job.attempts))
+        logger.warning("Job %s (%s) attempt %s/%s failed: %r", job.id, job.kind, job.attempts, job.max_attempts, error)
+        try:
+            async with db_base.SessionLocal() as db:
+                await crud_job.fail(db, job.id, self.worker_id, repr(error)[:2000], retry_at, now)
+        except Exception as e:
+            # Kilit süresi dolunca iş yeniden alınır.
+            logger.warning("Recording failure of job %s failed: %s", job.id, e)
+        return "retried" if retry_at is not None else "failed"
+
+    async def _cleanup_loop(self):
+        while not self._stopping.is_set():
+            before = datetime.now(timezone.utc) - timedelta(hours=settings.JOB_RETENTION_HOURS)
+            try:
+                async with db_base.SessionLocal() as db:
+                    await crud_job.delete_finished(db, before)
+            except Exception as e:
+                logger.warning("Deleting finished jobs failed: %s", e)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), CLEANUP_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self):
+        return {
+            "worker_id": self.worker_id,
+            "queues": {
+                queue: {"in_flight": len(self._in_flight[queue]), **self._stats[queue]}
+                for queue in self.queues
+            },
+        }
+
+
+async def main():
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+    from app.services import llm
+
+    llm.start()
+    worker = JobWorker(jobs.queues())
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, worker._stopping.set)
+    logger.info("Job worker %s started for queues %s", worker.worker_id, worker.queues)
+    try:
+        await worker.run()
+    finally:
+        await db_base.engine.dispose()
+        if metrics.MULTIPROCESS:
+            from prometheus_client import multiprocess
+
+            multiprocess.mark_process_dead(os.getpid())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
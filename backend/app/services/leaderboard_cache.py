@@ -0,0 +1,63 @@
+import hashlib
+from typing import Hashable, Iterable, Optional
+
+import orjson
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.schemas import user as user_schema
+
+# Yanıttaki alanlar (API şeması user_schema.User). Satırlar veritabanından geldiği için
+# yeniden doğrulanmaz; EmailStr doğrulaması 100 satırlık sayfada milisaniyeler sürer.
+FIELDS = tuple(user_schema.User.model_fields)
+
+
+class CachedPage:
+    """Liderlik tablosunun bir sayfasının JSON baytları, ETag'i ve sonraki sayfanın imleci."""
+
+    __slots__ = ("body", "etag", "next_cursor")
+
+    def __init__(self, body: bytes, next_cursor: Optional[str]):
+        self.body = body
+        # Gövdenin özeti: aynı içeriği üreten her worker aynı ETag'i verir.
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.next_cursor = next_cursor
+
+
+# (skip, limit, imleç) -> CachedPage
+page_cache = TTLCache(
+    maxsize=settings.LEADERBOARD_CACHE_MAX_ENTRIES,
+    ttl=settings.LEADERBOARD_CACHE_TTL_SECONDS,
+)
+# Bu worker'da skorları veya kullanıcı listesini değiştiren yazma sayısı.
+version = 0
+
+
+def serialize(users: Iterable) -> bytes:
+    return orjson.dumps([{field: getattr(user, field) for field in FIELDS} for user in users])
+
+
+def get(key: Hashable) -> Optional[CachedPage]:
+    return page_cache.get(key)
+
+
+def store(key: Hashable, body: bytes, next_cursor: Optional[str], read_version: int) -> CachedPage:
+    """
+    Sayfayı önbelleğe alır. 'read_version', sayfa veritabanından okunmadan önceki
+    sürümdür; okuma sırasında bir yazma olduysa eski olabilecek sayfa saklanmaz.
+    """
+    page = CachedPage(body, next_cursor)
+    if read_version == version:
+        page_cache.set(key, page)
+    return page
+
+
+def invalidate():
+    """Skor, seviye veya kullanıcı listesi değiştiğinde çağrılır."""
+    global version
+    version += 1
+    page_cache.clear()
+
+
+def stats():
+    return {"version": version, **page_cache.stats()}
@@ -0,0 +1,106 @@
+"""
+Liderlik tablosunun canlı yayını. Bağlanan istemci (WebSocket veya SSE) ilk N sıranın
+anlık görüntüsünü bir kez alır, sonra yalnızca sırası veya puanı değişen kayıtları.
+
+Skoru değiştiren her yazma changed() çağırır; bildirim broker üzerinden tüm worker'lara
+ulaşır (Postgres'te LISTEN/NOTIFY, aksi halde süreç içi). Bildirim, satırı değişen
+kullanıcıların id'lerini de taşır; her worker bu kullanıcıları principal_cache'ten
+atar, böylece hiçbir worker eski puanı veya seviyeyi TTL boyunca sunmaya devam etmez. Her worker bir değişiklik
+dalgası için tek bir sorgu çalıştırır; istemci sayısı veritabanı yükünü değiştirmez.
+"""
+import logging
+from typing import FrozenSet, Optional
+
+from sqlalchemy.engine import make_url
+
+from app.core import principal_cache
+from app.core.config import settings
+from app.services import leaderboard_cache
+from app.services.leaderboard_push.broker import LocalBroker, PostgresBroker
+from app.services.leaderboard_push.hub import LeaderboardHub, Subscriber
+
+logger = logging.getLogger(__name__)
+
+
+async def _load_top(limit: int):
+    # crud_user bu modülü içe aktarır; döngüyü kırmak için burada.
+    from app.crud import crud_user
+    from app.db.base import SessionLocal
+
+    async with SessionLocal() as db:
+        return await crud_user.get_users_sorted_by_score(db, skip=0, limit=limit)
+
+
+hub = LeaderboardHub(
+    load=_load_top,
+    top_n=settings.LEADERBOARD_PUSH_TOP_N,
+    debounce=settings.LEADERBOARD_PUSH_DEBOUNCE_SECONDS,
+    queue_size=settings.LEADERBOARD_PUSH_QUEUE_SIZE,
+)
+
+
+def _on_change(user_ids: Optional[FrozenSet[int]]):
+    # Başka bir worker'daki yazma: bu worker'ın REST sayfaları ve kullanıcı anlık görüntüleri de artık eski.
+    if user_ids is None:
+        principal_cache.invalidate_all_users()
+    else:
+        for user_id in user_ids:
+            principal_cache.invalidate_user(user_id)
+    leaderboard_cache.invalidate()
+    hub.notify()
+
+
+def _create_broker():
+    broker = settings.LEADERBOARD_PUSH_BROKER
+    if broker == "auto":
+        broker = "postgres" if make_url(settings.DATABASE_URL).get_backend_name() == "postgresql" else "local"
+    if broker == "postgres":
+        return PostgresBroker(settings.DATABASE_URL, _on_change)
+    if broker == "local":
+        return LocalBroker(_on_change)
+    raise ValueError(f"Unknown LEADERBOARD_PUSH_BROKER: {broker!r}")
+
+
+_broker = _create_broker()
+
+
+async def start():
+    """Broker'ı başlatır; dinleme bağlantısı kurulamazsa bu worker süreç içi bildirimle devam eder."""
+    global _broker
+    try:
+        await _broker.start()
+    except Exception as e:
+        logger.warning("Leaderboard broker '%s' could not start, falling back to local: %s", _broker.name, e)
+        _broker = LocalBroker(_on_change)
+
+
+async def stop():
+    await hub.stop()
+    await _broker.stop()
+
+
+def changed(user_id: Optional[int] = None):
+    """
+    Skor, seviye veya kullanıcı listesi değiştiğinde, commit'ten sonra çağrılır.
+    'user_id' satırı değişen kullanıcıdır; bu worker'da hemen, diğerlerinde bildirim
+    ulaştığında önbellekten atılır.
+    """
+    if user_id is not None:
+        principal_cache.invalidate_user(user_id)
+    leaderboard_cache.invalidate()
+    _broker.publish(() if user_id is None else (user_id,))
+
+
+async def subscribe() -> Subscriber:
+    return await hub.subscribe()
+
+
+def unsubscribe(subscriber: Subscriber):
+    hub.unsubscribe(subscriber)
+
+
+def stats():
+    return {**_broker.stats(), **hub.stats()}
+
+
+__all__ = ["changed", "hub", "start", "stats", "stop", "subscribe", "unsubscribe", "Subscriber"]
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from typing import Callable, FrozenSet, Iterable, Optional, Set
+
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "leaderboard_changed"
+# pg_notify yükü 8000 baytla sınırlıdır; daha uzun bir id listesi "hepsi" olarak gönderilir.
+MAX_PAYLOAD_LENGTH = 7000
+ALL_USERS = "*"
+
+# Bildirimle gelen, satırı değişen kullanıcıların id'leri; None ise hangilerinin
+# değiştiği bilinmiyordur (ör. kopan bağlantı) ve tüm kullanıcılar değişmiş sayılır.
+OnMessage = Callable[[Optional[FrozenSet[int]]], None]
+
+
+def encode_user_ids(user_ids: Iterable[int]) -> str:
+    payload = ",".join(str(user_id) for user_id in sorted(user_ids))
+    return ALL_USERS if len(payload) > MAX_PAYLOAD_LENGTH else payload
+
+
+def decode_user_ids(payload: str) -> Optional[FrozenSet[int]]:
+    if payload == ALL_USERS:
+        return None
+    try:
+        return frozenset(int(user_id) for user_id in payload.split(",") if user_id)
+    except ValueError:
+        return None
+
+
+class LocalBroker:
+    """Tek süreç içi bildirim; birden fazla worker varsa diğerleri değişikliği görmez."""
+
+    name = "local"
+
+    def __init__(self, on_message: OnMessage):
+        self.on_message = on_message
+
+    async def start(self):
+        pass
+
+    def publish(self, user_ids: Iterable[int] = ()):
+        self.on_message(frozenset(user_ids))
+
+    async def stop(self):
+        pass
+
+    def stats(self):
+        return {"broker": self.name}
+
+
+class PostgresBroker:
+    """
+    Postgres LISTEN/NOTIFY ile worker'lar arası bildirim. Her worker havuzdan ayrı,
+    yalnızca dinlemeye ayrılmış bir bağlantı tutar; yayınlanan bildirim yayınlayan
+    dahil tüm worker'lara ulaşır. Bağlantı koparsa artan aralıklarla yeniden bağlanılır
+    ve arada kaçmış olabilecek bildirimler için tüm kullanıcıların değiştiği varsayılır.
+    Bildirimin yükü, satırı değişen kullanıcıların id'leridir.
+    """
+
+    name = "postgres"
+
+    def __init__(self, database_url: str, on_message: OnMessage):
+        # asyncpg, SQLAlchemy sürücü ekini ("+psycopg2", "+asyncpg") tanımaz.
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.on_message = on_message
+        self._connection = None
+        self._lock = asyncio.Lock()
+        self._pending = False
+        self._pending_users: Set[int] = set()
+        self._reconnect: Optional[asyncio.Task] = None
+        self._closed = False
+        self.published = 0
+        self.received = 0
+        self.reconnects = 0
+
+    async def start(self):
+        await self._connect()
+
+    async def _connect(self):
+        import asyncpg
+
+        connection = await asyncpg.connect(self.dsn)
+        await connection.add_listener(CHANNEL, self._on_notification)
+        connection.add_termination_listener(self._on_terminated)
+        self._connection = connection
+
+    def _on_notification(self, connection, pid, channel, payload):
+        self.received += 1
+        self.on_message(decode_user_ids(payload))
+
+    def _on_terminated(self, connection):
+        if self._closed or self._reconnect is not None:
+            return
+        self._connection = None
+        self._reconnect = asyncio.get_running_loop().create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self):
+        delay = 0.5
+        try:
+            while not self._closed:
+                await asyncio.sleep(delay)
+                try:
+                    await self._connect()
+                except Exception as e:
+                    logger.warning("Leaderboard listener reconnect failed: %s", e)
+                    delay = min(delay * 2, 30)
+                    continue
+                self.reconnects += 1
+                self.on_message(None)
+                return
+        finally:
+            self._reconnect = None
+
+    def publish(self, user_ids: Iterable[int] = ()):
+        """
+        Değişikliği tüm worker'lara duyurur. Bekleyen bir yayın varsa yenisi (kullanıcı
+        id'leriyle birlikte) onunla birleşir; bağlantı yoksa yalnızca bu worker bilgilendirilir.
+        """
+        self._pending_users.update(user_ids)
+        if self._pending:
+            return
+        self._pending = True
+        asyncio.get_running_loop().create_task(self._notify())
+
+    async def _notify(self):
+        async with self._lock:
+            self._pending = False
+            user_ids = frozenset(self._pending_users)
+            self._pending_users.clear()
+            connection = self._connection
+            if connection is None or connection.is_closed():
+                self.on_message(user_ids)
+                return
+            try:
+                await connection.execute("SELECT pg_notify($1, $2)", CHANNEL, encode_user_ids(user_ids))
+                self.published += 1
+            except Exception as e:
+                logger.warning("Leaderboard notify failed: %s", e)
+                self.on_message(user_ids)
+
+    async def stop(self):
+        self._closed = True
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+        if self._connection is not None and not self._connection.is_closed():
+            await self._connection.close()
+        self._connection = None
+
+    def stats(self):
+        return {
+            "broker": self.name,
+            "connected": self._connection is not None and not self._connection.is_closed(),
+            "published": self.published,
+            "received": self.received,
+            "reconnects": self.reconnects,
+        }
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+import orjson
+
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+# İstemcilere gönderilen alanlar; e-posta push kanalında yayınlanmaz.
+ENTRY_FIELDS = ("id", "username", "weekly_score", "current_level")
+
+Entries = List[dict]
+
+
+def build_entries(users) -> Entries:
+    return [
+        {"rank": rank, **{field: getattr(user, field) for field in ENTRY_FIELDS}}
+        for rank, user in enumerate(users, start=1)
+    ]
+
+
+def diff_entries(previous: Entries, current: Entries):
+    """
+    İki sıralama arasındaki fark: sırası, puanı veya diğer alanları değişen ya da
+    listeye yeni giren kayıtlar ('changes') ve listeden çıkanların id'leri ('removed').
+    """
+    before = {entry["id"]: entry for entry in previous}
+    changes = [entry for entry in current if before.get(entry["id"]) != entry]
+    current_ids = {entry["id"] for entry in current}
+    removed = [user_id for user_id in before if user_id not in current_ids]
+    return changes, removed
+
+
+class Subscriber:
+    """
+    Bir push bağlantısının bekleyen mesajları. Kuyruk sınırlıdır: istemci
+    yetişemeyip kuyruk dolarsa bekleyen farklar atılır ve yerine güncel anlık
+    görüntü konur; böylece bellek sınırlı kalır, istemci de tutarlı bir duruma döner.
+    """
+
+    def __init__(self, hub: "LeaderboardHub", queue_size: int):
+        self.hub = hub
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=queue_size)
+        self.resyncs = 0
+
+    def offer(self, message: bytes):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.resyncs += 1
+            metrics.leaderboard_push_resyncs.inc()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(self.hub.snapshot_message())
+            metrics.leaderboard_push_messages.labels("snapshot").inc()
+
+    async def next(self) -> bytes:
+        return await self.queue.get()
+
+
+class LeaderboardHub:
+    """
+    Worker başına liderlik tablosu yayıncısı. Skor değiştiğinde (broker'dan gelen
+    bildirimle) ilk N sırayı tek bir sorguyla yeniden okur, önceki sıralamayla farkını
+    bir kez serileştirir ve bağlı tüm istemcilerin kuyruklarına koyar. Bildirimler
+    'debounce' saniye boyunca birleştirilir; bağlı istemci yoksa okuma yapılmaz,
+    sıralama yalnızca eskimiş olarak işaretlenir.
+    """
+
+    def __init__(self, load: Callable[[int], Awaitable[list]], top_n: int, debounce: float, queue_size: int):
+        self.load = load
+        self.top_n = top_n
+        self.debounce = debounce
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscriber] = set()
+        self.version = 0
+        self._entries: Optional[Entries] = None
+        self._snapshot: Optional[bytes] = None
+        # Alınan bildirim sayısı ve son başarılı okumanın başında bu sayının değeri; farklıysa
+        # sıralama eskimiştir (okuma sürerken gelen bildirim de kaybolmaz).
+        self._changes = 0
+        self._loaded_changes = -1
+        self._refresh: Optional[asyncio.Task] = None
+        self._load_lock = asyncio.Lock()
+        self._stats: Dict[str, int] = {"notifications": 0, "refreshes": 0, "diffs": 0, "snapshots": 0}
+
+    @property
+    def stale(self) -> bool:
+        return self._loaded_changes != self._changes
+
+    def snapshot_message(self) -> bytes:
+        if self._snapshot is None:
+            self._snapshot = orjson.dumps({"type": "snapshot", "version": self.version, "entries": self._entries})
+        return self._snapshot
+
+    async def _ensure_loaded(self) -> Optional[bytes]:
+        async with self._load_lock:
+            if self.stale:
+                return await self._reload()
+        return None
+
+    async def _reload(self) -> Optional[bytes]:
+        """Sıralamayı yeniden okur; değiştiyse fark mesajını döndürür."""
+        changes_seen = self._changes
+        entries = build_entries(await self.load(self.top_n))
+        self._loaded_changes = changes_seen
+        self._stats["refreshes"] += 1
+        metrics.leaderboard_push_refreshes.inc()
+        if self._entries is None:
+            self._entries = entries
+            self._snapshot = None
+            return None
+        changes, removed = diff_entries(self._entries, entries)
+        if not changes and not removed:
+            return None
+        self.version += 1
+        self._entries = entries
+        self._snapshot = None
+        return orjson.dumps({"type": "diff", "version": self.version, "changes": changes, "removed": removed})
+
+    def _broadcast(self, message: bytes):
+        self._stats["diffs"] += 1
+        for subscriber in list(self.subscribers):
+            subscriber.offer(message)
+            metrics.leaderboard_push_messages.labels("diff").inc()
+
+    async def subscribe(self) -> Subscriber:
+        message = await self._ensure_loaded()
+        if message is not None:
+            # Yeni bağlantının tetiklediği okuma bekleyen bir değişikliği yakaladıysa, zaten
+            # bağlı istemciler de farkı almalı; sonraki debounce okuması fark bulmayacaktır.
+            self._broadcast(message)
+        subscriber = Subscriber(self, self.queue_size)
+        subscriber.offer(self.snapshot_message())
+        self._stats["snapshots"] += 1
+        metrics.leaderboard_push_messages.labels("snapshot").inc()
+        self.subscribers.add(subscriber)
+        metrics.leaderboard_push_subscribers.inc()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.discard(subscriber)
+            metrics.leaderboard_push_subscribers.dec()
+
+    def notify(self):
+        """Broker'dan gelen 'sıralama değişmiş olabilir' bildirimi."""
+        self._stats["notifications"] += 1
+        self._changes += 1
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        if self.subscribers and self._refresh is None:
+            self._refresh = asyncio.get_running_loop().create_task(self._debounced_refresh())
+
+    async def _debounced_refresh(self):
+        try:
+            await asyncio.sleep(self.debounce)
+            async with self._load_lock:
+                if not self.subscribers:
+                    return
+                message = await self._reload()
+        except Exception as e:
+            # Sıralama eskimiş kalır; bir sonraki bildirim veya yeni bağlantı yeniden dener.
+            logger.warning("Leaderboard refresh failed: %s", e)
+            return
+        finally:
+            self._refresh = None
+        if message is not None:
+            self._broadcast(message)
+        if self.stale:
+            # Okuma sürerken yeni bir değişiklik bildirildi.
+            self._schedule_refresh()
+
+    async def stop(self):
+        if self._refresh is not None:
+            self._refresh.cancel()
+
+    def stats(self):
+        return {
+            "subscribers": len(self.subscribers),
+            "version": self.version,
+            "stale": self.stale,
+            "entries": len(self._entries) if self._entries is not None else 0,
+            "lagging_subscribers": sum(1 for subscriber in self.subscribers if subscriber.resyncs),
+            **self._stats,
+        }
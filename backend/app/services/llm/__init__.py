@@ -0,0 +1,305 @@
+"""
+Metin üreten modellere erişim katmanı. Sağlayıcı LLM_PROVIDER ayarıyla seçilir
+("gemini" veya ağ gerektirmeyen deterministik "local") ve ilk kullanımda oluşturulur.
+Eşzamanlı aynı asenkron istekler tek bir upstream çağrısında birleştirilir.
+
+Tüm çağrılar bir devre kesiciden geçer; asenkron çağrılar ayrıca uyarlanan bir
+eşzamanlılık sınırına ve istemciler arasında adil bir bekleme kuyruğuna tabidir,
+isteğin kalan süresiyle ve LLM_CALL_TIMEOUT_SECONDS ile sınırlanır; şablonun olağan
+süresini aşan çağrılar için ikinci bir deneme (hedge) başlatılır. Devre açıkken,
+yük reddedildiğinde (Overloaded) ve süre dolduğunda çağrı istisnayla biter; yedeğe
+düşmek veya 503 döndürmek çağıranın işidir.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext, suppress
+from typing import Optional
+
+from app.core import client_key, deadline, metrics
+from app.core.config import settings
+from app.services.llm.base import LLMProvider, LLMResponse, LLMUsage, option_key
+from app.services.llm.coalescer import SingleFlight
+from app.services.llm.limiter import AdaptiveLimiter, Overloaded
+from app.services.llm.resilience import (
+    HEDGE,
+    STATE_VALUES,
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+    hedged,
+)
+
+logger = logging.getLogger(__name__)
+
+_provider: Optional[LLMProvider] = None
+_startup: Optional[Future] = None
+coalescer = SingleFlight()
+latencies = LatencyTracker(window=200, min_samples=settings.LLM_HEDGE_MIN_SAMPLES)
+hedge_stats = {"calls": 0, "hedged": 0, "hedge_wins": 0}
+
+
+def _on_circuit_state_change(state: str):
+    metrics.llm_circuit_state.set(STATE_VALUES[state])
+    metrics.llm_circuit_transitions.labels(state).inc()
+
+
+limiter = AdaptiveLimiter(
+    initial_limit=settings.LLM_LIMITER_INITIAL_LIMIT,
+    min_limit=settings.LLM_LIMITER_MIN_LIMIT,
+    max_limit=settings.LLM_LIMITER_MAX_LIMIT,
+    max_queue=settings.LLM_LIMITER_MAX_QUEUE,
+    max_queue_per_client=settings.LLM_LIMITER_MAX_QUEUE_PER_CLIENT,
+    queue_timeout=settings.LLM_LIMITER_QUEUE_TIMEOUT_SECONDS,
+    backoff=settings.LLM_LIMITER_BACKOFF,
+)
+breaker = CircuitBreaker(
+    window=settings.LLM_BREAKER_WINDOW,
+    min_calls=settings.LLM_BREAKER_MIN_CALLS,
+    failure_rate=settings.LLM_BREAKER_FAILURE_RATE,
+    cooldown=settings.LLM_BREAKER_COOLDOWN_SECONDS,
+    on_state_change=_on_circuit_state_change,
+)
+
+
+def _create_provider(name: str) -> LLMProvider:
+    if name == "gemini":
+        from app.services.llm.gemini import create_provider
+
+        return create_provider()
+    if name == "local":
+        from app.services.llm.local import LocalProvider
+
+        return LocalProvider()
+    raise ValueError(f"Unknown LLM provider: {name}")
+
+
+def get_provider() -> LLMProvider:
+    global _provider
+    if _provider is None:
+        _provider = _create_provider(settings.LLM_PROVIDER)
+    return _provider
+
+
+def set_provider(provider: LLMProvider) -> LLMProvider:
+    """Sağlayıcıyı değiştirir; benchmark'lar ve yerel geliştirme için."""
+    global _provider
+    _provider = provider
+    breaker.reset()
+    return provider
+
+
+def _log_startup_failure(future: Future):
+    if future.exception() is not None:
+        logger.warning("LLM provider startup failed: %s", future.exception())
+
+
+def start() -> Future:
+    """
+    Sağlayıcıyı oluşturur ve kurulumunu (provider.start) arka planda bir thread'de
+    başlatır. Uygulamanın lifespan'inde, yani her worker'da fork'tan sonra bir kez
+    çağrılır; worker kurulumu beklemeden istek kabul etmeye başlar.
+    """
+    global _startup
+    if _startup is None:
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-start")
+        _startup = executor.submit(get_provider().start)
+        _startup.add_done_callback(_log_startup_failure)
+        executor.shutdown(wait=False)
+    return _startup
+
+
+async def _wait_for_startup():
+    """Kurulum sürerken gelen asenkron çağrılar event loop'u bloklamadan onu bekler."""
+    if _startup is not None and not _startup.done():
+        # Kurulum hatası, sağlayıcı ilk çağrıda kurulumu yeniden denerken fırlatılır.
+        with suppress(Exception):
+            await asyncio.wrap_future(_startup)
+
+
+def _guard(template):
+    if not settings.LLM_BREAKER_ENABLED:
+        return nullcontext()
+    try:
+        # Kuyrukta süresi dolan veya yük yüzünden reddedilen çağrılar upstream hatası değildir.
+        return breaker.guard(neutral=(deadline.DeadlineExceeded, Overloaded))
+    except CircuitOpenError:
+        metrics.llm_rejected_requests.labels(template.name, "circuit_open").inc()
+        raise
+
+
+def _hedge_budget_left() -> bool:
+    return hedge_stats["hedged"] < settings.LLM_HEDGE_MAX_RATIO * hedge_stats["calls"]
+
+
+def _hedge_delay(template) -> Optional[float]:
+    """İkinci denemenin başlatılacağı süre; hedge kapalıysa veya bütçe dolduysa None."""
+    if not settings.LLM_HEDGE_ENABLED:
+        return None
+    if not _hedge_budget_left():
+        return None
+    threshold = latencies.percentile(template.name, settings.LLM_HEDGE_PERCENTILE)
+    if threshold is None:
+        return None
+    return max(threshold, settings.LLM_HEDGE_MIN_DELAY_SECONDS)
+
+
+async def _call(provider: LLMProvider, template, prompt: str, options) -> LLMResponse:
+    """
+    Tek bir mantıksal upstream çağrısı: devre kesici, eşzamanlılık sınırı, hedge ve
+    çağrı başına süre sınırı.
+    """
+    await _wait_for_startup()
+    with _guard(template):
+        limited = settings.LLM_LIMITER_ENABLED
+        if limited:
+            await limiter.acquire(client_key.get())
+        started = time.perf_counter()
+        baseline = latencies.percentile(template.name, 0.5)
+        hedge_stats["calls"] += 1
+        fired = False
+
+        def admit_hedge():
+            # Bütçe, ikinci denemenin başladığı anda yeniden kontrol edilir; ikinci deneme
+            # sınırlayıcıda kendi yerini tutar, yer yoksa ilk deneme beklenir.
+            nonlocal fired
+            if not _hedge_budget_left():
+                return False
+            if limited and not limiter.try_acquire():
+                return False
+            fired = True
+            hedge_stats["hedged"] += 1
+            return True
+
+        try:
+            response, winner = await deadline.wait(
+                hedged(
+                    lambda: provider.generate_async(template, prompt, **options),
+                    _hedge_delay(template),
+                    admit_hedge,
+                    limiter.release if limited else None,
+                ),
+                limit=settings.LLM_CALL_TIMEOUT_SECONDS,
+            )
+        except deadline.DeadlineExceeded:
+            # Çağıranın süresi upstream'in durumu hakkında bilgi vermez.
+            if limited:
+                limiter.release()
+            raise
+        except Exception:
+            if limited:
+                limiter.release(time.perf_counter() - started, overloaded=True)
+            if fired:
+                metrics.llm_hedged_requests.labels(template.name, "none").inc()
+            raise
+        except BaseException:
+            if limited:
+                limiter.release()
+            raise
+
+        latency = time.perf_counter() - started
+        if limited:
+            slow = baseline is not None and latency > baseline * settings.LLM_LIMITER_LATENCY_TOLERANCE
+            limiter.release(latency, overloaded=slow)
+        if winner is not None:
+            hedge_stats["hedge_wins"] += winner == HEDGE
+            metrics.llm_hedged_requests.labels(template.name, winner).inc()
+        latencies.observe(template.name, latency)
+        return response
+
+
+async def generate_async(template, prompt: str, coalesce: bool = True, **options):
+    """
+    Yanıtı ve yanıtın eşzamanlı aynı bir istekle paylaşılıp paylaşılmadığını döndürür.
+    Paylaşılan yanıtların token'ları lider çağrıda zaten sayıldığı için tekrar sayılmamalıdır.
+    Birbirinden farklı sonuçlar isteyen çağıranlar coalesce=False vermelidir.
+
+    Paylaşılan çağrı tek bir isteğe bağlı değildir: her çağıran yalnızca kendi isteğinin
+    kalan süresi kadar bekler, süresi dolan çağıranın ayrılması diğerlerini etkilemez.
+    """
+    provider = get_provider()
+    try:
+        if not (coalesce and settings.LLM_COALESCE_ENABLED):
+            return await deadline.wait(_call(provider, template, prompt, options)), False
+
+        async def shared_call():
+            # Paylaşılan task liderin context kopyasında çalışır; liderin süresiyle sınırlanmaz.
+            deadline.detach()
+            return await _call(provider, template, prompt, options)
+
+        key = (provider.name, template.name, template.variant, prompt, option_key(options))
+        response, shared = await deadline.wait(coalescer.do(key, shared_call))
+    except deadline.DeadlineExceeded:
+        metrics.llm_rejected_requests.labels(template.name, "deadline").inc()
+        raise
+    if shared:
+        metrics.llm_coalesced_requests.labels(template.name).inc()
+    return response, shared
+
+
+async def stream(template, prompt: str, **options):
+    """
+    Sağlayıcının akışını devre kesiciden ve eşzamanlılık sınırından (akış boyunca bir
+    yer tutulur) geçirir; parçalar arası bekleme isteğin kalan süresiyle ve tüm akış
+    LLM_CALL_TIMEOUT_SECONDS ile sınırlanır. Akışlarda hedge yapılmaz.
+    """
+    await _wait_for_startup()
+    with _guard(template):
+        limited = settings.LLM_LIMITER_ENABLED
+        if limited:
+            await limiter.acquire(client_key.get())
+        expires_at = time.monotonic() + settings.LLM_CALL_TIMEOUT_SECONDS
+        chunks = None
+        try:
+            chunks = get_provider().stream(template, prompt, **options).__aiter__()
+            while True:
+                try:
+                    chunk = await deadline.wait(chunks.__anext__(), limit=expires_at - time.monotonic())
+                except StopAsyncIteration:
+                    break
+                except deadline.DeadlineExceeded:
+                    metrics.llm_rejected_requests.labels(template.name, "deadline").inc()
+                    raise
+                yield chunk
+        finally:
+            if limited:
+                # Akışın süresi tek bir yanıtın süresiyle kıyaslanamaz; sınır uyarlanmaz.
+                limiter.release()
+            if chunks is not None:
+                await chunks.aclose()
+
+
+def stats():
+    provider = get_provider()
+    return {
+        "provider": provider.name,
+        "model": provider.model_name,
+        "coalescer": coalescer.stats(),
+        "circuit_breaker": breaker.stats(),
+        "limiter": limiter.stats(),
+        "hedging": {
+            **hedge_stats,
+            "hedge_rate": round(hedge_stats["hedged"] / hedge_stats["calls"], 4) if hedge_stats["calls"] else 0.0,
+            "thresholds": latencies.stats(settings.LLM_HEDGE_PERCENTILE),
+        },
+    }
+
+
+__all__ = [
+    "LLMProvider",
+    "LLMResponse",
+    "LLMUsage",
+    "CircuitOpenError",
+    "Overloaded",
+    "breaker",
+    "coalescer",
+    "generate",
+    "generate_async",
+    "get_provider",
+    "limiter",
+    "set_provider",
+    "start",
+    "stats",
+    "stream",
+]
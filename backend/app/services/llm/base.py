@@ -0,0 +1,60 @@
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, Optional
+
+
+class LLMUsage:
+    """Gemini'nin usage_metadata alanlarıyla aynı adları taşıyan token sayaçları."""
+
+    def __init__(self, prompt_token_count: int = 0, candidates_token_count: int = 0,
+                 cached_content_token_count: int = 0):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.cached_content_token_count = cached_content_token_count
+
+
+class LLMResponse:
+    def __init__(self, text: str, usage_metadata: Optional[LLMUsage] = None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class LLMProvider(ABC):
+    """
+    Metin üreten bir modelin arayüzü. Yanıtlar (ve akıştaki parçalar) 'text' ve
+    'usage_metadata' alanlarına sahiptir; Gemini'nin yanıt nesneleri bu arayüze
+    doğrudan uyar.
+
+    Ortak seçenekler:
+      - response_schema: yanıtın uyması gereken JSON şeması (Gemini şema alt kümesi)
+      - json_output: yanıtın JSON olması istenir
+      - temperature: örnekleme sıcaklığı
+    """
+
+    name = "base"
+    model_name = ""
+
+    @abstractmethod
+    def generate(self, template, prompt: str, **options) -> LLMResponse:
+        ...
+
+    @abstractmethod
+    async def generate_async(self, template, prompt: str, **options) -> LLMResponse:
+        ...
+
+    @abstractmethod
+    def stream(self, template, prompt: str, **options) -> AsyncIterator[LLMResponse]:
+        ...
+
+    def start(self):
+        """
+        Ağır istemci kurulumu (kütüphane importu, kimlik bilgileri). Süreç başına bir
+        kez, fork'tan sonra bir thread'de çağrılır; yapılmamışsa ilk çağrıda yapılmalıdır.
+        """
+
+    def close(self):
+        pass
+
+
+def option_key(options: Dict[str, Any]) -> tuple:
+    """Seçenekleri, eşzamanlı aynı isteklerin birleştirilmesinde anahtar olarak kullanılabilir hale getirir."""
+    return tuple(sorted((name, repr(value)) for name, value in options.items()))
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Aynı anahtarla eşzamanlı gelen çağrıları tek bir çağrıda birleştirir: ilk çağıran
+    (lider) işi başlatır, iş bitene kadar gelen diğerleri (takipçiler) aynı sonucu veya
+    aynı istisnayı alır. İş ayrı bir task olarak çalışır; çağıranlardan biri iptal
+    edilse bile diğerleri için devam eder. Sonuç saklanmaz, yalnızca uçuştaki çağrılar
+    paylaşılır.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """İşin sonucunu ve sonucun başka bir çağrıyla paylaşılıp paylaşılmadığını döndürür."""
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self.followers += 1
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Kimse beklemiyorsa "exception was never retrieved" uyarısını önler.
+            task.exception()
+
+    def stats(self):
+        total = self.leaders + self.followers
+        return {
+            "in_flight": len(self._in_flight),
+            "upstream_calls": self.leaders,
+            "coalesced": self.followers,
+            "coalesced_rate": round(self.followers / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,76 @@
+import threading
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.services.llm.base import LLMProvider
+
+MODEL_NAME = 'gemini-2.5-flash'
+
+
+class GeminiProvider(LLMProvider):
+    """
+    Google Gemini. google.generativeai'nin importu ve yapılandırması (yaklaşık 1 sn)
+    start() ile başlangıçta bir thread'de, yapılmadıysa ilk çağrıda yapılır; her
+    şablonun system instruction'ı için bir GenerativeModel oluşturulup saklanır.
+    """
+
+    name = "gemini"
+    model_name = MODEL_NAME
+
+    def __init__(self, api_key: str, model_name: str = MODEL_NAME):
+        self.api_key = api_key
+        self.model_name = model_name
+        self._genai = None
+        self._lock = threading.Lock()
+        self._models: Dict[str, object] = {}
+
+    def _client(self):
+        if self._genai is None:
+            with self._lock:
+                if self._genai is None:
+                    import google.generativeai as genai
+
+                    genai.configure(api_key=self.api_key)
+                    self._genai = genai
+        return self._genai
+
+    def start(self):
+        self._client()
+
+    def _model_for(self, template):
+        model = self._models.get(template.system_instruction)
+        if model is None:
+            model = self._client().GenerativeModel(self.model_name, system_instruction=template.system_instruction)
+            self._models[template.system_instruction] = model
+        return model
+
+    def _generation_config(self, response_schema: Optional[dict] = None, json_output: bool = False,
+                           temperature: Optional[float] = None):
+        if response_schema is None and not json_output and temperature is None:
+            return None
+        return self._client().types.GenerationConfig(
+            temperature=temperature,
+            response_mime_type="application/json" if json_output or response_schema is not None else None,
+            response_schema=response_schema,
+        )
+
+    def generate(self, template, prompt: str, **options):
+        return self._model_for(template).generate_content(
+            prompt, generation_config=self._generation_config(**options)
+        )
+
+    async def generate_async(self, template, prompt: str, **options):
+        return await self._model_for(template).generate_content_async(
+            prompt, generation_config=self._generation_config(**options)
+        )
+
+    async def stream(self, template, prompt: str, **options):
+        response = await self._model_for(template).generate_content_async(
+            prompt, generation_config=self._generation_config(**options), stream=True
+        )
+        async for chunk in response:
+            yield chunk
+
+
+def create_provider() -> GeminiProvider:
+    return GeminiProvider(api_key=settings.GEMINI_API_KEY)
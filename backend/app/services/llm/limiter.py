@@ -0,0 +1,165 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Optional
+
+from app.core import deadline, metrics
+
+
+class Overloaded(Exception):
+    """Upstream'in eşzamanlılık sınırı dolu ve bekleme kuyruğunda yer yok (veya sıra gelmedi)."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"AI upstream overloaded ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    """
+    Upstream'e aynı anda giden çağrı sayısını AIMD ile uyarlanan bir sınırda tutar:
+    sınır doluyken tamamlanan her hızlı çağrı sınırı 1/sınır kadar artırır (yaklaşık
+    her tur +1), hata veren veya şablonun olağan süresinin 'tolerance' katından yavaş
+    biten çağrılar sınırı 'backoff' oranında düşürür. Düşüş, aynı aşırı yüke ait
+    sonuçların sınırı art arda ezmemesi için her ortalama çağrı süresinde en fazla bir
+    kez yapılır.
+
+    Sınır doluyken gelen çağrılar istemci başına ayrı kuyruklarda bekler ve boşalan
+    yerler istemciler arasında sırayla (round-robin) dağıtılır; böylece çok istek
+    gönderen bir kullanıcı diğerlerinin önüne geçemez. Toplam veya istemci kuyruğu
+    doluysa ya da bekleme 'queue_timeout'u aşarsa Overloaded fırlatılır.
+    """
+
+    def __init__(self, initial_limit: int, min_limit: int, max_limit: int, max_queue: int,
+                 max_queue_per_client: int, queue_timeout: float, backoff: float):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.max_queue_per_client = max_queue_per_client
+        self.queue_timeout = queue_timeout
+        self.backoff = backoff
+        self.in_flight = 0
+        self.queued = 0
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._avg_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._stats = {"admitted": 0, "queued_total": 0, "rejected": 0, "increases": 0, "decreases": 0}
+        metrics.llm_limiter_limit.set(self.limit)
+
+    def _publish(self):
+        metrics.llm_limiter_in_flight.set(self.in_flight)
+        metrics.llm_limiter_queued.set(self.queued)
+
+    def retry_after(self) -> int:
+        """Kuyruğun erimesi için tahmini süre (saniye, en az 1)."""
+        latency = self._avg_latency or 1.0
+        return max(1, math.ceil(latency * (self.queued / max(self.limit, 1) + 1)))
+
+    def _reject(self, reason: str):
+        self._stats["rejected"] += 1
+        metrics.llm_limiter_rejected.labels(reason).inc()
+        raise Overloaded(reason, self.retry_after())
+
+    def try_acquire(self) -> bool:
+        """
+        Boş yer varsa ve bekleyen yoksa bir yer ayırır; beklemez. Hedge gibi isteğe bağlı
+        ek denemeler içindir: kuyruktakilerin önüne geçmezler.
+        """
+        if self.in_flight >= int(self.limit) or self.queued:
+            return False
+        self.in_flight += 1
+        self._stats["admitted"] += 1
+        self._publish()
+        return True
+
+    async def acquire(self, client: str):
+        """Bir çağrı yeri ayırır; yer yoksa sırasını bekler veya Overloaded fırlatır."""
+        if self.try_acquire():
+            return
+
+        if self.queued >= self.max_queue:
+            self._reject("queue_full")
+        queue = self._queues.get(client)
+        if queue is not None and len(queue) >= self.max_queue_per_client:
+            self._reject("client_queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(client, deque()).append(waiter)
+        self.queued += 1
+        self._stats["queued_total"] += 1
+        self._publish()
+        started = time.perf_counter()
+        try:
+            await deadline.wait(waiter, limit=self.queue_timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Yer tam süre dolarken verildi; kullanılmayacağı için sıradakine devredilir.
+                self.release()
+            else:
+                self._remove(client, waiter)
+            if isinstance(e, asyncio.TimeoutError) and not isinstance(e, deadline.DeadlineExceeded):
+                self._reject("queue_timeout")
+            raise
+        finally:
+            metrics.llm_limiter_queue_wait.observe(time.perf_counter() - started)
+        self._stats["admitted"] += 1
+
+    def _remove(self, client: str, waiter: asyncio.Future):
+        queue = self._queues.get(client)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self.queued -= 1
+            if not queue:
+                del self._queues[client]
+            self._publish()
+
+    def _grant(self):
+        while self._queues and self.in_flight < int(self.limit):
+            client, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            self.queued -= 1
+            if queue:
+                # Sıra bir sonraki istemciye geçer.
+                self._queues.move_to_end(client)
+            else:
+                del self._queues[client]
+            if not waiter.done():
+                waiter.set_result(None)
+                self.in_flight += 1
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False):
+        """
+        Yeri bırakır ve sınırı çağrının sonucuna göre uyarlar. latency None ise (iptal
+        edilen çağrılar, akışlar) sınır değişmez.
+        """
+        self.in_flight -= 1
+        if latency is not None:
+            self._adjust(latency, overloaded)
+        self._grant()
+        self._publish()
+
+    def _adjust(self, latency: float, overloaded: bool):
+        now = time.monotonic()
+        self._avg_latency = latency if self._avg_latency is None else 0.9 * self._avg_latency + 0.1 * latency
+        if overloaded:
+            if now - self._last_decrease >= self._avg_latency:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._stats["decreases"] += 1
+        elif self.in_flight + 1 >= int(self.limit) and self.limit < self.max_limit:
+            # Yalnızca sınır gerçekten kullanılırken büyütülür.
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._stats["increases"] += 1
+        metrics.llm_limiter_limit.set(self.limit)
+
+    def stats(self):
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "queued_clients": len(self._queues),
+            "avg_latency_seconds": round(self._avg_latency, 3) if self._avg_latency is not None else None,
+            **self._stats,
+        }
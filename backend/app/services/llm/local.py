@@ -0,0 +1,135 @@
+import asyncio
+import itertools
+import json
+import re
+import threading
+from typing import List
+
+from app.core.config import settings
+from app.services.llm.base import LLMProvider, LLMResponse, LLMUsage
+
+_GRAMMAR = (
+    ("She ___ an apple every morning.", ["eat", "eats", "ate", "eating"], "eats"),
+    ("There ___ two cats on the roof.", ["is", "are", "am", "be"], "are"),
+    ("I ___ to school yesterday.", ["go", "goes", "went", "going"], "went"),
+    ("He is ___ engineer.", ["a", "an", "the", "some"], "an"),
+    ("The book is ___ the table.", ["in", "on", "at", "to"], "on"),
+    ("They ___ football on Sundays.", ["play", "plays", "played", "playing"], "play"),
+    ("We ___ at home last night.", ["was", "were", "are", "be"], "were"),
+    ("My brother ___ a new car.", ["have", "has", "having", "haves"], "has"),
+)
+_DIALOGUE = (
+    (
+        [("Shopkeeper", "Hello, can I help you?"), ("Customer", "Yes, please. I'd like an apple.")],
+        "What should the shopkeeper say next?",
+        ["Here you are.", "I am a doctor.", "My name is John.", "Thank you."],
+        "Here you are.",
+    ),
+    (
+        [("Anna", "How are you today?"), ("Ben", "I'm fine, thanks. And you?")],
+        "What should Anna say next?",
+        ["I'm good too, thank you.", "It is a table.", "See you yesterday.", "I am ten o'clock."],
+        "I'm good too, thank you.",
+    ),
+    (
+        [("Waiter", "Are you ready to order?"), ("Guest", "Yes, I'd like a coffee, please.")],
+        "What should the waiter say next?",
+        ["Sure, anything else?", "I live in London.", "It's raining.", "Goodbye, teacher."],
+        "Sure, anything else?",
+    ),
+)
+_WORD_MATCHING = (
+    ("Fruits", [("Apple", "Elma"), ("Banana", "Muz"), ("Orange", "Portakal"), ("Grape", "Üzüm")]),
+    ("Colors", [("Red", "Kırmızı"), ("Blue", "Mavi"), ("Green", "Yeşil"), ("Yellow", "Sarı")]),
+    ("Family", [("Mother", "Anne"), ("Father", "Baba"), ("Sister", "Kız kardeş"), ("Brother", "Erkek kardeş")]),
+    ("Animals", [("Dog", "Köpek"), ("Cat", "Kedi"), ("Bird", "Kuş"), ("Horse", "At")]),
+)
+_SCORE_PATTERN = re.compile(r"(?:Nihai Puanı|puan):\s*(\d+)")
+
+
+class LocalProvider(LLMProvider):
+    """
+    Ağ gerektirmeyen deterministik model: sabit bir örnek kümesinden, çağrı sırasına
+    göre dönüşümlü olarak geçerli yanıtlar üretir. Geliştirme ve yük testleri içindir.
+    'vary' açıkken her soruya sıra numarası eklenir, böylece soru bankası her
+    üretimi yeni içerik olarak görür.
+    """
+
+    name = "local"
+    model_name = "local-deterministic"
+
+    def __init__(self, vary: bool = False):
+        self.vary = vary
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    def _next(self) -> int:
+        with self._lock:
+            return next(self._sequence)
+
+    def _suffix(self, number: int) -> str:
+        return f" ({number})" if self.vary else ""
+
+    def _questions(self, exercise_type: str, count: int) -> List[dict]:
+        questions = []
+        for _ in range(count):
+            number = self._next()
+            if exercise_type == "grammar":
+                sentence, word_bank, correct = _GRAMMAR[number % len(_GRAMMAR)]
+                questions.append({
+                    "type": "grammar",
+                    "sentence_template": sentence + self._suffix(number),
+                    "word_bank": list(word_bank),
+                    "correct_word": correct,
+                })
+            elif exercise_type == "dialogue":
+                lines, question, options, correct = _DIALOGUE[number % len(_DIALOGUE)]
+                questions.append({
+                    "type": "dialogue",
+                    "dialogue": [{"speaker": speaker, "line": line} for speaker, line in lines],
+                    "question": question + self._suffix(number),
+                    "options": list(options),
+                    "correct_answer": correct,
+                })
+            else:
+                topic, pairs = _WORD_MATCHING[number % len(_WORD_MATCHING)]
+                words = [word for word, _ in pairs]
+                meanings = [meaning for _, meaning in pairs]
+                questions.append({
+                    "type": "word_matching",
+                    "topic": topic + self._suffix(number),
+                    "words": words,
+                    "meanings": meanings[1:] + meanings[:1],
+                    "correct_pairs": [{"word": word, "meaning": meaning} for word, meaning in pairs],
+                })
+        return questions
+
+    def _text(self, template, prompt: str) -> str:
+        if template.name.startswith("exercise."):
+            exercise_type = template.name.split(".", 1)[1]
+            questions = self._questions(exercise_type, settings.EXERCISE_SESSION_SIZE)
+            return json.dumps({"questions": questions}, ensure_ascii=False)
+        if template.name == "evaluation":
+            match = _SCORE_PATTERN.search(prompt)
+            score = int(match.group(1)) if match else 0
+            feedback = "Harika iş çıkardın!" if score >= 80 else "İyi çaba, pratik yapmaya devam!"
+            return json.dumps({"score": score, "feedback": feedback}, ensure_ascii=False)
+        return "Harika gidiyorsun! En sık zorlandığın konuya birkaç kısa alıştırmayla odaklan."
+
+    def generate(self, template, prompt: str, **options) -> LLMResponse:
+        text = self._text(template, prompt)
+        # Kabaca 4 karakter ~ 1 token.
+        usage = LLMUsage(
+            prompt_token_count=(len(template.system_instruction) + len(prompt)) // 4,
+            candidates_token_count=len(text) // 4,
+        )
+        return LLMResponse(text, usage)
+
+    async def generate_async(self, template, prompt: str, **options) -> LLMResponse:
+        return self.generate(template, prompt, **options)
+
+    async def stream(self, template, prompt: str, **options):
+        response = self.generate(template, prompt, **options)
+        for start in range(0, len(response.text), 64):
+            await asyncio.sleep(0)
+            yield LLMResponse(response.text[start:start + 64], response.usage_metadata)
@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, Type
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+# Gauge değerleri; en kötü durum en büyük değerdir.
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Devre kesici açık: upstream'e gidilmeden hemen başarısız olunur."""
+
+
+class CircuitBreaker:
+    """
+    Son 'window' çağrının hata oranı 'failure_rate'i geçtiğinde (en az 'min_calls'
+    çağrı varken) devreyi açar; açıkken çağrılar upstream'e gitmeden CircuitOpenError
+    ile biter ve çağıran kendi yedeğine düşer. 'cooldown' saniye sonra tek bir deneme
+    çağrısına izin verilir (half-open): başarılıysa devre kapanır, değilse yeniden açılır.
+    Senkron çağrılar threadpool'dan geldiği için durum bir kilit altında tutulur.
+    """
+
+    def __init__(self, window: int, min_calls: int, failure_rate: float, cooldown: float,
+                 on_state_change: Optional[Callable[[str], None]] = None):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+        self.on_state_change = on_state_change
+        self.state = CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.opened = 0
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        self.state = state
+        if state == OPEN:
+            self.opened += 1
+            self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        if self.on_state_change is not None:
+            self.on_state_change(state)
+
+    def _before_call(self) -> bool:
+        """Çağrıya izin verir veya CircuitOpenError fırlatır; çağrı deneme çağrısıysa True döner."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self._transition(HALF_OPEN)
+            if self.state == OPEN or (self.state == HALF_OPEN and self._probe_in_flight):
+                self.rejected += 1
+                raise CircuitOpenError(f"circuit open, retrying upstream in {self.retry_after():.0f}s")
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def _record(self, probe: bool, success: bool):
+        with self._lock:
+            if probe:
+                self._probe_in_flight = False
+                self._transition(CLOSED if success else OPEN)
+                return
+            if self.state != CLOSED:
+                # Devre açılmadan önce başlamış çağrıların sonucu.
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._transition(OPEN)
+
+    def _release(self, probe: bool):
+        if probe:
+            with self._lock:
+                self._probe_in_flight = False
+
+    @contextmanager
+    def guard(self, neutral: Tuple[Type[BaseException], ...] = ()):
+        """
+        Bloğu devre kesiciden geçirir: blok istisnayla biterse hata, normal biterse
+        başarı sayılır. İptal edilen bloklar (istemcinin ayrılması) ve 'neutral'
+        istisnalar (ör. isteğin süresinin dolması) upstream'in durumu hakkında bilgi
+        vermediği için sayılmaz.
+        """
+        probe = self._before_call()
+        try:
+            yield
+        except neutral:
+            self._release(probe)
+            raise
+        except Exception:
+            self._record(probe, success=False)
+            raise
+        except BaseException:
+            self._release(probe)
+            raise
+        self._record(probe, success=True)
+
+    def retry_after(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(self.cooldown - (time.monotonic() - self._opened_at), 0.0)
+
+    def reset(self):
+        with self._lock:
+            self._probe_in_flight = False
+            self._transition(CLOSED)
+            self._outcomes.clear()
+
+    def stats(self):
+        with self._lock:
+            outcomes = list(self._outcomes)
+        return {
+            "state": self.state,
+            "window_calls": len(outcomes),
+            "window_failure_rate": round(outcomes.count(False) / len(outcomes), 4) if outcomes else 0.0,
+            "times_opened": self.opened,
+            "rejected": self.rejected,
+            "retry_after_seconds": round(self.retry_after(), 1),
+        }
+
+
+class LatencyTracker:
+    """Şablon başına son 'window' başarılı çağrının süresini tutar ve yüzdeliklerini verir."""
+
+    def __init__(self, window: int, min_samples: int):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, name: str, latency: float):
+        self._samples.setdefault(name, deque(maxlen=self.window)).append(latency)
+
+    def percentile(self, name: str, fraction: float) -> Optional[float]:
+        """Yeterli örnek yoksa None döner."""
+        samples = self._samples.get(name)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def stats(self, fraction: float):
+        return {
+            name: {"samples": len(samples), "threshold_seconds": self.percentile(name, fraction)}
+            for name, samples in self._samples.items()
+        }
+
+
+PRIMARY = "primary"
+HEDGE = "hedge"
+
+
+async def hedged(
+        attempt: Callable[[], Awaitable[Any]],
+        delay: Optional[float],
+        admit_hedge: Optional[Callable[[], bool]] = None,
+        release_hedge: Optional[Callable[[], None]] = None
+) -> Tuple[Any, Optional[str]]:
+    """
+    attempt'i başlatır; 'delay' saniye içinde bitmezse (veya daha önce hata verirse)
+    ikinci bir deneme başlatır ve hangisi önce başarılı olursa onun sonucunu alır,
+    diğerini iptal eder. Sonucu ve kazanan denemeyi döndürür; ikinci deneme hiç
+    başlatılmadıysa kazanan None'dır. delay None ise tek deneme yapılır. İki deneme de
+    başarısız olursa sonuncunun istisnası fırlatılır.
+
+    İkinci deneme, hatadan sonraki tekrar da dahil, yalnızca admit_hedge izin verirse
+    (ör. hedge bütçesi ve eşzamanlılık sınırında yer varsa) başlar; verilmezse ilk
+    denemenin sonucu beklenir. release_hedge, başlatılan ikinci deneme nasıl biterse
+    bitsin (iptal dahil) bir kez çağrılır.
+    """
+    primary = asyncio.ensure_future(attempt())
+    if delay is None:
+        return await primary, None
+
+    tasks = {primary: PRIMARY}
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if primary in done and primary.exception() is None:
+            return primary.result(), None
+
+        hedge_started = admit_hedge is None or admit_hedge()
+        if hedge_started:
+            hedge = asyncio.ensure_future(attempt())
+            if release_hedge is not None:
+                # Görev başlamadan iptal edilse de çağrılır.
+                hedge.add_done_callback(lambda _: release_hedge())
+            tasks[hedge] = HEDGE
+        error = None
+        while tasks:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                winner = tasks.pop(task)
+                if task.exception() is None:
+                    return task.result(), winner if hedge_started else None
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if task.done() and not task.cancelled():
+                # Kaybeden denemenin hatası kimse tarafından okunmayacak.
+                task.exception()
+            task.cancel()
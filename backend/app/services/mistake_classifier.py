@@ -0,0 +1,115 @@
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+# Kategori -> koç ve değerlendirme prompt'larında kullanılan kısa açıklama
+CATEGORY_LABELS = {
+    "be_agreement": "is/are/am uyumu",
+    "subject_verb_agreement": "özne-yüklem uyumu (do/does, has/have, -s takısı)",
+    "tense": "zaman (tense) kullanımı",
+    "article": "a/an/the kullanımı",
+    "preposition": "edat (in/on/at...) kullanımı",
+    "pronoun": "zamir kullanımı",
+    "word_matching": "kelime eşleştirme (kelime bilgisi)",
+    "dialogue": "diyalogda uygun cevabı seçme",
+    "vocabulary": "kelime seçimi",
+    "other": "diğer",
+}
+
+_BE_PRESENT = {"am", "is", "are", "'m", "'s", "'re"}
+_BE_PAST = {"was", "were"}
+_AGREEMENT_PAIRS = ({"do", "does"}, {"has", "have"}, {"don't", "doesn't"}, {"hasn't", "haven't"})
+_TENSE_MARKERS = {"did", "had", "was", "were", "will", "would", "been", "being", "going"}
+# Sık kullanılan düzensiz fiillerin geçmiş zaman -> yalın hali
+_IRREGULAR_PAST = {
+    "went": "go", "ate": "eat", "saw": "see", "came": "come", "took": "take", "made": "make",
+    "got": "get", "gave": "give", "bought": "buy", "wrote": "write", "ran": "run", "drank": "drink",
+    "spoke": "speak", "began": "begin", "knew": "know", "thought": "think", "found": "find",
+    "told": "tell", "left": "leave", "felt": "feel", "slept": "sleep", "swam": "swim",
+}
+_ARTICLES = {"a", "an", "the"}
+_PREPOSITIONS = {
+    "in", "on", "at", "to", "for", "from", "with", "by", "of", "about",
+    "into", "onto", "under", "over", "between", "behind", "during", "since", "until",
+}
+_PRONOUNS = {
+    "i", "you", "he", "she", "it", "we", "they", "me", "him", "her", "us", "them",
+    "my", "your", "his", "its", "our", "their", "mine", "yours", "hers", "ours", "theirs",
+}
+
+
+def _words(text: Optional[str]):
+    return re.findall(r"[a-z']+", (text or "").lower())
+
+
+def _same_stem(first: str, second: str) -> Optional[str]:
+    """İki kelime aynı fiilin farklı çekimleriyse farkın türünü döndürür."""
+    short, long = sorted((first, second), key=len)
+    if not long.startswith(short[:max(3, len(short) - 1)]):
+        return None
+    suffix = long[len(short):] if long.startswith(short) else long[len(short) - 1:]
+    if suffix in ("s", "es", "ies"):
+        return "subject_verb_agreement"
+    if suffix in ("ed", "d", "ied", "ing"):
+        return "tense"
+    return None
+
+
+def classify(question: Optional[str], user_answer: Optional[str], correct_answer: Optional[str]) -> str:
+    """Bir hatayı, cevapların biçimine bakarak yerel kurallarla bir kategoriye atar."""
+    if (question or "").startswith("Kelime Eşleştirme"):
+        return "word_matching"
+
+    user_words, correct_words = _words(user_answer), _words(correct_answer)
+    if len(user_words) != 1 or len(correct_words) != 1:
+        return "dialogue" if len(correct_words) > 2 else "other"
+
+    user_word, correct_word = user_words[0], correct_words[0]
+    pair = {user_word, correct_word}
+    if pair <= _BE_PRESENT or pair <= _BE_PAST:
+        return "be_agreement"
+    if pair <= _BE_PRESENT | _BE_PAST:
+        return "tense"
+    if any(pair <= agreement for agreement in _AGREEMENT_PAIRS):
+        return "subject_verb_agreement"
+    if pair & _TENSE_MARKERS:
+        return "tense"
+    for word, other in ((user_word, correct_word), (correct_word, user_word)):
+        base = _IRREGULAR_PAST.get(word)
+        if base and other.startswith(base):
+            return "tense"
+    if pair <= _ARTICLES:
+        return "article"
+    if pair <= _PREPOSITIONS:
+        return "preposition"
+    if pair <= _PRONOUNS:
+        return "pronoun"
+    return _same_stem(user_word, correct_word) or "vocabulary"
+
+
+def summarize(
+        counts: Dict[str, int],
+        examples: Optional[Dict[str, Tuple[str, str]]] = None,
+        limit: int = 3
+) -> str:
+    """
+    Kategori sayaçlarını prompt'a konacak birkaç satırlık özete çevirir. Varsa her
+    kategori için tek bir örnek (soru, doğru cevap) eklenir.
+    """
+    examples = examples or {}
+    top = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+    lines = []
+    for category, count in top:
+        line = f"- {CATEGORY_LABELS.get(category, category)}: {count} hata"
+        if category in examples:
+            question, correct_answer = examples[category]
+            line += f" (örn. '{question}' -> '{correct_answer}')"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def count_categories(mistakes: Iterable[Tuple[str, str, str]]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for question, user_answer, correct_answer in mistakes:
+        category = classify(question, user_answer, correct_answer)
+        counts[category] = counts.get(category, 0) + 1
+    return counts
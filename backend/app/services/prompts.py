@@ -0,0 +1,347 @@
+import random
+import threading
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+VERBOSE = "verbose"
+COMPACT = "compact"
+
+
+class PromptTemplate:
+    """
+    Bir prompt'un sabit ve değişken kısımlarını ayırır. Sabit talimatlar modele
+    system instruction olarak verilir ve her çağrıda aynı kalır; her istekte yalnızca
+    kısa 'user_template' str.format ile doldurulup gönderilir.
+    """
+
+    def __init__(self, name: str, variant: str, system_instruction: str, user_template: str):
+        self.name = name
+        self.variant = variant
+        self.system_instruction = system_instruction.strip()
+        self.user_template = user_template.strip()
+
+    def render(self, **values) -> str:
+        return self.user_template.format(**values)
+
+
+class PromptStats:
+    """
+    Şablon ve varyant başına çağrı, geçerlilik, gecikme ve token sayaçları. Token
+    sayıları Gemini yanıtındaki usage_metadata'dan okunur.
+    """
+
+    _FIELDS = ("calls", "errors", "valid", "prompt_tokens", "output_tokens", "cached_tokens", "latency_ms")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def _entry(self, template: PromptTemplate):
+        key = (template.name, template.variant)
+        if key not in self._data:
+            self._data[key] = dict.fromkeys(self._FIELDS, 0)
+        return self._data[key]
+
+    def record(self, template: PromptTemplate, latency: float, usage=None, valid: bool = True):
+        with self._lock:
+            entry = self._entry(template)
+            entry["calls"] += 1
+            entry["valid"] += int(valid)
+            entry["latency_ms"] += latency * 1000
+            if usage is not None:
+                entry["prompt_tokens"] += getattr(usage, "prompt_token_count", 0) or 0
+                entry["output_tokens"] += getattr(usage, "candidates_token_count", 0) or 0
+                entry["cached_tokens"] += getattr(usage, "cached_content_token_count", 0) or 0
+
+    def record_error(self, template: PromptTemplate, latency: float):
+        with self._lock:
+            entry = self._entry(template)
+            entry["calls"] += 1
+            entry["errors"] += 1
+            entry["latency_ms"] += latency * 1000
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for (name, variant), entry in sorted(self._data.items()):
+                calls = entry["calls"] or 1
+                result.setdefault(name, {})[variant] = {
+                    "calls": entry["calls"],
+                    "errors": entry["errors"],
+                    "validity_rate": round(entry["valid"] / calls, 4),
+                    "avg_latency_ms": round(entry["latency_ms"] / calls, 1),
+                    "prompt_tokens": entry["prompt_tokens"],
+                    "output_tokens": entry["output_tokens"],
+                    "cached_tokens": entry["cached_tokens"],
+                    "avg_prompt_tokens": round(entry["prompt_tokens"] / calls, 1),
+                    "avg_output_tokens": round(entry["output_tokens"] / calls, 1),
+                }
+            return result
+
+
+prompt_stats = PromptStats()
+
+_registry: Dict[Tuple[str, str], PromptTemplate] = {}
+
+
+def register(template: PromptTemplate) -> PromptTemplate:
+    _registry[(template.name, template.variant)] = template
+    return template
+
+
+def get(name: str, variant: Optional[str] = None) -> Optional[PromptTemplate]:
+    """
+    Şablonu döndürür. Varyant verilmezse PROMPT_COMPACT_RATIO oranındaki çağrılar
+    kısa (compact) varyanta yönlendirilir; böylece iki varyant canlı trafikte
+    gecikme ve geçerlilik oranı üzerinden karşılaştırılabilir.
+    """
+    if variant is None:
+        variant = choose_variant()
+    return _registry.get((name, variant)) or _registry.get((name, VERBOSE))
+
+
+def choose_variant(sticky_key: Optional[int] = None) -> str:
+    """
+    PROMPT_COMPACT_RATIO oranında kısa varyantı seçer. 'sticky_key' (ör. kullanıcı id'si)
+    verilirse seçim ona göre sabittir; sonucu önbelleğe alınan çağrılarda aynı kullanıcı
+    hep aynı varyantı görür ve iki varyantın yanıtları birbirine karışmaz.
+    """
+    if sticky_key is None:
+        draw = random.random()
+    else:
+        # Knuth'un çarpımsal özeti: ardışık id'leri [0, 1) aralığına düzgün dağıtır.
+        draw = (sticky_key * 2654435761 % 2 ** 32) / 2 ** 32
+    return COMPACT if draw < settings.PROMPT_COMPACT_RATIO else VERBOSE
+
+
+def stats():
+    return prompt_stats.snapshot()
+
+
+# --- Alıştırma üretimi ---
+
+register(PromptTemplate(
+    name="exercise.grammar",
+    variant=VERBOSE,
+    system_instruction="""
+Sen, İngilizce öğreten bir yapay zekasın.
+Görevin, istenen seviye için "cümle tamamlama" formatında gramer soruları oluşturmak.
+Her soru, içinde '___' bulunan bir cümle ve bu boşluğa gelebilecek kelimelerden oluşan bir kelime bankası içermelidir.
+
+KURALLAR:
+1. İstenen sayıda soru nesnesi oluştur.
+2. Her soru için 4 kelimelik bir kelime bankası oluştur (1 doğru, 3 yanlış).
+3. ÇOK ÖNEMLİ: Her bir soru nesnesinin içine, `"type": "grammar"` alanını MUTLAKA ekle. Bu alan zorunludur.
+4. Çıktı olarak SADECE ve SADECE bir JSON objesi döndür. Bu obje, "questions" adında bir anahtar ve soru nesnelerini içeren bir liste barındırmalıdır.
+
+ÖRNEK ÇIKTI FORMATI:
+{
+  "questions": [
+    {
+      "type": "grammar",
+      "sentence_template": "She ___ an apple.",
+      "word_bank": ["eat", "eats", "ate", "eating"],
+      "correct_word": "eats"
+    },
+    {
+      "type": "grammar",
+      "sentence_template": "There ___ two cats on the roof.",
+      "word_bank": ["is", "are", "am", "be"],
+      "correct_word": "are"
+    }
+  ]
+}
+""",
+    user_template="Şimdi {level} seviyesi için {count} soruluk listeyi oluştur.",
+))
+
+register(PromptTemplate(
+    name="exercise.grammar",
+    variant=COMPACT,
+    system_instruction="""
+İngilizce öğretmenisin. Cümle tamamlama gramer soruları üret: '___' içeren bir cümle
+ve 4 kelimelik kelime bankası (1 doğru, 3 yanlış). type her zaman "grammar".
+""",
+    user_template="Seviye {level}, {count} soru.",
+))
+
+register(PromptTemplate(
+    name="exercise.dialogue",
+    variant=VERBOSE,
+    system_instruction="""
+Sen, İngilizce öğreten bir yapay zekasın.
+Görevin, istenen seviye için "diyalog tamamlama" formatında BİRBİRİNDEN FARKLI sorular oluşturmak.
+
+KURALLAR:
+1. Birbirinden bağımsız, istenen sayıda diyalog sorusu oluştur.
+2. Her soru için, iki kişi arasında geçen 2-3 satırlık basit bir diyalog oluştur. Diyalogun son cümlesi eksik olmalı.
+3. Her soru için 4 adet mantıklı seçenek (1 doğru, 3 yanlış) üret.
+4. Çıktı olarak SADECE ve SADECE bir JSON objesi döndür.
+5. ÇOK ÖNEMLİ: "dialogue" alanı, her biri "speaker" ve "line" anahtarlarına sahip SÖZLÜKLERDEN (dictionary/object) oluşan bir LİSTE olmalıdır. BASİT METİN LİSTESİ (list of strings) KESİNLİKLE KULLANMA.
+
+ÖRNEK ÇIKTI FORMATI (BU FORMATA TAM OLARAK UYMALISIN):
+{
+  "questions": [
+    {
+      "type": "dialogue",
+      "dialogue": [
+        {"speaker": "Shopkeeper", "line": "Hello, can I help you?"},
+        {"speaker": "Customer", "line": "Yes, please. I'd like an apple."}
+      ],
+      "question": "What should the shopkeeper say next?",
+      "options": [
+        "Here you are.",
+        "I am a doctor.",
+        "My name is John.",
+        "Thank you."
+      ],
+      "correct_answer": "Here you are."
+    }
+  ]
+}
+""",
+    user_template="Şimdi {level} seviyesi için, kurallara ve formata HARFİYEN uyarak {count} diyalog sorusu içeren listeyi oluştur.",
+))
+
+register(PromptTemplate(
+    name="exercise.dialogue",
+    variant=COMPACT,
+    system_instruction="""
+İngilizce öğretmenisin. Diyalog tamamlama soruları üret: iki kişi arasında 2-3 satırlık
+diyalog, son cümle eksik; 4 seçenek (1 doğru, 3 yanlış). type her zaman "dialogue".
+""",
+    user_template="Seviye {level}, {count} soru.",
+))
+
+register(PromptTemplate(
+    name="exercise.word_matching",
+    variant=VERBOSE,
+    system_instruction="""
+Sen, İngilizce öğreten bir yapay zekasın.
+Görevin, istenen seviye için "kelime eşleştirme" formatında BİRBİRİNDEN FARKLI setler oluşturmak.
+
+KURALLAR:
+1. Her konu için 4 adet basit İngilizce kelime ve Türkçe karşılıklarını bul.
+2. ÇOK ÖNEMLİ: Çıktı olarak, "words" ve "meanings" listelerini BİRBİRİNDEN FARKLI, yani tamamen karışık sıralarda ver.
+3. Ek olarak, "correct_pairs" alanında her İngilizce kelimeyi doğru Türkçe karşılığıyla eşleştir.
+4. Çıktı olarak SADECE ve SADECE bir JSON objesi döndür.
+
+ÖRNEK ÇIKTI FORMATI:
+{
+  "questions": [
+    {
+      "type": "word_matching",
+      "topic": "Fruits",
+      "words": ["Apple", "Banana", "Orange", "Grape"],
+      "meanings": ["Muz", "Portakal", "Elma", "Üzüm"],
+      "correct_pairs": [
+        {"word": "Apple", "meaning": "Elma"},
+        {"word": "Banana", "meaning": "Muz"},
+        {"word": "Orange", "meaning": "Portakal"},
+        {"word": "Grape", "meaning": "Üzüm"}
+      ]
+    }
+  ]
+}
+""",
+    user_template='Şimdi, {level} seviyesinde "correct_pairs" cevap anahtarını da içeren {count} kelime eşleştirme seti oluştur.',
+))
+
+register(PromptTemplate(
+    name="exercise.word_matching",
+    variant=COMPACT,
+    system_instruction="""
+İngilizce öğretmenisin. Kelime eşleştirme setleri üret: bir konu, 4 İngilizce kelime ve
+Türkçe karşılıkları; words ve meanings farklı sırada, correct_pairs doğru eşleşmeler.
+type her zaman "word_matching".
+""",
+    user_template="Seviye {level}, {count} set.",
+))
+
+# --- Değerlendirme yorumu ---
+
+register(PromptTemplate(
+    name="evaluation",
+    variant=VERBOSE,
+    system_instruction="""
+Sen, Perpetua adlı bir dil öğrenme uygulamasında kişisel bir AI öğretmensin.
+Öğrenci az önce bir alıştırmayı tamamladı; sana adı ve performansı verilecek.
+
+GÖREVİN:
+Bu performansa göre, öğrenciye ismiyle hitap ederek, pozitif ve cesaretlendirici bir dille, 1-2 cümlelik kişisel bir yorum yaz.
+- Eğer puanı yüksekse (örn: 80 üzeri), hızını ve doğruluğunu öv.
+- Eğer puanı ortalamaysa, iyi çabasını takdir et ve hangi konularda zorlandığını nazikçe belirt.
+- Eğer puanı düşükse, bunun öğrenmenin bir parçası olduğunu vurgula ve moralini yüksek tutması için cesaretlendir.
+- En çok hata yaptığı kategoriye (eğer varsa) odaklanarak, verilen örnekte neyin yanlış olduğunu kısaca açıkla.
+
+Çıktı olarak SADECE ve SADECE aşağıdaki formatta bir JSON objesi döndür. Puanı TEKRAR HESAPLAMA, sana verilen Nihai Puanı aynen kullan:
+{
+  "score": <Nihai Puan>,
+  "feedback": "<öğrenciye özel olarak yazdığın yorum>"
+}
+""",
+    user_template="""
+Öğrencinin adı: {username}
+- Nihai Puanı: {final_score}
+- Toplam Hamle Sayısı: {total_questions}
+- Doğru Hamle Sayısı: {correct_answers}
+- Hata kategorileri:
+{mistakes_summary}
+""",
+))
+
+register(PromptTemplate(
+    name="evaluation",
+    variant=COMPACT,
+    system_instruction="""
+Dil öğrenme uygulaması Perpetua'da öğretmensin. Öğrenciye ismiyle, pozitif ve 1-2 cümlelik
+kişisel bir yorum yaz; varsa en sık hata kategorisindeki örneği kısaca açıkla.
+JSON döndür: {"score": <verilen puan, yeniden hesaplama>, "feedback": "<yorum>"}
+""",
+    user_template="""
+Ad: {username}; puan: {final_score}; doğru: {correct_answers}/{total_questions}
+Hatalar:
+{mistakes_summary}
+""",
+))
+
+# --- Koç tavsiyesi ---
+
+register(PromptTemplate(
+    name="feedback",
+    variant=VERBOSE,
+    system_instruction="""
+Sen, Perpetua adlı bir dil öğrenme uygulamasında kişisel ve pozitif bir AI koçusun.
+Sana öğrencinin adı, en sık hata yaptığı konular ve her biri için bir örnek verilecek.
+
+GÖREVİN:
+Bu konulara genel olarak bakarak, öğrenciye yönelik 1-2 cümlelik, kısa, samimi ve motive edici bir tavsiye yaz.
+- Belirli bir gramer kuralında mı zorlanıyor? (örn: 'is/are' kullanımı)
+- Yoksa kelime eşleştirmede mi zorlanıyor?
+- Genel bir tavsiye ver. Örneğin: "Merhaba Ayşe, 'is' ve 'are' kullanımında biraz zorlandığını fark ettim. Unutma, tekil öznelerle 'is', çoğul öznelerle 'are' kullanırız. Pratik yapmaya devam, çok iyi gidiyorsun!"
+- Asla yargılayıcı veya negatif olma. Her zaman cesaretlendirici ol.
+
+Sadece tavsiye metnini döndür, başka hiçbir şey ekleme.
+""",
+    user_template="""
+Öğrencinin adı: {username}
+En sık hata yaptığı konular:
+{mistakes_summary}
+""",
+))
+
+register(PromptTemplate(
+    name="feedback",
+    variant=COMPACT,
+    system_instruction="""
+Dil öğrenme uygulaması Perpetua'da pozitif bir koçsun. Öğrencinin en sık hata yaptığı
+konulara bakarak ismiyle hitap eden, 1-2 cümlelik cesaretlendirici bir tavsiye yaz.
+Sadece metni döndür.
+""",
+    user_template="""
+Ad: {username}
+Konular:
+{mistakes_summary}
+""",
+))
@@ -0,0 +1,79 @@
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.config import settings
+from app.crud import crud_question_bank
+from app.schemas import exercise as exercise_schema
+
+# Oturumların bankadan mı yoksa yeni üretimle mi karşılandığının sayaçları.
+bank_stats = {"hits": 0, "misses": 0, "stored_questions": 0, "fallback_sessions": 0}
+
+
+async def take_session(
+        db: AsyncSession,
+        user_id: int,
+        exercise_type: str,
+        level: str
+) -> Optional[exercise_schema.ValidatedSession]:
+    """
+    Kullanıcının görmediği sorulardan bir oturum oluşturur; banka tükendiyse None döner.
+    Bankadaki sorular yazılmadan önce doğrulandığı için yeniden doğrulanmaz.
+    """
+    payloads = await crud_question_bank.take_unseen_questions(
+        db,
+        user_id=user_id,
+        exercise_type=exercise_type,
+        level=level,
+        limit=settings.EXERCISE_SESSION_SIZE
+    )
+    if payloads is None:
+        bank_stats["misses"] += 1
+        return None
+    bank_stats["hits"] += 1
+    return exercise_schema.ValidatedSession(exercise_type, payloads)
+
+
+async def take_fallback_session(
+        db: AsyncSession,
+        exercise_type: str,
+        level: str
+) -> Optional[exercise_schema.ValidatedSession]:
+    """
+    AI'a ulaşılamadığında bankadaki en yeni sorulardan, kullanıcı görmüş olsa bile,
+    bir oturum oluşturur. Görüldü işareti değişmez.
+    """
+    payloads = await crud_question_bank.get_latest_questions(
+        db,
+        exercise_type=exercise_type,
+        level=level,
+        limit=settings.EXERCISE_SESSION_SIZE
+    )
+    if payloads is None:
+        return None
+    bank_stats["fallback_sessions"] += 1
+    metrics.count_fallback("question_bank")
+    return exercise_schema.ValidatedSession(exercise_type, payloads)
+
+
+async def store_session_questions(
+        db: AsyncSession,
+        user_id: int,
+        exercise_type: str,
+        level: str,
+        questions: List[dict]
+):
+    """Yeni üretilip kullanıcıya sunulan (doğrulanmış) soruları bankaya ekler ve görüldü sayar."""
+    stored_ids = await crud_question_bank.store_generated_questions(
+        db,
+        user_id=user_id,
+        exercise_type=exercise_type,
+        level=level,
+        questions=questions
+    )
+    bank_stats["stored_questions"] += len(stored_ids)
+
+
+def stats():
+    return bank_stats
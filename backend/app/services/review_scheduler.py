@@ -0,0 +1,160 @@
+"""
+Kullanıcının kendi hatalarından, AI çağrısı olmadan kurulan tekrar ('review')
+alıştırmaları. Takvim Leitner kutularıyla tutulur: doğru cevaplanan hata bir üst
+kutuya geçer ve kutunun aralığı kadar sonra yeniden sorulur, yanlış cevaplanan en
+baştan başlar. Son kutuyu da geçen hata öğrenilmiş sayılır ve artık sorulmaz.
+
+Sorular gramer sorusu biçimindedir; kelime bankası doğru cevap, kullanıcının o soruda
+verdiği cevap ve diğer hatalarındaki yanlış cevaplarından oluşur.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud import crud_user
+from app.schemas import exercise as exercise_schema
+
+EXERCISE_TYPE = "review"
+# Yalnızca boşluklu cümleler gramer sorusu olarak yeniden sorulabilir.
+BLANK = "___"
+# Kutu k'daki (k >= 1) hatanın bir sonraki tekrarına kadar geçen süre: INTERVALS[k - 1].
+INTERVALS = (
+    timedelta(days=1),
+    timedelta(days=3),
+    timedelta(days=7),
+    timedelta(days=16),
+    timedelta(days=35),
+)
+MASTERED_BOX = len(INTERVALS) + 1
+WORD_BANK_SIZE = 4
+
+review_stats = {"sessions": 0, "empty": 0, "questions": 0, "correct": 0, "lapses": 0, "mastered": 0}
+
+
+def _aware(moment: Optional[datetime]) -> Optional[datetime]:
+    # SQLite saat dilimini saklamaz; yazılan değerler UTC'dir.
+    if moment is not None and moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def is_due(mistake, now: datetime) -> bool:
+    if mistake.review_box >= MASTERED_BOX:
+        return False
+    due_at = _aware(mistake.review_due_at)
+    return due_at is None or due_at <= now
+
+
+def next_review(box: int, correct: bool, now: datetime):
+    """Bir tekrarın sonucuna göre yeni (kutu, sonraki tekrar zamanı)."""
+    if not correct:
+        return 0, None
+    box += 1
+    if box >= MASTERED_BOX:
+        return MASTERED_BOX, None
+    return box, now + INTERVALS[box - 1]
+
+
+def _word_bank(mistake, mistakes: Sequence, rng: random.Random) -> List[str]:
+    correct = mistake.correct_answer.strip()
+    options = [correct]
+
+    def add(candidate: Optional[str]):
+        candidate = (candidate or "").strip()
+        if candidate and candidate.lower() not in (option.lower() for option in options):
+            options.append(candidate)
+
+    add(mistake.user_answer)
+    # Önce aynı kategorideki yanlış cevaplar (ör. is/are karışıklığı), sonra diğerleri.
+    same_category = [other for other in mistakes if other.category == mistake.category and other is not mistake]
+    others = [other for other in mistakes if other.category != mistake.category]
+    for pool in (same_category, others):
+        answers = [other.user_answer for other in pool]
+        rng.shuffle(answers)
+        for answer in answers:
+            if len(options) >= WORD_BANK_SIZE:
+                break
+            add(answer)
+    rng.shuffle(options)
+    return options
+
+
+def build_questions(mistakes: Sequence, now: datetime, limit: int, rng: Optional[random.Random] = None):
+    """
+    Vadesi gelmiş hatalardan en fazla 'limit' soru kurar; en uzun süredir bekleyenler
+    önce gelir, aynı cümle bir kez sorulur. (sorular, hata id'leri) döndürür.
+    """
+    rng = rng or random.Random()
+    epoch = datetime.min.replace(tzinfo=timezone.utc)
+    due = sorted(
+        (mistake for mistake in mistakes if is_due(mistake, now)),
+        key=lambda mistake: (_aware(mistake.review_due_at) or epoch, mistake.id),
+    )
+    questions, review_ids, seen = [], [], set()
+    for mistake in due:
+        if len(questions) >= limit:
+            break
+        key = mistake.question_text.strip().lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        word_bank = _word_bank(mistake, mistakes, rng)
+        if len(word_bank) < 2:
+            continue
+        questions.append({
+            "type": "grammar",
+            "sentence_template": mistake.question_text,
+            "word_bank": word_bank,
+            "correct_word": mistake.correct_answer.strip(),
+        })
+        review_ids.append(mistake.id)
+    return questions, review_ids
+
+
+async def take_session(db: AsyncSession, user_id: int) -> Optional[exercise_schema.ValidatedSession]:
+    """Vadesi gelmiş hatalardan bir tekrar oturumu; tekrar edilecek hata yoksa None."""
+    mistakes = await crud_user.get_reviewable_mistakes(db, user_id=user_id, blank=BLANK)
+    questions, review_ids = build_questions(
+        mistakes, datetime.now(timezone.utc), settings.EXERCISE_SESSION_SIZE
+    )
+    if not questions:
+        review_stats["empty"] += 1
+        return None
+    review_stats["sessions"] += 1
+    review_stats["questions"] += len(questions)
+    return exercise_schema.ValidatedSession(EXERCISE_TYPE, questions, review_ids=review_ids)
+
+
+async def grade(db: AsyncSession, user_id: int, review_ids: Sequence[int], wrong_answers: Sequence) -> List[str]:
+    """
+    Bir tekrar oturumunun sonucunu takvime yazar (commit etmez; değerlendirmeyle aynı
+    transaction'da kaydedilir). Oturumdaki hatalardan yanlış cevaplananlar baştan
+    başlar, diğerleri bir üst kutuya geçer. Zaten kayıtlı olduğu için yeni hata olarak
+    eklenmemesi gereken soru metinlerini döndürür.
+    """
+    if not review_ids:
+        return []
+    mistakes = await crud_user.get_mistakes_by_ids(db, user_id=user_id, mistake_ids=review_ids)
+    wrong = {answer.question.strip().lower() for answer in wrong_answers}
+    now = datetime.now(timezone.utc)
+    updates, repeated = [], []
+    for mistake in mistakes:
+        correct = mistake.question_text.strip().lower() not in wrong
+        box, due_at = next_review(mistake.review_box, correct, now)
+        updates.append({"id": mistake.id, "review_box": box, "review_due_at": due_at})
+        if correct:
+            review_stats["correct"] += 1
+            if box >= MASTERED_BOX:
+                review_stats["mastered"] += 1
+        else:
+            review_stats["lapses"] += 1
+            repeated.append(mistake.question_text)
+    await crud_user.update_review_schedule(db, updates)
+    return repeated
+
+
+def stats():
+    return dict(review_stats)
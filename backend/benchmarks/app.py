@@ -0,0 +1,20 @@
+"""
+Benchmark sunucusu: uygulamayı, Gemini yerine FakeGemini ile çalıştırır.
+Sahte modelin ayarları ortam değişkenlerinden okunur; uvicorn'un her worker'ı
+bu modülü ayrı ayrı import ettiği için ayarlar tüm worker'lara uygulanır.
+
+    uvicorn benchmarks.app:app
+"""
+import os
+
+from app.main import app
+from benchmarks.fake_gemini import FakeGemini, install
+
+fake_gemini = install(FakeGemini(
+    latency_ms=float(os.environ.get("BENCH_LLM_LATENCY_MS", "800")),
+    latency_sigma=float(os.environ.get("BENCH_LLM_LATENCY_SIGMA", "0.5")),
+    failure_rate=float(os.environ.get("BENCH_LLM_FAILURE_RATE", "0")),
+    seed=int(os.environ.get("BENCH_SEED", "0")),
+))
+
+__all__ = ["app", "fake_gemini"]
@@ -0,0 +1,69 @@
+import asyncio
+import math
+import random
+import threading
+import time
+
+from app.services import llm
+from app.services.llm.local import LocalProvider
+
+
+class FakeGemini(llm.LLMProvider):
+    """
+    Gemini'nin yerine geçen sağlayıcı: yanıtları LocalProvider üretir, gecikme ise
+    medyanı latency_ms olan log-normal dağılımdan çekilir (sigma=0 sabit gecikme
+    demektir); failure_rate oranındaki çağrılar istisna fırlatır. Aynı seed ile aynı
+    gecikme ve hata dizisi üretilir.
+    """
+
+    name = "fake-gemini"
+    model_name = "fake-gemini"
+
+    def __init__(self, latency_ms: float = 800, latency_sigma: float = 0.5, failure_rate: float = 0.0,
+                 seed: int = 0):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self._local = LocalProvider(vary=True)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def _next_call(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency_ms / 1000
+            if self.latency_sigma > 0:
+                delay = self._random.lognormvariate(math.log(delay), self.latency_sigma)
+            failed = self._random.random() < self.failure_rate
+            if failed:
+                self.failures += 1
+            return delay, failed
+
+    def generate(self, template, prompt: str, **options):
+        delay, failed = self._next_call()
+        time.sleep(delay)
+        if failed:
+            raise RuntimeError("fake Gemini failure")
+        return self._local.generate(template, prompt, **options)
+
+    async def generate_async(self, template, prompt: str, **options):
+        delay, failed = self._next_call()
+        await asyncio.sleep(delay)
+        if failed:
+            raise RuntimeError("fake Gemini failure")
+        return self._local.generate(template, prompt, **options)
+
+    async def stream(self, template, prompt: str, **options):
+        delay, failed = self._next_call()
+        await asyncio.sleep(delay)
+        if failed:
+            raise RuntimeError("fake Gemini failure")
+        async for chunk in self._local.stream(template, prompt, **options):
+            yield chunk
+
+
+def install(fake: FakeGemini) -> FakeGemini:
+    """Uygulamanın tüm AI çağrılarını sahte sağlayıcıya yönlendirir."""
+    return llm.set_provider(fake)
@@ -0,0 +1,121 @@
+import json
+import math
+from typing import Dict, List, Tuple
+
+from prometheus_client.parser import text_string_to_metric_families
+
+# Karşılaştırmada "kötüleşme" sayılan yön: gecikmeler için artış, throughput için düşüş.
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Sıralı listede en yakın sıra (nearest-rank) yöntemiyle yüzdelik."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples: List[Tuple[str, float, int]], elapsed: float) -> Dict[str, dict]:
+    """(işlem, süre saniye, durum kodu) örneklerini işlem bazında özetler."""
+    by_operation: Dict[str, List[Tuple[float, int]]] = {}
+    for operation, latency, status_code in samples:
+        by_operation.setdefault(operation, []).append((latency, status_code))
+    by_operation["all"] = [(latency, status_code) for _, latency, status_code in samples]
+
+    summary = {}
+    for operation, values in sorted(by_operation.items()):
+        latencies = sorted(latency * 1000 for latency, _ in values)
+        errors = sum(1 for _, status_code in values if status_code >= 500 or status_code == 0)
+        summary[operation] = {
+            "requests": len(values),
+            "errors": errors,
+            "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        }
+    return summary
+
+
+def scrape_db_queries(metrics_text: str) -> Dict[str, Tuple[float, float]]:
+    """/metrics çıktısından rota başına (istek sayısı, toplam sorgu) değerlerini okur."""
+    totals: Dict[str, List[float]] = {}
+    for family in text_string_to_metric_families(metrics_text):
+        if family.name != "db_queries_per_request":
+            continue
+        for sample in family.samples:
+            route = sample.labels.get("route")
+            if sample.name.endswith("_count"):
+                totals.setdefault(route, [0.0, 0.0])[0] += sample.value
+            elif sample.name.endswith("_sum"):
+                totals.setdefault(route, [0.0, 0.0])[1] += sample.value
+    return {route: (count, total) for route, (count, total) in totals.items()}
+
+
+def db_queries_per_request(before: Dict[str, Tuple[float, float]], after: Dict[str, Tuple[float, float]]):
+    """Yük aşaması boyunca (iki ölçüm arasındaki fark) rota başına ortalama sorgu sayısı."""
+    result = {}
+    for route, (count, total) in sorted(after.items()):
+        if route == "/metrics":
+            continue
+        previous_count, previous_total = before.get(route, (0.0, 0.0))
+        requests = count - previous_count
+        if requests > 0:
+            result[route] = round((total - previous_total) / requests, 2)
+    return result
+
+
+def print_report(result: dict):
+    print(f"\nmix={result['meta']['mix']} database={result['meta']['database']} "
+          f"elapsed={result['meta']['elapsed_seconds']}s")
+    print(f"{'operation':<12}{'requests':>10}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for operation, stats in result["operations"].items():
+        print(f"{operation:<12}{stats['requests']:>10}{stats['errors']:>8}{stats['throughput_rps']:>9}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+    if result["db_queries_per_request"]:
+        print("\nDB queries per request:")
+        for route, queries in result["db_queries_per_request"].items():
+            print(f"  {route:<55}{queries:>8}")
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """
+    İki çalıştırmayı karşılaştırır ve eşik oranından fazla kötüleşen ölçümleri döndürür:
+    gecikme yüzdelikleri ve sorgu sayıları için artış, throughput için düşüş.
+    """
+    regressions = []
+    for operation, stats in current["operations"].items():
+        base = baseline["operations"].get(operation)
+        if base is None:
+            continue
+        for key in LATENCY_KEYS:
+            if base[key] > 0 and stats[key] > base[key] * (1 + threshold):
+                regressions.append(f"{operation} {key}: {base[key]} -> {stats[key]}")
+        if base["throughput_rps"] > 0 and stats["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{operation} throughput_rps: {base['throughput_rps']} -> {stats['throughput_rps']}"
+            )
+        if stats["errors"] > base["errors"]:
+            regressions.append(f"{operation} errors: {base['errors']} -> {stats['errors']}")
+    for route, queries in current["db_queries_per_request"].items():
+        base_queries = baseline["db_queries_per_request"].get(route)
+        if base_queries is not None and queries > base_queries * (1 + threshold):
+            regressions.append(f"{route} db queries/request: {base_queries} -> {queries}")
+    return regressions
+
+
+def mismatched_settings(baseline: dict, current: dict) -> List[str]:
+    """Karşılaştırmayı anlamsız kılabilecek farklı çalıştırma ayarları."""
+    ignored = ("elapsed_seconds",)
+    return [
+        f"{key}: {baseline['meta'].get(key)} != {value}"
+        for key, value in current["meta"].items()
+        if key not in ignored and baseline["meta"].get(key) != value
+    ]
+
+
+def load(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
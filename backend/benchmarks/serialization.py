@@ -0,0 +1,150 @@
+"""
+Yanıt serileştirme mikro benchmark'ı: sıcak uçların istek başına harcadığı CPU
+süresini önceki yol (response_model ile doğrulama + Pydantic serileştirmesi) ile
+şimdiki yol (bir kez doğrulanmış sözlükler + orjson, önbellekteki baytlar) arasında
+karşılaştırır. Ağ ve veritabanı yoktur; yalnızca uygulama kodu ölçülür.
+
+    python -m benchmarks.serialization --seconds 1
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///benchmark.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.core.cache import TTLCache
+from app.core.responses import ORJSONResponse
+from app.schemas import exercise as exercise_schema
+from app.schemas import user as user_schema
+from app.services import exercise_parser, prompts
+from app.services import leaderboard_cache
+from app.services.llm.local import LocalProvider
+
+_question_adapter = TypeAdapter(exercise_schema.AnyQuestion)
+_session_adapter = TypeAdapter(exercise_schema.ExerciseSession)
+_leaderboard_adapter = TypeAdapter(List[user_schema.User])
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Perpetua serialization microbenchmark")
+    parser.add_argument("--seconds", type=float, default=1.0, help="her yolun ölçüleceği CPU süresi")
+    parser.add_argument("--exercise-type", choices=("grammar", "dialogue", "word_matching"), default="dialogue")
+    return parser.parse_args(argv)
+
+
+def _cpu_per_call(function, seconds: float) -> float:
+    """Bir çağrının, en az 'seconds' CPU süresi boyunca ölçülen ortalama süresi (mikrosaniye)."""
+    function()
+    calls = 0
+    started = time.process_time()
+    while True:
+        for _ in range(100):
+            function()
+        calls += 100
+        elapsed = time.process_time() - started
+        if elapsed >= seconds:
+            return elapsed / calls * 1e6
+
+
+def _ai_text(exercise_type: str) -> str:
+    template = prompts.get(f"exercise.{exercise_type}")
+    return LocalProvider().generate(template, "").text
+
+
+def _leaderboard_rows(count: int = 100):
+    return [
+        SimpleNamespace(id=index, email=f"user{index}@example.com", username=f"user{index}",
+                        weekly_score=10_000 - index, current_level="B1")
+        for index in range(count)
+    ]
+
+
+def _response_model_path(session):
+    # FastAPI'nin response_model yolu: dönen değeri doğrular, sonra JSON'a yazar.
+    return _session_adapter.dump_json(_session_adapter.validate_python(session))
+
+
+def cases(exercise_type: str):
+    text = _ai_text(exercise_type)
+    raw_questions = json.loads(text)["questions"]
+    bank_payloads = [exercise_parser.validate_question(raw, exercise_type) for raw in raw_questions]
+    rows = _leaderboard_rows()
+    key = (0, 100, None)
+    # Uygulamadaki sayfa önbelleğiyle aynı yapı; ölçüm sırasında TTL dolmasın diye ayrı bir örnek.
+    page_cache = TTLCache(maxsize=1, ttl=3600)
+    cached = leaderboard_cache.CachedPage(leaderboard_cache.serialize(rows), None)
+    page_cache.set(key, cached)
+    event = {"event": "question", "index": 0, "question": bank_payloads[0]}
+
+    def ai_before():
+        # Önceki parser soruları model nesnesi olarak döndürüyordu.
+        questions = [
+            _question_adapter.validate_python(exercise_parser.repair_question(raw, exercise_type))
+            for raw in raw_questions
+        ]
+        session = exercise_schema.ExerciseSession(exercise_type=exercise_type, questions=questions)
+        return _response_model_path(session)
+
+    def ai_after():
+        questions = [exercise_parser.validate_question(raw, exercise_type) for raw in raw_questions]
+        session = exercise_schema.ValidatedSession(exercise_type, questions)
+        return ORJSONResponse(session.to_dict()).body
+
+    def bank_before():
+        session = exercise_schema.ExerciseSession(exercise_type=exercise_type, questions=bank_payloads)
+        return _response_model_path(session)
+
+    def bank_after():
+        return ORJSONResponse(exercise_schema.ValidatedSession(exercise_type, bank_payloads).to_dict()).body
+
+    def leaderboard_before():
+        return _leaderboard_adapter.dump_json(_leaderboard_adapter.validate_python(rows, from_attributes=True))
+
+    def leaderboard_miss():
+        return ORJSONResponse(leaderboard_cache.CachedPage(leaderboard_cache.serialize(rows), None).body).body
+
+    def leaderboard_hit():
+        page = page_cache.get(key)
+        return ORJSONResponse(page.body, headers={"ETag": page.etag}).body
+
+    def leaderboard_not_modified():
+        return page_cache.get(key).etag == cached.etag
+
+    def ndjson_before():
+        return json.dumps(event, ensure_ascii=False) + "\n"
+
+    def ndjson_after():
+        return orjson.dumps(event) + b"\n"
+
+    return [
+        ("exercise (AI, parse + respond)", ai_before, ai_after),
+        ("exercise (question bank)", bank_before, bank_after),
+        ("leaderboard 100 rows (cache miss)", leaderboard_before, leaderboard_miss),
+        ("leaderboard 100 rows (cache hit)", leaderboard_before, leaderboard_hit),
+        ("leaderboard 100 rows (304)", leaderboard_before, leaderboard_not_modified),
+        ("stream event", ndjson_before, ndjson_after),
+    ]
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    print(f"{'path':<36}{'before us':>12}{'after us':>12}{'saved':>9}")
+    for name, before, after in cases(args.exercise_type):
+        before_us = _cpu_per_call(before, args.seconds)
+        after_us = _cpu_per_call(after, args.seconds)
+        saved = 1 - after_us / before_us if before_us else 0.0
+        print(f"{name:<36}{before_us:>12.1f}{after_us:>12.1f}{saved:>8.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Başlangıç süresi ölçümü: uygulama modülünün import süresi, tek worker'lı soğuk
+başlangıç (süreç başlatılmasından ilk 200 yanıtına kadar) ve gunicorn altında
+öldürülen bir worker'ın yerine gelenin istek kabul etmeye başlama süresi.
+
+    python -m benchmarks.startup --repeat 5 --output startup.json
+
+Gemini sağlayıcısı sahte bir anahtarla kullanılır; ölçüm sırasında AI çağrısı
+yapılmaz, havuz ısıtma kapatılır.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+from benchmarks.run import BACKEND_DIR, _migrate
+
+BOOTING = re.compile(r"Booting worker with pid: (\d+)")
+STARTUP_COMPLETE = re.compile(r"\[(\d+)\].*Application startup complete")
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Perpetua startup benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="her ölçümün tekrar sayısı")
+    parser.add_argument("--workers", type=int, default=4, help="yeniden başlatma ölçümündeki gunicorn worker sayısı")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", help="sonuçların yazılacağı JSON dosyası")
+    return parser.parse_args(argv)
+
+
+def _env(database_url: str, metrics_dir: str):
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": database_url,
+        "SECRET_KEY": env.get("SECRET_KEY", "benchmark-secret"),
+        "GEMINI_API_KEY": env.get("GEMINI_API_KEY", "benchmark"),
+        "EXERCISE_POOL_WARM_ON_STARTUP": "false",
+        "PROMETHEUS_MULTIPROC_DIR": metrics_dir,
+    })
+    return env
+
+
+def _measure_import(env) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app.main"], cwd=BACKEND_DIR, env=env, check=True)
+    return time.perf_counter() - started
+
+
+def _wait_for_root(port: int, server, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError("server did not become ready")
+
+
+def _measure_cold_start(env, port: int) -> float:
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        _wait_for_root(port, server)
+        return time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+class _GunicornLog:
+    """gunicorn'un stderr'ini okur; worker'ların açılış ve hazır olma anlarını kaydeder."""
+
+    def __init__(self, stream):
+        self.booted = {}
+        self.ready = {}
+        self._changed = threading.Condition()
+        self._thread = threading.Thread(target=self._read, args=(stream,), daemon=True)
+        self._thread.start()
+
+    def _read(self, stream):
+        for line in stream:
+            now = time.perf_counter()
+            with self._changed:
+                booting = BOOTING.search(line)
+                if booting:
+                    self.booted[int(booting.group(1))] = now
+                complete = STARTUP_COMPLETE.search(line)
+                if complete:
+                    self.ready[int(complete.group(1))] = now
+                self._changed.notify_all()
+
+    def wait_for(self, predicate, timeout: float = 60):
+        with self._changed:
+            if not self._changed.wait_for(predicate, timeout):
+                raise RuntimeError("gunicorn workers did not become ready")
+
+
+def _measure_respawns(env, port: int, workers: int, repeat: int):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-k", "uvicorn.workers.UvicornWorker",
+         "-w", str(workers), "-b", f"127.0.0.1:{port}", "--log-level", "info", "app.main:app"],
+        cwd=BACKEND_DIR, env=env, stderr=subprocess.PIPE, text=True,
+    )
+    log = _GunicornLog(server.stderr)
+    try:
+        log.wait_for(lambda: len(log.ready) >= workers)
+        samples = []
+        for _ in range(repeat):
+            victim = max(log.ready)
+            known = set(log.booted)
+            killed_at = time.perf_counter()
+            os.kill(victim, signal.SIGKILL)
+            log.wait_for(lambda: any(pid not in known and pid in log.ready for pid in log.booted))
+            replacement = next(pid for pid in log.booted if pid not in known)
+            samples.append(log.ready[replacement] - killed_at)
+            del log.ready[victim]
+        return samples
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def _summary(samples):
+    return {
+        "runs": len(samples),
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    work_dir = tempfile.mkdtemp(prefix="perpetua-startup-")
+    metrics_dir = os.path.join(work_dir, "metrics")
+    os.mkdir(metrics_dir)
+    env = _env(f"sqlite:///{work_dir}/startup.db", metrics_dir)
+    try:
+        _migrate(env)
+        result = {
+            "import": _summary([_measure_import(env) for _ in range(args.repeat)]),
+            "cold_start": _summary([_measure_cold_start(env, args.port) for _ in range(args.repeat)]),
+            "worker_respawn": _summary(_measure_respawns(env, args.port, args.workers, args.repeat)),
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{'phase':<16}{'runs':>6}{'median ms':>12}{'max ms':>10}")
+    for phase, summary in result.items():
+        print(f"{phase:<16}{summary['runs']:>6}{summary['median_ms']:>12}{summary['max_ms']:>10}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import random
+from typing import Dict
+
+import httpx
+
+EXERCISE_TYPES = ("grammar", "dialogue", "word_matching")
+
+# Karışım adı -> işlem ağırlıkları. Her sanal kullanıcı bir sonraki işlemini bu
+# ağırlıklarla seçer.
+MIXES: Dict[str, Dict[str, int]] = {
+    "mixed": {"exercise": 30, "evaluate": 25, "leaderboard": 25, "feedback": 15, "login": 5},
+    "practice": {"exercise": 50, "evaluate": 45, "feedback": 5},
+    "read_heavy": {"leaderboard": 60, "feedback": 30, "exercise": 10},
+    "auth": {"login": 80, "leaderboard": 20},
+}
+
+WRONG_ANSWERS = (
+    {"question": "There ___ two cats on the roof.", "user_answer": "is", "correct_answer": "are"},
+    {"question": "She ___ an apple.", "user_answer": "eat", "correct_answer": "eats"},
+    {"question": "I ___ to school yesterday.", "user_answer": "go", "correct_answer": "went"},
+    {"question": "He is ___ engineer.", "user_answer": "a", "correct_answer": "an"},
+    {"question": "The book is ___ the table.", "user_answer": "in", "correct_answer": "on"},
+)
+
+
+class VirtualUser:
+    """Bir kullanıcı hesabı ve o hesapla yapılabilecek API işlemleri."""
+
+    def __init__(self, client: httpx.AsyncClient, index: int, run_id: str, rng: random.Random):
+        self.client = client
+        self.email = f"bench-{run_id}-{index}@example.com"
+        self.username = f"bench-{run_id}-{index}"
+        self.password = "benchmark-password"
+        self.rng = rng
+        self.headers = {}
+
+    async def register(self):
+        return await self.client.post("/api/v1/auth/register", json={
+            "email": self.email, "username": self.username, "password": self.password,
+        })
+
+    async def login(self):
+        response = await self.client.post("/api/v1/auth/login", data={
+            "username": self.email, "password": self.password,
+        })
+        if response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return response
+
+    async def exercise(self):
+        return await self.client.get(
+            "/api/v1/exercise/",
+            params={"exercise_type": self.rng.choice(EXERCISE_TYPES)},
+            headers=self.headers,
+        )
+
+    async def evaluate(self):
+        total = 5
+        wrong = self.rng.sample(WRONG_ANSWERS, self.rng.randint(0, 3))
+        correct = total - len(wrong)
+        return await self.client.post("/api/v1/exercise/evaluate", headers=self.headers, json={
+            "total_questions": total,
+            "correct_answers": correct,
+            "final_score": round(correct / total * 100),
+            "wrong_answers": wrong,
+        })
+
+    async def leaderboard(self):
+        return await self.client.get("/api/v1/users/leaderboard", params={"limit": 20})
+
+    async def feedback(self):
+        return await self.client.get("/api/v1/users/me/feedback", headers=self.headers)
+
+    async def run(self, operation: str):
+        return await getattr(self, operation)()
+
+
+def choose_operation(mix: Dict[str, int], rng: random.Random) -> str:
+    operations = list(mix)
+    return rng.choices(operations, weights=[mix[operation] for operation in operations])[0]
@@ -3,5 +3,45 @@
 echo "Applying database migrations..."
 alembic upgrade head
 
+# Worker'lar Prometheus metriklerini bu dizinde paylaşır; eski süreçlerin
+# dosyaları toplamı bozmasın diye her başlangıçta temizlenir.
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# Arka plan işleri API süreçlerinin dışında, ayrı worker süreçlerinde çalışır. Çıkan worker
+# yeniden başlatılır; SIGTERM worker'a iletilir ve elindeki işleri bitirmesi beklenir, böylece
+# işler kilit süresi dolana kadar 'running' durumunda kalmaz.
+export JOBS_RUN_IN_APP=false
+
+run_job_worker() {
+    child=""
+    trap 'kill -TERM "$child" 2>/dev/null; wait "$child"; exit 0' TERM
+    while true; do
+        python -m app.services.jobs.worker &
+        child=$!
+        wait "$child"
+        echo "Background job worker exited with status $?, restarting..." >&2
+        sleep 1
+    done
+}
+
+echo "Starting ${JOB_WORKERS:-1} background job worker(s)..."
+worker_pids=""
+for i in $(seq "${JOB_WORKERS:-1}"); do
+    run_job_worker &
+    worker_pids="$worker_pids $!"
+done
+
 echo "Starting Gunicorn server with Uvicorn workers..."
-exec gunicorn -k uvicorn.workers.UvicornWorker -w 4 -b 0.0.0.0:8000 app.main:app
\ No newline at end of file
+gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker -w 4 -b 0.0.0.0:8000 app.main:app &
+gunicorn_pid=$!
+
+# Durdurma sinyali hem gunicorn'a hem worker'lara iletilir. Gunicorn kendiliğinden çıkarsa
+# worker'lar da durdurulur ve konteyner yeniden başlatılabilsin diye betik çıkar.
+trap 'kill -TERM "$gunicorn_pid" $worker_pids 2>/dev/null' TERM INT
+wait "$gunicorn_pid"
+status=$?
+kill -TERM $worker_pids 2>/dev/null
+wait
+exit "$status"
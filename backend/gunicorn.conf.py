@@ -0,0 +1,6 @@
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    # Ölen worker'ın metrik dosyalarını işaretle; gauge'ları artık toplama katılmaz.
+    multiprocess.mark_process_dead(worker.pid)
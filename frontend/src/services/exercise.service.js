@@ -3,7 +3,7 @@ import apiClient from './api';
 export const exerciseService = {
   /**
    * Backend'den yeni bir alıştırma oturumu ister.
-   * @param {string} exerciseType - 'grammar', 'dialogue', veya 'word_matching'
+   * @param {string} exerciseType - 'grammar', 'dialogue', 'word_matching' veya 'review'
    * @returns {Promise<object>} - Alıştırma verilerini içeren Promise
    */
   getNewExercise(exerciseType) {
@@ -22,4 +22,13 @@ export const exerciseService = {
   evaluateExercise(payload) {
     return apiClient.post('/exercise/evaluate', payload);
   },
+
+  /**
+   * Bir değerlendirmenin kişisel AI yorumunun durumunu ister.
+   * @param {number} evaluationId - /exercise/evaluate yanıtındaki evaluation_id
+   * @returns {Promise<object>} - status ('pending', 'ready', 'failed') ve feedback içeren Promise
+   */
+  getEvaluationFeedback(evaluationId) {
+    return apiClient.get(`/exercise/evaluations/${evaluationId}/feedback`);
+  },
 };
@@ -4,6 +4,17 @@ export const userService = {
   getLeaderboard() {
     return apiClient.get('/users/leaderboard');
   },
+  /**
+   * Canlı liderlik tablosuna bağlanır: önce 'snapshot', sonra yalnızca 'diff' mesajları gelir.
+   * @param {function(object): void} onMessage - Her mesajla çağrılır.
+   * @returns {WebSocket} - Kapatmak için close() çağrılır.
+   */
+  subscribeLeaderboard(onMessage) {
+    const url = `${import.meta.env.VITE_API_BASE_URL.replace(/^http/, 'ws')}/users/leaderboard/ws`;
+    const socket = new WebSocket(url);
+    socket.onmessage = (event) => onMessage(JSON.parse(event.data));
+    return socket;
+  },
   getAIFeedback() {
     return apiClient.get('/users/me/feedback');
   },
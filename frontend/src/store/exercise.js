@@ -2,9 +2,18 @@ import {defineStore} from 'pinia';
 import {exerciseService} from '@/services/exercise.service';
 import {useAuthStore} from './auth';
 
+// Kişisel AI yorumu arka planda üretilir; hazır olana kadar aralıklarla sorulur.
+const FEEDBACK_POLL_INTERVAL_MS = 1500;
+const FEEDBACK_POLL_MAX_ATTEMPTS = 40;
+
+// Yeni bir oturum başladığında süren yoklamanın sonucu yok sayılır.
+let feedbackPollToken = 0;
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
 export const useExerciseStore = defineStore('exercise', {
   state: () => ({
     questions: [],
+    reviewIds: [],
     currentQuestionIndex: 0,
     userAnswers: [],
     isSessionActive: false,
@@ -12,6 +21,8 @@ export const useExerciseStore = defineStore('exercise', {
     error: null,
     finalScore: null,
     finalFeedback: null,
+    // 'pending': kişisel yorum bekleniyor, 'ready': geldi, null: beklenmiyor
+    personalFeedbackStatus: null,
   }),
 
   getters: {
@@ -34,9 +45,13 @@ export const useExerciseStore = defineStore('exercise', {
       try {
         const {data} = await exerciseService.getNewExercise(exerciseType);
         this.questions = data.questions;
+        this.reviewIds = data.review_ids || [];
         this.isSessionActive = true;
       } catch (err) {
-        this.error = 'Alıştırma yüklenirken bir hata oluştu.';
+        // 404: tekrar oturumu istendi ama vadesi gelmiş hata yok.
+        this.error = err.response?.status === 404
+          ? err.response.data.detail
+          : 'Alıştırma yüklenirken bir hata oluştu.';
         console.error(err);
       } finally {
         this.isLoading = false;
@@ -63,6 +78,9 @@ export const useExerciseStore = defineStore('exercise', {
         const {data} = await exerciseService.evaluateExercise(payload);
         this.finalScore = data.score;
         this.finalFeedback = data.feedback;
+        if (data.evaluation_id != null) {
+          this.pollPersonalFeedback(data.evaluation_id);
+        }
         await authStore.fetchCurrentUser();
       } catch (err) {
         this.error = 'Sonuçlar değerlendirilirken bir hata oluştu.';
@@ -72,6 +90,30 @@ export const useExerciseStore = defineStore('exercise', {
       }
     },
 
+    async pollPersonalFeedback(evaluationId) {
+      const token = ++feedbackPollToken;
+      this.personalFeedbackStatus = 'pending';
+      for (let attempt = 0; attempt < FEEDBACK_POLL_MAX_ATTEMPTS; attempt++) {
+        await sleep(FEEDBACK_POLL_INTERVAL_MS);
+        if (token !== feedbackPollToken) return;
+        try {
+          const {data} = await exerciseService.getEvaluationFeedback(evaluationId);
+          if (token !== feedbackPollToken) return;
+          if (data.status === 'ready') {
+            this.finalFeedback = data.feedback;
+            this.personalFeedbackStatus = 'ready';
+            return;
+          }
+          if (data.status === 'failed') break;
+        } catch (err) {
+          // Geçici hatada anlık yorum ekranda kalır, bir sonraki denemede tekrar sorulur.
+          console.error(err);
+        }
+      }
+      if (token === feedbackPollToken) {
+        this.personalFeedbackStatus = null;
+      }
+    },
 
     prepareEvaluationPayload() {
       let totalCorrectItems = 0;
@@ -122,16 +164,20 @@ export const useExerciseStore = defineStore('exercise', {
         correct_answers: totalCorrectItems,
         wrong_answers: finalWrongAnswers,
         final_score: finalScore,
+        review_ids: this.reviewIds,
       };
     },
 
     resetSession() {
       this.questions = [];
+      this.reviewIds = [];
       this.currentQuestionIndex = 0;
       this.userAnswers = [];
       this.isSessionActive = false;
       this.finalScore = null;
       this.finalFeedback = null;
+      this.personalFeedbackStatus = null;
+      feedbackPollToken++;
       this.error = null;
     },
   },